@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+import logging
 import os
+import time
+from contextlib import asynccontextmanager
 
 from config import env as _env  # noqa: F401  # ensure dotenv is loaded early
 
@@ -15,9 +18,52 @@ except ImportError:  # pragma: no cover - optional dependency
 
 from api.routes import products as products_route
 from api.routes import conversation as conversation_route
+from api.routes import admin as admin_route
+from modules.commerce.catalog import get_catalog_manager, reload_interval
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up() -> None:
+    """Load the catalog and taxonomy, build indexes and construct agents.
+
+    Everything here is otherwise initialized lazily by the first request
+    that needs it; APP_WARMUP=true moves that cost to startup.
+    """
+    from modules.commerce.bm25 import BM25Index
+    from modules.commerce.columnar import get_catalog_columns
+    from modules.commerce.embedding_index import get_catalog_embedding_index
+    from modules.commerce.facets import get_facet_index
+    from modules.commerce.fuzzy import TrigramIndex
+    from modules.commerce.search import catalog_index
+    from modules.empowerment.keyword_index import get_catalog_keyword_index
+    from modules.intent.taxonomy import get_intent_taxonomy
+
+    started = time.perf_counter()
+    catalog_index("bm25", BM25Index)
+    catalog_index("trigram", TrigramIndex)
+    get_facet_index()
+    get_catalog_columns()
+    get_catalog_embedding_index()
+    get_catalog_keyword_index()
+    get_intent_taxonomy()
+    conversation_route.warm_up()
+    logger.info(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    if os.getenv("APP_WARMUP", "false").lower() == "true":
+        warm_up()
+    interval = reload_interval()
+    if interval > 0:
+        get_catalog_manager().start_schedule(interval)
+    yield
+    get_catalog_manager().stop_schedule()
+
 
 if FastAPI:
-    app = FastAPI(title="Contextual Commerce Optimization API")
+    app = FastAPI(title="Contextual Commerce Optimization API", lifespan=lifespan)
     if CORSMiddleware:
         frontend_origin = os.getenv("FRONTEND_URL", "http://localhost:3000")
         app.add_middleware(
@@ -29,5 +75,6 @@ if FastAPI:
         )
     app.include_router(products_route.router)
     app.include_router(conversation_route.router)
+    app.include_router(admin_route.router)
 else:
     app = None
@@ -0,0 +1,39 @@
+"""Operational endpoints (catalog reload) guarded by ``ADMIN_TOKEN``."""
+
+from __future__ import annotations
+
+try:
+    from fastapi import APIRouter, Header, HTTPException
+except ImportError:  # pragma: no cover - optional dependency
+    APIRouter = None  # type: ignore
+
+import os
+import secrets
+from typing import Optional
+
+from modules.commerce.catalog import get_catalog_manager
+
+if APIRouter:
+    router = APIRouter(prefix="/admin", tags=["admin"])
+
+    def _authorize(token: Optional[str]) -> None:
+        expected = os.getenv("ADMIN_TOKEN")
+        if not expected:
+            raise HTTPException(status_code=403, detail="Admin endpoints are disabled.")
+        if not token or not secrets.compare_digest(token, expected):
+            raise HTTPException(status_code=401, detail="Invalid admin token.")
+
+    @router.get("/catalog")
+    def catalog_status(x_admin_token: Optional[str] = Header(None)):
+        _authorize(x_admin_token)
+        return get_catalog_manager().status()
+
+    @router.post("/catalog/reload", status_code=202)
+    def reload_catalog(x_admin_token: Optional[str] = Header(None)):
+        """Reload the catalog in the background; requests keep the current one."""
+        _authorize(x_admin_token)
+        manager = get_catalog_manager()
+        started = manager.reload_in_background()
+        return {"started": started, **manager.status()}
+else:  # pragma: no cover
+    router = None
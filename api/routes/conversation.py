@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
+import threading
 from dataclasses import asdict
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
@@ -23,12 +24,38 @@ from modules.conversation.research import run_research
 
 router = APIRouter(prefix="/conversation", tags=["conversation"])
 
-INTENT_AGENT = IntentAgent()
-COMMERCE_AGENT = CommerceAgent()
-REFLECTION_AGENT = ReflectionAgent()
-AUTONOMY_GUARD = AutonomyGuardAgent()
-EXPLAIN_AGENT = ExplainAgent()
-VALUES_AGENT = ValuesAgent()
+# Agents are constructed on first use (or by ``warm_up``), not at import time.
+_AGENT_FACTORIES: Dict[str, Callable[[], Any]] = {
+    "INTENT_AGENT": IntentAgent,
+    "COMMERCE_AGENT": CommerceAgent,
+    "REFLECTION_AGENT": ReflectionAgent,
+    "AUTONOMY_GUARD": AutonomyGuardAgent,
+    "EXPLAIN_AGENT": ExplainAgent,
+    "VALUES_AGENT": ValuesAgent,
+}
+_agents_lock = threading.Lock()
+
+
+def _agent(name: str) -> Any:
+    agent = globals().get(name)
+    if agent is None:
+        with _agents_lock:
+            agent = globals().get(name)
+            if agent is None:
+                agent = globals()[name] = _AGENT_FACTORIES[name]()
+    return agent
+
+
+def __getattr__(name: str) -> Any:
+    if name in _AGENT_FACTORIES:
+        return _agent(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def warm_up() -> None:
+    """Construct every conversation agent ahead of the first request."""
+    for name in _AGENT_FACTORIES:
+        _agent(name)
 
 
 class ClarifiedGoal(BaseModel):
@@ -95,15 +122,17 @@ def _process_message(
 
     _, context_snapshot = context_for(manager)
 
-    intent = INTENT_AGENT.detect_intent(message, manager=manager)
+    intent = _agent("INTENT_AGENT").detect_intent(message, manager=manager)
     manager.ingest_intent_as_goal(intent)
     goals = manager.goal_texts()
-    plan = COMMERCE_AGENT.build_plan(intent, goals=goals, context=context_snapshot)
+    plan = _agent("COMMERCE_AGENT").build_plan(
+        intent, goals=goals, context=context_snapshot
+    )
     product_explanations = plan.get("product_explanations")
     if not product_explanations:
         product_explanations = _format_reasoning(plan.get("products", []))
     clarifications = plan.get("clarifications", [])
-    guard = AUTONOMY_GUARD.check(
+    guard = _agent("AUTONOMY_GUARD").check(
         rationale="; ".join(clarifications),
         clarifications=clarifications,
         products=plan.get("products", []),
@@ -118,8 +147,8 @@ def _process_message(
             "Recommendations paused due to constraint violations.",
         )
     else:
-        explanation = EXPLAIN_AGENT.explain(plan.get("products", []))
-    reflection = REFLECTION_AGENT.reflect(plan)
+        explanation = _agent("EXPLAIN_AGENT").explain(plan.get("products", []))
+    reflection = _agent("REFLECTION_AGENT").reflect(plan)
 
     manager.record_turn(
         "agent",
@@ -174,9 +203,9 @@ def _handle_values_dialogue(
         return state, None
 
     if state:
-        state = VALUES_AGENT.continue_dialogue(state, message)
+        state = _agent("VALUES_AGENT").continue_dialogue(state, message)
     else:
-        state = VALUES_AGENT.start(message, metadata or {})
+        state = _agent("VALUES_AGENT").start(message, metadata or {})
 
     manager.update_state(clarification_state=state.to_dict())
     latest_turn = state.turns[-1] if state.turns else None
@@ -1,18 +1,218 @@
 from __future__ import annotations
 
 try:
-    from fastapi import APIRouter, Query
+    from fastapi import APIRouter, HTTPException, Query
+    from fastapi.responses import StreamingResponse
 except ImportError:  # pragma: no cover - optional dependency
     APIRouter = None  # type: ignore
 
-from modules.commerce import search as product_search
+import base64
+import binascii
+import hashlib
+import json
+from dataclasses import fields as dataclass_fields
+from typing import (
+    Annotated,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from modules.commerce import search as search_catalog, search_cache_stats
+from modules.commerce.catalog import current_snapshot
+from modules.commerce.domain import Product
+from modules.commerce.facets import get_facet_index
+
+PRODUCT_FIELDS = tuple(field.name for field in dataclass_fields(Product))
+# Returned when ``fields`` is not given: everything but the bulky free-form
+# fields (description, media, metadata, capability_embedding).
+DEFAULT_FIELDS = (
+    "id",
+    "name",
+    "price",
+    "tags",
+    "brand",
+    "category",
+    "availability",
+    "source",
+    "merchant_name",
+    "offer_url",
+    "confidence",
+    "capabilities_enabled",
+    "empowerment_scores",
+)
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    if not fields:
+        return DEFAULT_FIELDS
+    requested = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [name for name in requested if name not in PRODUCT_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown product fields: {', '.join(unknown)}"
+        )
+    return requested or DEFAULT_FIELDS
+
+
+def _fingerprint(scope: Dict[str, Any]) -> str:
+    payload = json.dumps(scope, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+
+def _encode_cursor(offset: int, fingerprint: str, version: int) -> str:
+    payload = json.dumps({"o": offset, "f": fingerprint, "v": version})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: Optional[str], fingerprint: str, version: int) -> int:
+    """Offset stored in ``cursor``; rejects cursors from other queries or catalogs."""
+    if not cursor:
+        return 0
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        offset, cursor_fingerprint, cursor_version = (
+            payload["o"],
+            payload["f"],
+            payload["v"],
+        )
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Malformed cursor.") from None
+    if cursor_fingerprint != fingerprint or not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=400, detail="Cursor belongs to another query.")
+    if cursor_version != version:
+        raise HTTPException(
+            status_code=410, detail="The catalog changed; restart the search."
+        )
+    return offset
+
+
+def _project(product: Product, fields: Sequence[str]) -> Dict[str, Any]:
+    return {name: getattr(product, name) for name in fields}
+
+
+def _stream_page(
+    products: Sequence[Product], fields: Sequence[str], meta: Dict[str, Any]
+) -> Iterator[str]:
+    """Yield a JSON object ``{"items": [...], **meta}`` one product at a time."""
+    yield '{"items": ['
+    for position, product in enumerate(products):
+        prefix = ", " if position else ""
+        yield prefix + json.dumps(_project(product, fields), default=str)
+    yield "]"
+    for key, value in meta.items():
+        yield f", {json.dumps(key)}: {json.dumps(value, default=str)}"
+    yield "}"
+
+
+def _page(
+    total: int,
+    fetch: Callable[[int, int], Sequence[Product]],
+    version: int,
+    limit: int,
+    cursor: Optional[str],
+    fields: Optional[str],
+    scope: Dict[str, Any],
+    meta: Optional[Dict[str, Any]] = None,
+) -> StreamingResponse:
+    """Stream one page of ``total`` results; ``fetch(offset, limit)`` returns it."""
+    projection = _parse_fields(fields)
+    fingerprint = _fingerprint(scope)
+    offset = _decode_cursor(cursor, fingerprint, version)
+    page = fetch(offset, limit)
+    next_offset = offset + len(page)
+    next_cursor = (
+        _encode_cursor(next_offset, fingerprint, version)
+        if next_offset < total
+        else None
+    )
+    body = _stream_page(
+        page,
+        projection,
+        {"total": total, "next_cursor": next_cursor, **(meta or {})},
+    )
+    return StreamingResponse(body, media_type="application/json")
+
 
 if APIRouter:
     router = APIRouter(prefix="/products", tags=["products"])
 
     @router.get("/search")
-    def search_products(query: str = Query("", max_length=128)):
-        products = product_search.search(query)
-        return [product.__dict__ for product in products]
+    def search_products(
+        query: Annotated[str, Query(max_length=128)] = "",
+        limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+        cursor: Annotated[Optional[str], Query(max_length=256)] = None,
+        fields: Annotated[Optional[str], Query(max_length=512)] = None,
+    ):
+        """Search the catalog, one page at a time.
+
+        Pass ``next_cursor`` from a response as ``cursor`` to get the next
+        page; ``fields`` is a comma-separated projection of product fields.
+        """
+        # One snapshot for both, so the cursor version matches the results.
+        snapshot = current_snapshot()
+        results = search_catalog(query, snapshot=snapshot)
+        scope = {"query": " ".join(query.lower().split())}
+        return _page(
+            len(results),
+            lambda offset, count: results[offset : offset + count],
+            snapshot.version,
+            limit,
+            cursor,
+            fields,
+            scope,
+        )
+
+    @router.get("/search/cache")
+    def search_cache():
+        """Hit-rate metrics for the search result cache."""
+        return search_cache_stats()
+
+    @router.get("/filter")
+    def filter_products(
+        price_min: Annotated[Optional[float], Query(ge=0)] = None,
+        price_max: Annotated[Optional[float], Query(ge=0)] = None,
+        min_confidence: Annotated[Optional[float], Query(ge=0, le=1)] = None,
+        availability: Annotated[Optional[List[str]], Query()] = None,
+        category: Annotated[Optional[List[str]], Query()] = None,
+        source: Annotated[Optional[List[str]], Query()] = None,
+        tag: Annotated[Optional[List[str]], Query()] = None,
+        facet_limit: Annotated[Optional[int], Query(ge=1)] = None,
+        limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+        cursor: Annotated[Optional[str], Query(max_length=256)] = None,
+        fields: Annotated[Optional[str], Query(max_length=512)] = None,
+    ):
+        """Filter the catalog and return facet counts for the selection."""
+        criteria = {
+            "price_min": price_min,
+            "price_max": price_max,
+            "min_confidence": min_confidence,
+            "availability": availability,
+            "category": category,
+            "source": source,
+            "tag": tag,
+        }
+        snapshot = current_snapshot()
+        index = get_facet_index(snapshot)
+        selection = index.mask(**criteria)
+        # Only the requested page of rows is turned into products.
+        rows = index.rows_in(selection)
+        return _page(
+            len(rows),
+            lambda offset, count: index.products_at(rows[offset : offset + count]),
+            snapshot.version,
+            limit,
+            cursor,
+            fields,
+            criteria,
+            {"facets": index.counts(selection, facet_limit)},
+        )
 else:  # pragma: no cover
     router = None
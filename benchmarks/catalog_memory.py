@@ -0,0 +1,147 @@
+"""Memory footprint of a normalized catalog, before and after compaction.
+
+Builds a synthetic Shopify-style feed (several variants per product sharing
+title, description, tags and capabilities, one JSON row per variant as a
+feed export delivers them) and measures, with ``tracemalloc``, what the
+resulting product records retain:
+
+- "dict": dict-backed dataclasses with every string parsed per row (the
+  previous representation);
+- "compact": the adapter transformers' output (slotted records, interned
+  tags/categories/brands/capabilities, pooled titles and descriptions).
+
+Usage: python -m benchmarks.catalog_memory [--products N] [--variants V] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import tracemalloc
+from dataclasses import MISSING, field, fields, make_dataclass
+from typing import Any, Callable, Dict, Iterator, List
+
+from modules.commerce.adapters.transformers import transform_catalog
+from modules.commerce.domain import Product, RawProduct
+
+CATEGORIES = ["workspace", "wellness", "learning", "home", "outdoors", "kitchen"]
+BRANDS = [f"Brand {i}" for i in range(40)]
+CAPABILITIES = ["Focus", "Posture", "Sleep", "Hydration", "Mobility", "Learning"]
+
+# The previous, dict-backed Product, kept here only as the baseline.
+_DictProduct = make_dataclass(
+    "DictProduct",
+    [
+        (
+            spec.name,
+            spec.type,
+            field(default=spec.default)
+            if spec.default is not MISSING
+            else field(default_factory=spec.default_factory),
+        )
+        for spec in fields(Product)
+    ],
+)
+
+
+def _feed_rows(products: int, variants: int) -> Iterator[str]:
+    for p in range(products):
+        description = f"Product {p}: " + "Durable, thoughtfully designed gear. " * 16
+        for v in range(variants):
+            yield json.dumps(
+                {
+                    "product_id": f"{p}-{v}",
+                    "sku": f"SKU-{p}-{v}",
+                    "title": f"Product {p}",
+                    "description": description,
+                    "brand": BRANDS[p % len(BRANDS)],
+                    "category": CATEGORIES[p % len(CATEGORIES)],
+                    "price": 10.0 + v,
+                    "currency": "USD",
+                    "availability": "in_stock",
+                    "inventory_quantity": 5,
+                    "attributes": {
+                        "tags": [CATEGORIES[(p + 1) % len(CATEGORIES)], "bestseller"],
+                        "capabilities": CAPABILITIES[p % 3 : p % 3 + 3],
+                        "empowerment_scores": {"focus": 0.5},
+                    },
+                    "source": "shopify",
+                }
+            )
+
+
+def _raw_products(products: int, variants: int) -> Iterator[RawProduct]:
+    for row in _feed_rows(products, variants):
+        yield RawProduct(**json.loads(row))
+
+
+def _dict_catalog(products: int, variants: int) -> List[Any]:
+    catalog = []
+    for raw in _raw_products(products, variants):
+        catalog.append(
+            _DictProduct(
+                id=raw.product_id,
+                name=raw.title,
+                price=raw.price,
+                tags=[t for t in {raw.category or "", *raw.attributes["tags"]} if t],
+                description=raw.description or "",
+                brand=raw.brand,
+                category=raw.category,
+                availability=raw.availability,
+                media=raw.images,
+                empowerment_scores=dict(raw.attributes["empowerment_scores"]),
+                capabilities_enabled=raw.attributes["capabilities"],
+                source=raw.source,
+                metadata=raw.source_metadata,
+            )
+        )
+    return catalog
+
+
+def _compact_catalog(products: int, variants: int) -> List[Product]:
+    return transform_catalog(_raw_products(products, variants))
+
+
+def _retained_bytes(build: Callable[[int, int], List[Any]], *args: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    catalog = build(*args)
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del catalog
+    return retained
+
+
+def run(products: int = 2000, variants: int = 4) -> Dict[str, Any]:
+    records = products * variants
+    before = _retained_bytes(_dict_catalog, products, variants)
+    after = _retained_bytes(_compact_catalog, products, variants)
+    return {
+        "records": records,
+        "dict_bytes_per_record": before / records,
+        "compact_bytes_per_record": after / records,
+        "reduction": 1 - after / before,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--variants", type=int, default=4)
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    args = parser.parse_args()
+
+    results = run(args.products, args.variants)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{results['records']} records")
+    print(f"  dict     {results['dict_bytes_per_record']:8.0f} bytes/record")
+    print(f"  compact  {results['compact_bytes_per_record']:8.0f} bytes/record")
+    print(f"  reduction {results['reduction']:7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Import-time and first-use benchmark for the API's startup path.
+
+Each measurement runs in a fresh interpreter so module caches do not leak
+between runs. "import" is the cost of importing a module; "first use" is
+the lazily deferred work (catalog load, index builds, taxonomy parsing,
+agent construction) that the first request or ``APP_WARMUP`` pays.
+
+Usage: python -m benchmarks.import_time [--repeat N] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+ROOT = Path(__file__).resolve().parents[1]
+
+IMPORTS = [
+    "modules.commerce.search",
+    "modules.intent",
+    "modules.conversation.agents",
+    "api.routes.conversation",
+    "api.main",
+]
+
+FIRST_USE = {
+    "catalog + search indexes": (
+        "from modules.commerce.search import search",
+        "search('workspace')",
+    ),
+    "intent taxonomy": (
+        "import modules.intent.classifier as c",
+        "c.classify('ergonomic desk')",
+    ),
+    "conversation agents": (
+        "import api.routes.conversation as r",
+        "r.warm_up()",
+    ),
+    "full warm-up": ("import api.main as m", "m.warm_up()"),
+}
+
+_TIMER = (
+    "import time\n"
+    "_start = time.perf_counter()\n"
+    "{statement}\n"
+    "print(time.perf_counter() - _start)\n"
+)
+
+
+def _time_in_subprocess(setup: str, statement: str) -> float:
+    code = setup + "\n" + _TIMER.format(statement=statement)
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def run(repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Median seconds per measurement over ``repeat`` fresh interpreters."""
+    results: Dict[str, Dict[str, float]] = {"import": {}, "first_use": {}}
+    for module in IMPORTS:
+        samples = [_time_in_subprocess("", f"import {module}") for _ in range(repeat)]
+        results["import"][module] = statistics.median(samples)
+    for name, (setup, statement) in FIRST_USE.items():
+        samples = [_time_in_subprocess(setup, statement) for _ in range(repeat)]
+        results["first_use"][name] = statistics.median(samples)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for section, timings in results.items():
+        print(f"{section.replace('_', ' ')} (median of {args.repeat}):")
+        for name, seconds in timings.items():
+            print(f"  {name:<32} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
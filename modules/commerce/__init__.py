@@ -4,15 +4,30 @@ This module owns all product-related domain models, services, and adapters.
 """
 
 from modules.commerce.domain import Product, RawProduct, RawOffer
-from modules.commerce.search import search, related_by_tag, list_empowerment_scores
+from modules.commerce.search import (
+    search,
+    search_many,
+    get_product,
+    get_products,
+    related_by_tag,
+    list_empowerment_scores,
+    search_cache_stats,
+)
 from modules.commerce.compare import compare
+from modules.commerce.facets import facet_counts, filter_products
 
 __all__ = [
     "Product",
     "RawProduct",
     "RawOffer",
     "search",
+    "search_many",
+    "get_product",
+    "get_products",
     "related_by_tag",
     "list_empowerment_scores",
+    "search_cache_stats",
     "compare",
+    "facet_counts",
+    "filter_products",
 ]
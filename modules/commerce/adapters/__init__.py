@@ -1,5 +1,17 @@
 """Catalog adapters for loading products from various sources."""
 
-from modules.commerce.adapters.loader import load_catalog, register_source
+from modules.commerce.adapters.loader import (
+    FederatedCatalog,
+    SourceLoad,
+    load_catalog,
+    load_federated,
+    register_source,
+)
 
-__all__ = ["load_catalog", "register_source"]
+__all__ = [
+    "FederatedCatalog",
+    "SourceLoad",
+    "load_catalog",
+    "load_federated",
+    "register_source",
+]
@@ -1,13 +1,25 @@
-"""Registry for loading catalogs from different data sources."""
+"""Registry for loading catalogs from different data sources.
+
+``CATALOG_SOURCE`` names one source or a comma-separated list of them
+(e.g. ``shopify,google_merchant``). Several sources are loaded concurrently
+and merged by :func:`load_federated`.
+"""
 
 from __future__ import annotations
 
+import logging
 import os
-from typing import List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence, Set, Tuple
 
 from modules.commerce.domain import Product
 from modules.commerce.adapters.mock import load_catalog as load_mock_catalog
 
+logger = logging.getLogger(__name__)
+
 _SOURCE_MAP = {
     "mock": load_mock_catalog,
 }
@@ -17,8 +29,7 @@ def register_source(name: str, loader):
     _SOURCE_MAP[name] = loader
 
 
-def load_catalog(source: str | None = None) -> List[Product]:
-    source_name = (source or os.getenv("CATALOG_SOURCE", "mock")).lower()
+def _resolve_loader(source_name: str) -> Callable[[], List[Product]]:
     if source_name not in _SOURCE_MAP:
         if source_name == "shopify":
             from modules.commerce.adapters.shopify import load_catalog as load_shopify
@@ -36,5 +47,119 @@ def load_catalog(source: str | None = None) -> List[Product]:
             _SOURCE_MAP[source_name] = load_merchant_catalog
         else:
             raise ValueError(f"Unknown catalog source: {source_name}")
-    loader = _SOURCE_MAP[source_name]
-    return loader()
+    return _SOURCE_MAP[source_name]
+
+
+def load_catalog(source: str | None = None) -> List[Product]:
+    source_names = [
+        name.strip()
+        for name in (source or os.getenv("CATALOG_SOURCE", "mock")).lower().split(",")
+        if name.strip()
+    ]
+    if len(source_names) == 1:
+        return _resolve_loader(source_names[0])()
+    return load_federated(source_names).products
+
+
+@dataclass
+class SourceLoad:
+    """Outcome of loading one source of a federated catalog."""
+
+    source: str
+    products: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class FederatedCatalog:
+    """Merged products plus what each source contributed."""
+
+    products: List[Product] = field(default_factory=list)
+    sources: List[SourceLoad] = field(default_factory=list)
+    duplicates: int = 0
+
+
+def _timed(loader: Callable[[], List[Product]]) -> Tuple[List[Product], float]:
+    started = time.perf_counter()
+    products = loader()
+    return products, time.perf_counter() - started
+
+
+def load_federated(
+    sources: Sequence[str],
+    timeout: float | None = None,
+    max_workers: int | None = None,
+) -> FederatedCatalog:
+    """Load ``sources`` concurrently and merge them in the given order.
+
+    Each source gets ``timeout`` seconds (CATALOG_SOURCE_TIMEOUT, default
+    60) from the start of the load. Sources that fail or time out are
+    skipped and reported; if none succeeds a ``RuntimeError`` is raised.
+    Every product records the source it came from in
+    ``metadata["catalog_source"]``; when two sources share a product id the
+    earlier source wins.
+    """
+    timeout = (
+        float(os.getenv("CATALOG_SOURCE_TIMEOUT", "60")) if timeout is None else timeout
+    )
+    loaders = {name: _resolve_loader(name) for name in dict.fromkeys(sources)}
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers or len(loaders), thread_name_prefix="catalog-source"
+    )
+    try:
+        futures = {
+            name: executor.submit(_timed, loader) for name, loader in loaders.items()
+        }
+        deadline = time.monotonic() + timeout
+        catalog = FederatedCatalog()
+        seen: Set[str] = set()
+        for name, future in futures.items():
+            report = SourceLoad(source=name)
+            catalog.sources.append(report)
+            try:
+                products, report.seconds = future.result(
+                    timeout=max(deadline - time.monotonic(), 0.0)
+                )
+            except FutureTimeoutError:
+                report.error = f"timed out after {timeout:.0f}s"
+            except Exception as exc:
+                report.error = str(exc) or type(exc).__name__
+            if report.error:
+                logger.warning(f"Catalog source '{name}' skipped: {report.error}")
+                continue
+            for product in products:
+                if product.id in seen:
+                    catalog.duplicates += 1
+                    continue
+                seen.add(product.id)
+                product.metadata.setdefault("catalog_source", name)
+                catalog.products.append(product)
+            report.products = len(products)
+    finally:
+        # Do not wait for sources that timed out; their results are dropped.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if not any(report.error is None for report in catalog.sources):
+        failures = "; ".join(f"{r.source}: {r.error}" for r in catalog.sources)
+        raise RuntimeError(f"No catalog source could be loaded ({failures})")
+    summary = ", ".join(
+        f"{r.source}={r.products} ({r.seconds:.2f}s)"
+        if r.error is None
+        else f"{r.source}=failed"
+        for r in catalog.sources
+    )
+    logger.info(
+        f"Federated catalog loaded: {summary}; "
+        f"{catalog.duplicates} duplicate id(s) dropped"
+    )
+    return catalog
+
+
+__all__ = [
+    "FederatedCatalog",
+    "SourceLoad",
+    "load_catalog",
+    "load_federated",
+    "register_source",
+]
@@ -5,7 +5,11 @@ from __future__ import annotations
 from typing import Dict, Iterable, Iterator, List
 
 from modules.commerce.domain import RawOffer, RawProduct
-from modules.commerce.adapters.transformers import raw_offer_to_raw_product
+from modules.commerce.adapters.transformers import (
+    TextPool,
+    intern_list,
+    raw_offer_to_raw_product,
+)
 from shared.transformers.text import strip_html
 
 from .metafields import derive_capabilities, extract_llm_metafields
@@ -17,14 +21,18 @@ def shopify_product_to_offers(product: Dict) -> List[RawOffer]:
         image.get("src", "") for image in product.get("images", []) if image.get("src")
     ]
     metafields = extract_llm_metafields(product)
+    # Parsed once per product; each variant gets its own lists of the same
+    # interned strings.
+    capabilities = intern_list(derive_capabilities(metafields))
+    tags = intern_list(
+        tag.strip() for tag in product.get("tags", "").split(",") if tag.strip()
+    )
     offers: List[RawOffer] = []
     for variant in product.get("variants", []):
         attributes = {
             **metafields,
-            "capabilities": derive_capabilities(metafields),
-            "tags": [
-                tag.strip() for tag in product.get("tags", "").split(",") if tag.strip()
-            ],
+            "capabilities": list(capabilities),
+            "tags": list(tags),
             "empowerment_scores": _collect_empowerment_scores(metafields),
         }
         variant_attributes = {
@@ -63,8 +71,9 @@ def iter_offers(products: Iterable[Dict]) -> Iterator[RawOffer]:
 
 
 def iter_raw_products(products: Iterable[Dict]) -> Iterator[RawProduct]:
+    pool = TextPool()
     for offer in iter_offers(products):
-        yield raw_offer_to_raw_product(offer)
+        yield raw_offer_to_raw_product(offer, pool)
 
 
 def _variant_currency(variant: Dict) -> str:
@@ -1,10 +1,48 @@
-"""Data transformation utilities for commerce adapters."""
+"""Data transformation utilities for commerce adapters.
+
+The transformers emit compact records: low-cardinality strings (tags,
+categories, brands, capability names, sources, availability, currencies)
+are interned so every record shares one copy, and descriptions go through a
+``TextPool`` so variants of one product share a single description string.
+"""
 
 from __future__ import annotations
 
-from typing import Iterable, List
+import sys
+from typing import Dict, Iterable, List, Optional
 
-from modules.commerce.domain import Product, RawProduct, RawOffer
+from modules.commerce.domain import Product, RawProduct, RawOffer, freeze
+
+
+# ============================================================================
+# String sharing
+# ============================================================================
+
+
+def intern_str(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def intern_list(values: Iterable[str]) -> List[str]:
+    return [sys.intern(str(value)) for value in values]
+
+
+class TextPool:
+    """Deduplicates long free-form strings such as descriptions.
+
+    Unlike ``sys.intern`` the pool is dropped with the catalog it built.
+    """
+
+    def __init__(self) -> None:
+        self._texts: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def share(self, text: Optional[str]) -> Optional[str]:
+        if not text:
+            return text
+        return self._texts.setdefault(text, text)
 
 
 # ============================================================================
@@ -12,28 +50,34 @@ from modules.commerce.domain import Product, RawProduct, RawOffer
 # ============================================================================
 
 
-def raw_offer_to_raw_product(offer: RawOffer) -> RawProduct:
+def raw_offer_to_raw_product(
+    offer: RawOffer, pool: Optional[TextPool] = None
+) -> RawProduct:
     sku = str(offer.variant_attributes.get("sku") or offer.source_id)
     return RawProduct(
         product_id=offer.source_id,
         sku=sku,
-        title=offer.title,
-        description=offer.description,
-        brand=_extract_brand(offer),
-        category=str(
-            offer.attributes.get("category")
-            or offer.variant_attributes.get("category")
-            or ""
+        title=pool.share(offer.title) if pool is not None else offer.title,
+        description=pool.share(offer.description)
+        if pool is not None
+        else offer.description,
+        brand=intern_str(_extract_brand(offer)),
+        category=intern_str(
+            str(
+                offer.attributes.get("category")
+                or offer.variant_attributes.get("category")
+                or ""
+            )
         ),
         price=offer.price,
-        currency=offer.currency,
-        availability=offer.availability,
+        currency=intern_str(offer.currency),
+        availability=intern_str(offer.availability),
         inventory_quantity=offer.inventory_quantity,
         images=list(offer.media),
         attributes=offer.attributes,
         source_metadata={"source": offer.source},
-        source=offer.source,
-        merchant_name=offer.merchant_name,
+        source=intern_str(offer.source),
+        merchant_name=intern_str(offer.merchant_name),
         offer_url=offer.offer_url,
         confidence=offer.confidence,
         completeness=offer.completeness,
@@ -41,7 +85,8 @@ def raw_offer_to_raw_product(offer: RawOffer) -> RawProduct:
 
 
 def convert_offers(offers: Iterable[RawOffer]) -> List[RawProduct]:
-    return [raw_offer_to_raw_product(offer) for offer in offers]
+    pool = TextPool()
+    return [raw_offer_to_raw_product(offer, pool) for offer in offers]
 
 
 def _extract_brand(offer: RawOffer) -> str:
@@ -57,22 +102,23 @@ def _extract_brand(offer: RawOffer) -> str:
 # ============================================================================
 
 
-def raw_product_to_product(raw: RawProduct) -> Product:
+def raw_product_to_product(raw: RawProduct, pool: Optional[TextPool] = None) -> Product:
+    description = raw.description or ""
     return Product(
         id=raw.product_id,
-        name=raw.title,
+        name=pool.share(raw.title) if pool is not None else raw.title,
         price=raw.price,
         tags=_derive_tags(raw),
-        description=raw.description or "",
-        brand=raw.attributes.get("brand_override", raw.brand),
-        category=raw.category,
-        availability=raw.availability,
+        description=pool.share(description) if pool is not None else description,
+        brand=intern_str(raw.attributes.get("brand_override", raw.brand)),
+        category=intern_str(raw.category),
+        availability=intern_str(raw.availability),
         media=raw.images,
         empowerment_scores=_extract_empowerment_scores(raw),
-        capabilities_enabled=raw.attributes.get("capabilities", []),
+        capabilities_enabled=intern_list(raw.attributes.get("capabilities", [])),
         capability_embedding=raw.attributes.get("capability_embedding"),
-        source=raw.source,
-        merchant_name=raw.merchant_name,
+        source=intern_str(raw.source),
+        merchant_name=intern_str(raw.merchant_name),
         offer_url=raw.offer_url,
         confidence=raw.confidence,
         metadata=raw.source_metadata,
@@ -81,13 +127,20 @@ def raw_product_to_product(raw: RawProduct) -> Product:
 
 def _derive_tags(raw: RawProduct) -> List[str]:
     tags = list({raw.category or "", *raw.attributes.get("tags", [])})
-    return [tag for tag in tags if tag]
+    return intern_list(tag for tag in tags if tag)
 
 
 def _extract_empowerment_scores(raw: RawProduct) -> dict[str, float]:
     scores = raw.attributes.get("empowerment_scores", {})
-    return {key: float(value) for key, value in scores.items()}
-
-
-def transform_catalog(catalog: Iterable[RawProduct]) -> List[Product]:
-    return [raw_product_to_product(item) for item in catalog]
+    return {sys.intern(key): float(value) for key, value in scores.items()}
+
+
+def transform_catalog(
+    catalog: Iterable[RawProduct], frozen: bool = False
+) -> List[Product]:
+    """Normalize ``catalog``; ``frozen`` returns ``FrozenProduct`` records."""
+    pool = TextPool()
+    products = [raw_product_to_product(item, pool) for item in catalog]
+    if frozen:
+        return [freeze(product) for product in products]
+    return products
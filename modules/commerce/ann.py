@@ -0,0 +1,545 @@
+"""Approximate nearest-neighbour retrieval over catalog embeddings.
+
+``IVFFlatIndex`` is an inverted-file index implemented in NumPy: product
+vectors are clustered with spherical k-means, stored contiguously per
+cluster, and a query only scans the ``nprobe`` clusters whose centroids are
+closest to it. Catalogs below ``exact_threshold`` products are scanned
+exhaustively, which is already sub-millisecond at that size.
+
+Products embedded after the index was built (see
+``CatalogEmbeddingIndex.upsert``) go to a small overflow buffer that is
+always scanned exactly; the clusters are retrained once the buffer exceeds
+``rebuild_fraction`` of the index.
+
+Recall/latency knobs (environment):
+
+- ``ANN_NLIST``: number of clusters (0 = ``sqrt(n)``)
+- ``ANN_NPROBE``: clusters scanned per query; higher = better recall, slower
+- ``ANN_EXACT_THRESHOLD``: catalogs up to this size use exact search
+
+Build or refresh the persisted index with::
+
+    python -m modules.commerce.ann
+"""
+
+from __future__ import annotations
+
+import copy
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from modules.commerce.domain import Product
+from modules.commerce.embedding_index import (
+    DATA_DIR,
+    CatalogEmbeddingIndex,
+    get_catalog_embedding_index,
+    provider_key,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per GEMM during k-means assignment, to bound peak memory.
+_ASSIGN_CHUNK = 8192
+
+
+@dataclass
+class ANNConfig:
+    """Recall/latency trade-offs for the IVF-flat index."""
+
+    n_lists: int = field(default_factory=lambda: int(os.getenv("ANN_NLIST", "0")))
+    nprobe: int = field(default_factory=lambda: int(os.getenv("ANN_NPROBE", "8")))
+    exact_threshold: int = field(
+        default_factory=lambda: int(os.getenv("ANN_EXACT_THRESHOLD", "2048"))
+    )
+    train_iterations: int = 10
+    # k-means trains on at most this many vectors per cluster
+    train_samples_per_list: int = 64
+    rebuild_fraction: float = 0.1
+    seed: int = 0
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-10)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for every row of ``vectors``."""
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _ASSIGN_CHUNK):
+        block = vectors[start : start + _ASSIGN_CHUNK]
+        labels[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def _train_centroids(
+    vectors: np.ndarray, n_lists: int, config: ANNConfig
+) -> np.ndarray:
+    """Spherical k-means on a sample of ``vectors``."""
+    rng = np.random.default_rng(config.seed)
+    sample_size = min(len(vectors), n_lists * config.train_samples_per_list)
+    if sample_size < len(vectors):
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    else:
+        sample = vectors
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+    for _ in range(config.train_iterations):
+        labels = _assign(sample, centroids)
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=n_lists)
+        populated = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[populated]
+        sums = np.add.reduceat(sample[order], starts, axis=0)
+        centroids[populated] = _normalize(sums)
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            # Re-seed dead clusters on random points so every list is used.
+            centroids[empty] = sample[rng.choice(len(sample), len(empty))]
+    return centroids
+
+
+class IVFFlatIndex:
+    """Inverted-file index with exact (flat) scoring inside each cluster.
+
+    Vectors are L2-normalized, so scores are cosine similarities. Each id
+    carries the text hash it was embedded from, which lets
+    :func:`get_ann_index` apply only the changes made to the embedding
+    index since this index was built.
+
+    ``add`` and ``remove`` mutate the index, so an index that is being
+    searched must not be updated; update a :meth:`copy` and swap it in.
+    """
+
+    def __init__(self, dimension: int, config: ANNConfig | None = None):
+        self.config = config or ANNConfig()
+        self.provider_key = ""
+        self.centroids = np.empty((0, dimension), dtype=np.float32)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.vectors = np.empty((0, dimension), dtype=np.float32)
+        self.ids: List[str] = []
+        self._live = np.ones(0, dtype=bool)
+        self._deleted = 0
+        self._extra = np.empty((0, dimension), dtype=np.float32)
+        self._extra_ids: List[str] = []
+        self._extra_live: List[bool] = []
+        self._positions: Dict[str, Tuple[bool, int]] = {}  # id -> (overflow?, row)
+        self.text_hashes: Dict[str, str] = {}
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        ids: Sequence[str],
+        text_hashes: Sequence[str] | None = None,
+        config: ANNConfig | None = None,
+    ) -> "IVFFlatIndex":
+        """Cluster ``vectors`` and lay them out contiguously per cluster."""
+        config = config or ANNConfig()
+        vectors = _normalize(vectors)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("vectors must be an (n, dim) matrix with one id per row")
+        index = cls(vectors.shape[1], config)
+        total = len(vectors)
+
+        n_lists = config.n_lists or int(round(np.sqrt(total)))
+        if total <= config.exact_threshold or n_lists < 2:
+            index.offsets = np.array([0, total], dtype=np.int64)
+            index.vectors = np.ascontiguousarray(vectors)
+            index.ids = list(ids)
+        else:
+            n_lists = min(n_lists, total)
+            centroids = _train_centroids(vectors, n_lists, config)
+            labels = _assign(vectors, centroids)
+            order = np.argsort(labels, kind="stable")
+            counts = np.bincount(labels, minlength=n_lists)
+            index.centroids = centroids
+            index.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+            index.vectors = np.ascontiguousarray(vectors[order])
+            index.ids = [ids[row] for row in order]
+
+        index._live = np.ones(total, dtype=bool)
+        index._positions = {pid: (False, row) for row, pid in enumerate(index.ids)}
+        if text_hashes is not None:
+            index.text_hashes = dict(zip(ids, text_hashes))
+        return index
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+    @property
+    def n_lists(self) -> int:
+        """Number of clusters; 0 means the index is searched exhaustively."""
+        return len(self.centroids)
+
+    @property
+    def pending(self) -> int:
+        """Vectors in the overflow buffer plus tombstoned cluster rows."""
+        return len(self._extra_ids) + self._deleted
+
+    def needs_rebuild(self) -> bool:
+        """Whether incremental changes have outgrown the trained clusters."""
+        threshold = max(self.config.rebuild_fraction * len(self.vectors), 64)
+        return self.pending > threshold
+
+    def remove(self, ids: Sequence[str]) -> None:
+        """Tombstone ``ids`` so they are no longer returned."""
+        for pid in ids:
+            position = self._positions.pop(pid, None)
+            self.text_hashes.pop(pid, None)
+            if position is None:
+                continue
+            overflow, row = position
+            if overflow:
+                self._extra_live[row] = False
+            else:
+                self._live[row] = False
+                self._deleted += 1
+
+    def add(
+        self,
+        vectors: np.ndarray,
+        ids: Sequence[str],
+        text_hashes: Sequence[str] | None = None,
+    ) -> None:
+        """Insert or replace vectors without retraining the clusters."""
+        vectors = _normalize(vectors).reshape(len(ids), -1)
+        self.remove(ids)
+        start = len(self._extra_ids)
+        self._extra = np.concatenate([self._extra, vectors])
+        self._extra_ids.extend(ids)
+        self._extra_live.extend([True] * len(ids))
+        for offset, pid in enumerate(ids):
+            self._positions[pid] = (True, start + offset)
+        if text_hashes is not None:
+            self.text_hashes.update(zip(ids, text_hashes))
+
+    def search(
+        self,
+        query: Sequence[float] | np.ndarray,
+        k: int = 10,
+        nprobe: int | None = None,
+    ) -> Tuple[List[str], np.ndarray]:
+        """Return up to ``k`` ids and cosine scores, best first.
+
+        ``nprobe`` overrides the configured number of clusters scanned;
+        passing ``nprobe >= n_lists`` makes the search exact.
+        """
+        if k <= 0 or not len(self):
+            return [], np.empty(0, dtype=np.float32)
+        q = _normalize(query).reshape(-1)
+        nprobe = nprobe or self.config.nprobe
+
+        if self.n_lists and nprobe < self.n_lists:
+            centroid_scores = self.centroids @ q
+            lists = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        else:
+            lists = range(len(self.offsets) - 1)
+
+        score_blocks: List[np.ndarray] = []
+        row_blocks: List[np.ndarray] = []
+        for list_id in lists:
+            start, stop = self.offsets[list_id], self.offsets[list_id + 1]
+            if start == stop:
+                continue
+            scores = self.vectors[start:stop] @ q
+            if self._deleted:
+                scores[~self._live[start:stop]] = -np.inf
+            score_blocks.append(scores)
+            row_blocks.append(np.arange(start, stop))
+        if self._extra_ids:
+            scores = self._extra @ q
+            scores[~np.asarray(self._extra_live)] = -np.inf
+            score_blocks.append(scores)
+            # Overflow rows are encoded after the clustered rows.
+            row_blocks.append(np.arange(len(self._extra_ids)) + len(self.vectors))
+        if not score_blocks:
+            return [], np.empty(0, dtype=np.float32)
+
+        scores = np.concatenate(score_blocks)
+        rows = np.concatenate(row_blocks)
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        top = top[np.isfinite(scores[top])]
+
+        clustered = len(self.vectors)
+        ids = [
+            self.ids[row] if row < clustered else self._extra_ids[row - clustered]
+            for row in rows[top]
+        ]
+        return ids, scores[top]
+
+    def copy(self) -> "IVFFlatIndex":
+        """Copy that can be updated without affecting searches on this one.
+
+        The clustered vectors are shared; ``add`` never writes into them.
+        """
+        clone = copy.copy(self)
+        clone._live = self._live.copy()
+        clone._extra_ids = list(self._extra_ids)
+        clone._extra_live = list(self._extra_live)
+        clone._positions = dict(self._positions)
+        clone.text_hashes = dict(self.text_hashes)
+        return clone
+
+    def compact(self) -> "IVFFlatIndex":
+        """Retrain on the live vectors, folding in the overflow buffer."""
+        vectors, ids = self.live_vectors()
+        rebuilt = IVFFlatIndex.build(
+            vectors,
+            ids,
+            [self.text_hashes.get(pid, "") for pid in ids],
+            self.config,
+        )
+        rebuilt.provider_key = self.provider_key
+        return rebuilt
+
+    def live_vectors(self) -> Tuple[np.ndarray, List[str]]:
+        """All searchable vectors and their ids."""
+        extra_live = np.asarray(self._extra_live, dtype=bool)
+        vectors = np.concatenate([self.vectors[self._live], self._extra[extra_live]])
+        ids = [pid for pid, live in zip(self.ids, self._live) if live]
+        ids += [pid for pid, live in zip(self._extra_ids, self._extra_live) if live]
+        return vectors, ids
+
+    def save(self, path: str | Path) -> None:
+        """Persist atomically as an uncompressed ``.npz`` file.
+
+        The overflow buffer is folded in first, so the saved index is fully
+        clustered.
+        """
+        index = self.compact() if self.pending else self
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("wb") as handle:
+            np.savez(
+                handle,
+                centroids=index.centroids,
+                offsets=index.offsets,
+                vectors=index.vectors,
+                ids=np.array(index.ids, dtype=str),
+                text_hashes=np.array(
+                    [index.text_hashes.get(pid, "") for pid in index.ids], dtype=str
+                ),
+                provider_key=np.array(index.provider_key),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str | Path, config: ANNConfig | None = None) -> "IVFFlatIndex":
+        """Load an index written by :meth:`save`."""
+        with np.load(Path(path), allow_pickle=False) as payload:
+            vectors = np.ascontiguousarray(payload["vectors"], dtype=np.float32)
+            index = cls(vectors.shape[1], config)
+            index.vectors = vectors
+            index.centroids = np.ascontiguousarray(
+                payload["centroids"], dtype=np.float32
+            )
+            index.offsets = payload["offsets"].astype(np.int64)
+            index.ids = [str(pid) for pid in payload["ids"]]
+            hashes = [str(h) for h in payload["text_hashes"]]
+            index.provider_key = str(payload["provider_key"])
+        index._live = np.ones(len(index.ids), dtype=bool)
+        index._positions = {pid: (False, row) for row, pid in enumerate(index.ids)}
+        index.text_hashes = dict(zip(index.ids, hashes))
+        return index
+
+
+def default_ann_path() -> Path:
+    """Where the catalog's ANN index is persisted."""
+    configured = os.getenv("CATALOG_ANN_PATH")
+    if configured:
+        return Path(configured)
+    source = os.getenv("CATALOG_SOURCE", "mock").lower().replace(",", "+")
+    return DATA_DIR / f"catalog_ann_{source}.npz"
+
+
+def _build_from(embeddings: CatalogEmbeddingIndex, config: ANNConfig) -> IVFFlatIndex:
+    index = IVFFlatIndex.build(
+        embeddings.matrix, embeddings.ids, embeddings.text_hashes, config
+    )
+    index.provider_key = embeddings.provider_key
+    return index
+
+
+def _sync(
+    index: IVFFlatIndex,
+    embeddings: CatalogEmbeddingIndex,
+    config: ANNConfig,
+    changed: Optional[Sequence[str]] = None,
+) -> IVFFlatIndex:
+    """Return a copy of ``index`` brought in line with ``embeddings``.
+
+    Only the ``changed`` ids are compared when given; otherwise every id.
+    ``index`` itself is left untouched so concurrent searches stay valid.
+    """
+    if index.provider_key != embeddings.provider_key or (
+        len(embeddings) and index.dimension != embeddings.dimension
+    ):
+        return _build_from(embeddings, config)
+    if changed is None:
+        changed = embeddings.ids + [
+            pid for pid in index.text_hashes if pid not in embeddings.rows
+        ]
+    removed: List[str] = []
+    updated: List[str] = []
+    rows: List[int] = []
+    for pid in changed:
+        row = embeddings.rows.get(pid)
+        if row is None:
+            if pid in index.text_hashes:
+                removed.append(pid)
+        elif index.text_hashes.get(pid) != embeddings.text_hashes[row]:
+            updated.append(pid)
+            rows.append(row)
+    if not removed and not updated:
+        return index
+    index = index.copy()
+    if removed:
+        index.remove(removed)
+    if updated:
+        index.add(
+            embeddings.matrix[rows],
+            updated,
+            [embeddings.text_hashes[row] for row in rows],
+        )
+    if index.needs_rebuild():
+        logger.info(f"Retraining ANN index after {index.pending} incremental changes")
+        return index.compact()
+    return index
+
+
+class _ANNState:
+    """ANN index for one catalog version plus the embedding revision it mirrors."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.index: Optional[IVFFlatIndex] = None
+        self.source: Optional[CatalogEmbeddingIndex] = None
+        self.revision = -1
+
+
+def _load_persisted(
+    embeddings: CatalogEmbeddingIndex, config: ANNConfig
+) -> IVFFlatIndex:
+    path = default_ann_path()
+    if path.exists():
+        try:
+            index = IVFFlatIndex.load(path, config)
+            logger.info(f"Loaded ANN index with {len(index)} products from {path}")
+            return _sync(index, embeddings, config)
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning(f"Ignoring unreadable ANN index: {exc}")
+    return _build_from(embeddings, config)
+
+
+def get_ann_index(config: ANNConfig | None = None) -> IVFFlatIndex:
+    """Return the ANN index mirroring the current catalog embedding index.
+
+    The first call loads the persisted index (or builds one); later calls
+    only apply the ids changed in the embedding index since. Updates go to
+    a copy that replaces the published index, so callers may keep
+    searching the index they were given.
+    """
+    from modules.commerce.search import catalog_index
+
+    embeddings = get_catalog_embedding_index()
+    state = catalog_index("ann", lambda _catalog: _ANNState())
+    with state.lock:
+        if state.index is None or state.source is not embeddings:
+            # Read the revision first: changes made while loading are
+            # picked up (again) by the next call.
+            state.revision = embeddings.revision
+            state.index = _load_persisted(embeddings, config or ANNConfig())
+        elif state.revision != embeddings.revision:
+            revision, changed = embeddings.changed_since(state.revision)
+            state.index = _sync(
+                state.index, embeddings, config or state.index.config, changed
+            )
+            state.revision = revision
+        state.source = embeddings
+        return state.index
+
+
+def scored_semantic_search(
+    query: str, k: int = 10, nprobe: int | None = None
+) -> List[Tuple[Product, float]]:
+    """Like :func:`semantic_search`, paired with each product's cosine score."""
+    from modules.commerce.search import get_products
+    from shared.llm.embeddings import get_embedding_provider
+
+    if not query:
+        return []
+    embeddings = get_catalog_embedding_index()
+    if not len(embeddings):
+        return []
+    provider = get_embedding_provider()
+    if provider_key(provider) != embeddings.provider_key:
+        logger.debug("Catalog embeddings belong to another provider; skipping")
+        return []
+    index = get_ann_index()
+    ids, scores = index.search(provider.embed(query), k, nprobe)
+    score_by_id = dict(zip(ids, scores.tolist()))
+    return [(product, score_by_id[product.id]) for product in get_products(ids)]
+
+
+def semantic_search(
+    query: str, k: int = 10, nprobe: int | None = None
+) -> List[Product]:
+    """Return the ``k`` catalog products semantically closest to ``query``.
+
+    Returns an empty list when the catalog has not been embedded with the
+    active embedding provider (see ``make catalog-embeddings``).
+    """
+    return [product for product, _ in scored_semantic_search(query, k, nprobe)]
+
+
+def build_ann_index(save: bool = True) -> IVFFlatIndex:
+    """Retrain the ANN index from the catalog embeddings and persist it."""
+    from modules.commerce.search import catalog_index
+
+    embeddings = get_catalog_embedding_index()
+    index = _build_from(embeddings, ANNConfig())
+    state = catalog_index("ann", lambda _catalog: _ANNState())
+    with state.lock:
+        state.index = index
+        state.source = embeddings
+        state.revision = embeddings.revision
+    if save:
+        index.save(default_ann_path())
+    return index
+
+
+__all__ = [
+    "ANNConfig",
+    "IVFFlatIndex",
+    "build_ann_index",
+    "default_ann_path",
+    "get_ann_index",
+    "scored_semantic_search",
+    "semantic_search",
+]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    built = build_ann_index()
+    print(
+        f"Indexed {len(built)} products in {built.n_lists} lists "
+        f"at {default_ann_path()}"
+    )
@@ -0,0 +1,189 @@
+"""BM25F ranking over the product catalog.
+
+Each product is indexed over four fields with per-field boosts
+(capabilities > tags > name > description). Field term frequencies are
+length-normalized per field, boosted and summed before BM25 saturation
+(BM25F), so a product's score for a term does not depend on the query and
+is precomputed at build time. A query then only sums the posting "impacts"
+of its terms and selects the top results with ``np.partition``.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from modules.commerce.domain import Product
+
+FIELD_BOOSTS: Dict[str, float] = {
+    "capabilities": 3.0,
+    "tags": 2.0,
+    "name": 1.5,
+    "description": 1.0,
+}
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens of ``text``."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def field_texts(product: Product) -> Tuple[str, ...]:
+    """Indexed field texts of ``product``, in ``FIELD_BOOSTS`` order."""
+    return (
+        " ".join(product.capabilities_enabled),
+        " ".join(product.tags),
+        product.name,
+        product.description,
+    )
+
+
+class BM25Index:
+    """Inverted index with precomputed BM25F scores per (term, product).
+
+    Postings for term ``t`` are ``docs[offsets[t]:offsets[t + 1]]`` (product
+    rows, ascending) with matching precomputed ``impacts``.
+    """
+
+    def __init__(
+        self,
+        products: Sequence[Product],
+        k1: float = 1.2,
+        b: float = 0.75,
+        boosts: Dict[str, float] | None = None,
+    ):
+        self.products: List[Product] = list(products)
+        self.k1 = k1
+        self.b = b
+        self.boosts = dict(boosts or FIELD_BOOSTS)
+        self.terms: Dict[str, int] = {}
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def _build(self) -> None:
+        n_docs = len(self.products)
+        n_fields = len(self.boosts)
+        boosts = np.array(list(self.boosts.values()), dtype=np.float64)
+
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        field_ids: List[int] = []
+        lengths = np.zeros((n_docs, n_fields), dtype=np.float64)
+        terms = self.terms
+        for doc, product in enumerate(self.products):
+            for field_id, text in enumerate(field_texts(product)):
+                tokens = tokenize(text)
+                lengths[doc, field_id] = len(tokens)
+                for token in tokens:
+                    term_ids.append(terms.setdefault(token, len(terms)))
+                doc_ids.extend([doc] * len(tokens))
+                field_ids.extend([field_id] * len(tokens))
+
+        if not term_ids:
+            self.offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+            self.docs = np.empty(0, dtype=np.int64)
+            self.impacts = np.empty(0, dtype=np.float32)
+            return
+
+        term_arr = np.asarray(term_ids, dtype=np.int64)
+        doc_arr = np.asarray(doc_ids, dtype=np.int64)
+        field_arr = np.asarray(field_ids, dtype=np.int64)
+
+        # Each occurrence contributes boost_f / field length normalization.
+        avg_lengths = np.maximum(lengths.mean(axis=0), 1e-9)
+        norms = 1.0 - self.b + self.b * lengths / avg_lengths
+        weights = boosts[field_arr] / norms[doc_arr, field_arr]
+
+        # Aggregate to one pseudo term frequency per (term, doc), term-major.
+        keys = term_arr * n_docs + doc_arr
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        tf = np.bincount(inverse, weights=weights)
+        posting_terms = unique_keys // n_docs
+        self.docs = unique_keys % n_docs
+
+        doc_freq = np.bincount(posting_terms, minlength=len(terms))
+        idf = np.log(1.0 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+        impacts = idf[posting_terms] * tf * (self.k1 + 1.0) / (tf + self.k1)
+        self.impacts = impacts.astype(np.float32)
+        self.offsets = np.concatenate(([0], np.cumsum(doc_freq))).astype(np.int64)
+
+    def _postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, stop = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.docs[start:stop], self.impacts[start:stop]
+
+    def score(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(rows, scores)`` for every product matching a query term."""
+        term_ids = {self.terms[t] for t in tokenize(query) if t in self.terms}
+        return self._combine([self._postings(term_id) for term_id in term_ids])
+
+    def score_many(self, queries: Sequence[str]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """:meth:`score` for several queries, reading each posting list once.
+
+        Terms shared between queries (e.g. a label and its broader domain)
+        are looked up once and reused for every query that contains them.
+        """
+        postings: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        results = []
+        for query in queries:
+            term_ids = {self.terms[t] for t in tokenize(query) if t in self.terms}
+            for term_id in term_ids:
+                if term_id not in postings:
+                    postings[term_id] = self._postings(term_id)
+            results.append(self._combine([postings[t] for t in term_ids]))
+        return results
+
+    def _combine(
+        self, postings: List[Tuple[np.ndarray, np.ndarray]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Sum the impacts of ``postings`` per product row."""
+        if not postings:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if len(postings) == 1:
+            return postings[0]
+        matched = sum(len(docs) for docs, _ in postings)
+        if matched * 8 < len(self.products):
+            # Short posting lists: merge them instead of touching every row.
+            rows, inverse = np.unique(
+                np.concatenate([docs for docs, _ in postings]), return_inverse=True
+            )
+            weights = np.concatenate([impacts for _, impacts in postings])
+            return rows, np.bincount(inverse, weights=weights).astype(np.float32)
+        accumulator = np.zeros(len(self.products), dtype=np.float32)
+        for docs, impacts in postings:
+            accumulator[docs] += impacts  # rows are unique within a posting list
+        rows = np.flatnonzero(accumulator)
+        return rows, accumulator[rows]
+
+    def search(self, query: str, limit: int | None = None) -> List[int]:
+        """Rows of matching products, best first (ties in catalog order)."""
+        return self._rank(*self.score(query), limit)
+
+    def search_many(
+        self, queries: Sequence[str], limit: int | None = None
+    ) -> List[List[int]]:
+        """:meth:`search` for each of ``queries`` (see :meth:`score_many`)."""
+        return [
+            self._rank(rows, scores, limit) for rows, scores in self.score_many(queries)
+        ]
+
+    @staticmethod
+    def _rank(rows: np.ndarray, scores: np.ndarray, limit: int | None) -> List[int]:
+        if limit is not None and limit < len(rows):
+            if limit <= 0:
+                return []
+            kth = -np.partition(-scores, limit - 1)[limit - 1]
+            # Keep every row tied with the kth score so ties at the cutoff
+            # are broken by catalog order, not by partition order.
+            top = scores >= kth
+            rows, scores = rows[top], scores[top]
+        order = np.lexsort((rows, -scores))
+        return rows[order][:limit].tolist()
+
+
+__all__ = ["BM25Index", "FIELD_BOOSTS", "field_texts", "tokenize"]
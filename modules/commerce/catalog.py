@@ -0,0 +1,251 @@
+"""Versioned catalog snapshots with hot reload.
+
+A ``CatalogSnapshot`` is one loaded catalog plus the structures derived
+from it (search indexes, lookup tables). ``CatalogManager`` loads a new
+snapshot in a background thread, builds every index the process has used
+so far against it, and only then makes it current with a single reference
+assignment. Requests that already hold the previous snapshot keep using it
+until they finish; it is garbage-collected once the last reference drops.
+
+With a ``CatalogStore`` (``CATALOG_SNAPSHOT_DIR``) every successful load is
+also written to disk. At startup a fresh on-disk snapshot replaces the full
+load, and scheduled reloads are skipped while it stays fresh.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from modules.commerce.adapters import load_catalog
+from modules.commerce.catalog_store import CatalogStore, default_store
+from modules.commerce.columnar import CatalogColumns
+from modules.commerce.domain import Product
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Builders registered through ``catalog_index`` so reloads can prebuild them.
+_builders: Dict[str, Callable[[List[Product]], Any]] = {}
+
+
+class CatalogSnapshot:
+    """An immutable catalog version and the indexes derived from it."""
+
+    def __init__(
+        self,
+        version: int,
+        products: List[Product],
+        derived: Optional[Dict[str, Any]] = None,
+    ):
+        self.version = version
+        self.products = products
+        self.loaded_at = time.time()
+        self.derived: Dict[str, Any] = dict(derived or {})
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def index(self, name: str, build: Callable[[List[Product]], T]) -> T:
+        """Return structure ``name``, building it at most once per snapshot."""
+        value = self.derived.get(name)
+        if value is None:
+            with self._lock:
+                value = self.derived.get(name)
+                if value is None:
+                    value = build(self.products)
+                    self.derived[name] = value
+        return value
+
+
+class CatalogManager:
+    """Owns the current catalog snapshot and swaps in reloaded versions."""
+
+    def __init__(
+        self,
+        loader: Callable[[], List[Product]] = load_catalog,
+        store: Optional[CatalogStore] = None,
+    ):
+        self._loader = loader
+        self._store = store
+        self._snapshot = self._initial_snapshot()
+        self._reload_lock = threading.Lock()
+        self._reload_thread: Optional[threading.Thread] = None
+        self._schedule_stop: Optional[threading.Event] = None
+        self.last_error: Optional[str] = None
+
+    def _initial_snapshot(self) -> CatalogSnapshot:
+        stored = self._store.load_if_fresh() if self._store is not None else None
+        if stored is not None:
+            products, columns = stored
+            return CatalogSnapshot(1, products, {"columns": columns})
+        snapshot = CatalogSnapshot(1, self._loader())
+        self._persist(snapshot)
+        return snapshot
+
+    def _persist(self, snapshot: CatalogSnapshot) -> None:
+        if self._store is None:
+            return
+        try:
+            self._store.save(
+                snapshot.products, snapshot.index("columns", CatalogColumns)
+            )
+        except (OSError, ValueError) as exc:
+            # The in-memory catalog is fine; only the next cold start pays.
+            logger.warning(f"Could not write catalog snapshot: {exc}")
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        return self._snapshot
+
+    @property
+    def reloading(self) -> bool:
+        return self._reload_lock.locked()
+
+    def reload(self, force: bool = True) -> CatalogSnapshot:
+        """Load the catalog, warm its indexes and make it current.
+
+        Concurrent reloads are serialized. If loading fails the current
+        snapshot stays in place and the error is re-raised. With
+        ``force=False`` the reload is skipped while the on-disk snapshot is
+        still fresh.
+        """
+        with self._reload_lock:
+            return self._reload_locked(force)
+
+    def _reload_locked(self, force: bool) -> CatalogSnapshot:
+        if not force and self._store is not None:
+            reason = self._store.staleness()
+            if reason is None:
+                logger.info("Catalog snapshot still fresh; reload skipped")
+                return self._snapshot
+            logger.info(f"Catalog reload needed: {reason}")
+        started = time.perf_counter()
+        try:
+            snapshot = CatalogSnapshot(self._snapshot.version + 1, self._loader())
+            warm(snapshot)
+        except Exception as exc:
+            self.last_error = str(exc)
+            logger.error(f"Catalog reload failed: {exc}")
+            raise
+        self._persist(snapshot)
+        self._snapshot = snapshot
+        self.last_error = None
+        logger.info(
+            f"Catalog v{snapshot.version} live with {len(snapshot)} products "
+            f"({time.perf_counter() - started:.2f}s)"
+        )
+        return snapshot
+
+    def reload_in_background(self) -> bool:
+        """Start a reload thread; False if a reload is already running.
+
+        Never blocks: the reload lock is taken here and handed to the thread.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            self._reload_thread = threading.Thread(
+                target=self._reload_and_release, name="catalog-reload", daemon=True
+            )
+            self._reload_thread.start()
+        except BaseException:
+            self._reload_lock.release()
+            raise
+        return True
+
+    def _reload_and_release(self) -> None:
+        try:
+            self._reload_locked(force=True)
+        except Exception:
+            logger.exception("Background catalog reload failed")
+        finally:
+            self._reload_lock.release()
+
+    def _reload_quietly(self, force: bool = True) -> None:
+        try:
+            self.reload(force)
+        except Exception:
+            logger.exception("Scheduled catalog reload failed")
+
+    def start_schedule(self, interval: float) -> None:
+        """Reload every ``interval`` seconds until :meth:`stop_schedule`."""
+        self.stop_schedule()
+        stop = threading.Event()
+        self._schedule_stop = stop
+
+        def run() -> None:
+            while not stop.wait(interval):
+                self._reload_quietly(force=False)
+
+        threading.Thread(target=run, name="catalog-schedule", daemon=True).start()
+        logger.info(f"Catalog reload scheduled every {interval:.0f}s")
+
+    def stop_schedule(self) -> None:
+        if self._schedule_stop is not None:
+            self._schedule_stop.set()
+            self._schedule_stop = None
+
+    def status(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version,
+            "products": len(snapshot),
+            "loaded_at": snapshot.loaded_at,
+            "indexes": sorted(snapshot.derived),
+            "reloading": self.reloading,
+            "last_error": self.last_error,
+            "stored_snapshot": (
+                None if self._store is None else self._store.staleness() or "fresh"
+            ),
+        }
+
+
+def register_builder(name: str, build: Callable[[List[Product]], Any]) -> None:
+    _builders.setdefault(name, build)
+
+
+def warm(snapshot: CatalogSnapshot) -> None:
+    """Build every registered index for ``snapshot``."""
+    for name, build in list(_builders.items()):
+        snapshot.index(name, build)
+
+
+def reload_interval() -> float:
+    """Seconds between scheduled reloads (CATALOG_RELOAD_INTERVAL; 0 disables)."""
+    return float(os.getenv("CATALOG_RELOAD_INTERVAL", "0"))
+
+
+_manager: Optional[CatalogManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_catalog_manager() -> CatalogManager:
+    """Return the process-wide catalog manager, loading the catalog on first use."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = CatalogManager(store=default_store())
+    return _manager
+
+
+def current_snapshot() -> CatalogSnapshot:
+    """Return the catalog snapshot requests should read from."""
+    return get_catalog_manager().snapshot
+
+
+__all__ = [
+    "CatalogManager",
+    "CatalogSnapshot",
+    "current_snapshot",
+    "get_catalog_manager",
+    "register_builder",
+    "reload_interval",
+    "warm",
+]
@@ -0,0 +1,275 @@
+"""Binary on-disk snapshots of the normalized catalog.
+
+Loading a catalog means parsing feeds (or paging Shopify) and running the
+RawOffer -> RawProduct -> Product transforms. After a successful load the
+result is written as a snapshot directory so the next boot can skip all of
+that::
+
+    <CATALOG_SNAPSHOT_DIR>/
+        CURRENT                  name of the live snapshot directory
+        .lock                    held while a save writes, swaps and prunes
+        <snapshot id>/
+            manifest.json        format, product schema, source, inputs, columns
+            products.marshal     one tuple of field values per product
+            <column>.npy         CatalogColumns arrays, opened with mmap
+
+``marshal`` keeps shared and interned strings shared, and the ``.npy``
+columns are memory-mapped rather than read. A snapshot is stale when the
+format, ``Product`` fields or Python/marshal version changed,
+``CATALOG_SOURCE`` differs, a local feed file it was built from changed,
+or it is older than ``CATALOG_SNAPSHOT_MAX_AGE`` seconds (the only check
+for remote sources).
+
+The previous snapshot directory is kept when a new one goes live, so
+processes that still map its files can finish with them; it is deleted by
+the save after that. Saves take an exclusive ``flock`` on ``.lock``, so two
+workers saving at once cannot prune each other's half-written directory.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import marshal
+import mmap
+import os
+import shutil
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import fields as dataclass_fields
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from modules.commerce.columnar import CatalogColumns
+from modules.commerce.domain import Product
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+PRODUCT_FIELDS = [spec.name for spec in dataclass_fields(Product)]
+MANIFEST = "manifest.json"
+PRODUCTS = "products.marshal"
+CURRENT = "CURRENT"
+LOCK = ".lock"
+# marshal's format is only stable within one Python version.
+RUNTIME = [*sys.version_info[:2], marshal.version]
+
+
+def catalog_source() -> str:
+    return os.getenv("CATALOG_SOURCE", "mock").lower()
+
+
+def snapshot_max_age() -> float:
+    """Seconds a snapshot stays fresh (CATALOG_SNAPSHOT_MAX_AGE, default 1 day)."""
+    return float(os.getenv("CATALOG_SNAPSHOT_MAX_AGE", "86400"))
+
+
+def source_inputs(source: str) -> List[Path]:
+    """Local files the catalog for ``source`` is built from."""
+    paths: List[Path] = []
+    for name in (part.strip() for part in source.split(",")):
+        if name == "mock":
+            from modules.commerce.adapters.mock import CATALOG_PATH
+
+            paths.append(CATALOG_PATH)
+        elif name in {"google", "google_shopping"}:
+            from modules.commerce.adapters.google_shopping.mock_feed import _MOCK_PATH
+
+            paths.append(_MOCK_PATH)
+        elif name in {"google_merchant", "google_mc"}:
+            feed_path = os.getenv("GOOGLE_MERCHANT_FEED_PATH")
+            if feed_path:
+                paths.append(Path(feed_path))
+    return paths
+
+
+def _fingerprint_inputs(paths: List[Path]) -> Dict[str, List[int]]:
+    fingerprints = {}
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        fingerprints[str(path)] = [stat.st_mtime_ns, stat.st_size]
+    return fingerprints
+
+
+class CatalogStore:
+    """Reads and writes catalog snapshots under ``root``."""
+
+    def __init__(self, root: str | Path, source: str | None = None):
+        self.root = Path(root)
+        self.source = source or catalog_source()
+
+    def current_path(self) -> Optional[Path]:
+        try:
+            name = (self.root / CURRENT).read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        path = self.root / name
+        return path if (path / MANIFEST).exists() else None
+
+    def manifest(self) -> Optional[Dict[str, Any]]:
+        path = self.current_path()
+        if path is None:
+            return None
+        try:
+            return json.loads((path / MANIFEST).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def staleness(self, manifest: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Why the current snapshot cannot be used, or ``None`` if it is fresh."""
+        manifest = manifest or self.manifest()
+        if manifest is None:
+            return "no snapshot"
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            return f"snapshot format {manifest.get('format')} != {SNAPSHOT_FORMAT}"
+        if manifest.get("fields") != PRODUCT_FIELDS:
+            return "product schema changed"
+        if manifest.get("runtime") != RUNTIME:
+            return f"written by Python/marshal {manifest.get('runtime')}, not {RUNTIME}"
+        if manifest.get("source") != self.source:
+            return f"snapshot is for source '{manifest.get('source')}'"
+        if manifest.get("inputs") != _fingerprint_inputs(source_inputs(self.source)):
+            return "source files changed"
+        age = time.time() - float(manifest.get("created_at", 0))
+        if age > snapshot_max_age():
+            return f"snapshot is {age:.0f}s old"
+        return None
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the store's exclusive save lock (blocks until it is free)."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with (self.root / LOCK).open("a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def save(
+        self, products: List[Product], columns: Optional[CatalogColumns] = None
+    ) -> Path:
+        """Write ``products`` (and their columns) as the new current snapshot."""
+        columns = columns or CatalogColumns(products)
+        arrays, vocabularies = columns.to_arrays()
+        with self._locked():
+            return self._save_locked(products, arrays, vocabularies)
+
+    def _save_locked(
+        self,
+        products: List[Product],
+        arrays: Dict[str, np.ndarray],
+        vocabularies: Dict[str, List[str]],
+    ) -> Path:
+        snapshot_id = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+        path = self.root / snapshot_id
+        path.mkdir(parents=True)
+        try:
+            rows = [
+                tuple(getattr(p, name) for name in PRODUCT_FIELDS) for p in products
+            ]
+            (path / PRODUCTS).write_bytes(marshal.dumps(rows))
+            for name, array in arrays.items():
+                np.save(path / f"{name}.npy", np.ascontiguousarray(array))
+            manifest = {
+                "format": SNAPSHOT_FORMAT,
+                "fields": PRODUCT_FIELDS,
+                "runtime": RUNTIME,
+                "source": self.source,
+                "inputs": _fingerprint_inputs(source_inputs(self.source)),
+                "created_at": time.time(),
+                "products": len(products),
+                "columns": sorted(arrays),
+                "vocabularies": vocabularies,
+            }
+            (path / MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+        except Exception:
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+
+        previous = self.current_path()
+        tmp_current = self.root / (CURRENT + ".tmp")
+        tmp_current.write_text(snapshot_id, encoding="utf-8")
+        os.replace(tmp_current, self.root / CURRENT)
+        self._prune(keep={path, previous})
+        logger.info(f"Wrote catalog snapshot {snapshot_id} ({len(products)} products)")
+        return path
+
+    def _prune(self, keep: set) -> None:
+        """Delete snapshot directories other than ``keep`` (save lock held)."""
+        for entry in self.root.iterdir():
+            if entry.is_dir() and entry not in keep:
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def load(self) -> Tuple[List[Product], CatalogColumns]:
+        """Products and memory-mapped columns of the current snapshot."""
+        path = self.current_path()
+        manifest = self.manifest()
+        if path is None or manifest is None:
+            raise FileNotFoundError(f"No catalog snapshot in {self.root}")
+        with (path / PRODUCTS).open("rb") as handle:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                rows = marshal.loads(data)
+        products = [Product(*row) for row in rows]
+        arrays = {
+            name: np.load(path / f"{name}.npy", mmap_mode="r")
+            for name in manifest["columns"]
+        }
+        columns = CatalogColumns.from_arrays(products, arrays, manifest["vocabularies"])
+        return products, columns
+
+    def load_if_fresh(self) -> Optional[Tuple[List[Product], CatalogColumns]]:
+        """:meth:`load` if the snapshot is fresh and readable, else ``None``."""
+        reason = self.staleness()
+        if reason is not None:
+            logger.info(f"Catalog snapshot not used: {reason}")
+            return None
+        started = time.perf_counter()
+        try:
+            products, columns = self.load()
+        except (OSError, ValueError, EOFError, KeyError, TypeError) as exc:
+            logger.warning(f"Ignoring unreadable catalog snapshot: {exc}")
+            return None
+        logger.info(
+            f"Loaded {len(products)} products from catalog snapshot "
+            f"({(time.perf_counter() - started) * 1000:.1f} ms)"
+        )
+        return products, columns
+
+
+def default_store() -> Optional[CatalogStore]:
+    """Store under CATALOG_SNAPSHOT_DIR, or ``None`` when snapshots are off."""
+    root = os.getenv("CATALOG_SNAPSHOT_DIR")
+    return CatalogStore(root) if root else None
+
+
+def write_snapshot(store: CatalogStore) -> Path:
+    """Load the catalog from its sources and save it to ``store``."""
+    from modules.commerce.adapters import load_catalog
+
+    return store.save(load_catalog())
+
+
+__all__ = [
+    "CatalogStore",
+    "default_store",
+    "snapshot_max_age",
+    "source_inputs",
+    "write_snapshot",
+]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    store = default_store()
+    if store is None:
+        raise SystemExit("Set CATALOG_SNAPSHOT_DIR to write a catalog snapshot.")
+    print(f"Catalog snapshot written to {write_snapshot(store)}")
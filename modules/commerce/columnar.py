@@ -0,0 +1,200 @@
+"""Columnar mirror of the product catalog.
+
+Plan building filters, ranks and summarizes lists of ``Product`` objects.
+``CatalogColumns`` keeps the fields those steps read as NumPy columns, so
+confidence thresholding, the top-N fallback and data-quality stats are
+array operations over row ids. String columns are dictionary-encoded: each value
+is interned once and rows store an integer code. ``Product`` objects (and
+the dicts built from them) are only touched for the rows that are returned.
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from modules.commerce.domain import Product
+
+STRING_COLUMNS = ("source", "availability", "category", "brand", "merchant_name")
+
+
+class StringColumn:
+    """Dictionary-encoded string column; ``None`` is stored as code -1."""
+
+    def __init__(self, values: Sequence[str | None]):
+        self.vocabulary: List[str] = []
+        lookup: Dict[str, int] = {}
+        codes = np.empty(len(values), dtype=np.int32)
+        for row, value in enumerate(values):
+            if value is None:
+                codes[row] = -1
+                continue
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(self.vocabulary)
+                self.vocabulary.append(sys.intern(value))
+            codes[row] = code
+        self.codes = codes
+
+    @classmethod
+    def from_codes(cls, vocabulary: Sequence[str], codes: np.ndarray) -> "StringColumn":
+        """Rebuild a column persisted as its vocabulary and code array."""
+        column = cls.__new__(cls)
+        column.vocabulary = [sys.intern(value) for value in vocabulary]
+        column.codes = codes
+        return column
+
+    def __getitem__(self, row: int) -> str | None:
+        code = self.codes[row]
+        return None if code < 0 else self.vocabulary[code]
+
+    def distinct(self, rows: np.ndarray) -> List[str]:
+        """Sorted distinct values among ``rows``."""
+        codes = np.unique(self.codes[rows])
+        return sorted(self.vocabulary[code] for code in codes if code >= 0)
+
+
+class CatalogColumns:
+    """Price, confidence and string columns keyed by row id."""
+
+    def __init__(self, products: Sequence[Product]):
+        self._index_products(products)
+        self.price = np.array([p.price for p in self.products], dtype=np.float64)
+        self.confidence = np.array(
+            [p.confidence for p in self.products], dtype=np.float64
+        )
+
+        self.strings: Dict[str, StringColumn] = {
+            name: StringColumn([getattr(p, name) for p in self.products])
+            for name in STRING_COLUMNS
+        }
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def _index_products(self, products: Sequence[Product]) -> None:
+        self.products: List[Product] = list(products)
+        self.ids: List[str] = [sys.intern(p.id) for p in self.products]
+        self.rows_by_id: Dict[str, int] = {}
+        for row, product_id in enumerate(self.ids):
+            self.rows_by_id.setdefault(product_id, row)
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+        """Arrays and vocabularies that :meth:`from_arrays` rebuilds from."""
+        arrays = {
+            "price": self.price,
+            "confidence": self.confidence,
+        }
+        vocabularies: Dict[str, List[str]] = {}
+        for name, column in self.strings.items():
+            arrays[f"{name}_codes"] = column.codes
+            vocabularies[name] = column.vocabulary
+        return arrays, vocabularies
+
+    @classmethod
+    def from_arrays(
+        cls,
+        products: Sequence[Product],
+        arrays: Dict[str, np.ndarray],
+        vocabularies: Dict[str, List[str]],
+    ) -> "CatalogColumns":
+        """Rebuild the store for ``products`` from :meth:`to_arrays` output.
+
+        The arrays are used as given, so they may be read-only memory maps.
+        """
+        columns = cls.__new__(cls)
+        columns._index_products(products)
+        columns.price = arrays["price"]
+        columns.confidence = arrays["confidence"]
+        columns.strings = {
+            name: StringColumn.from_codes(vocabularies[name], arrays[f"{name}_codes"])
+            for name in STRING_COLUMNS
+        }
+        return columns
+
+    def rows_for(self, products: Sequence[Product]) -> np.ndarray | None:
+        """Row ids of ``products``, or ``None`` if any is not from this store."""
+        rows = np.empty(len(products), dtype=np.int64)
+        for position, product in enumerate(products):
+            row = self.rows_by_id.get(product.id)
+            if row is None or self.products[row] is not product:
+                return None
+            rows[position] = row
+        return rows
+
+    def products_at(self, rows: np.ndarray) -> List[Product]:
+        return [self.products[row] for row in rows.tolist()]
+
+    def select(
+        self, rows: np.ndarray, min_confidence: float, fallback_limit: int
+    ) -> Tuple[np.ndarray, int]:
+        """Keep ``rows`` at or above ``min_confidence``, preserving their order.
+
+        Returns the kept rows and how many were filtered out. When nothing
+        passes, the first ``fallback_limit`` rows are returned unfiltered.
+        """
+        kept = rows[self.confidence[rows] >= min_confidence]
+        if not len(kept):
+            return rows[:fallback_limit], 0
+        return kept, len(rows) - len(kept)
+
+    def quality(self, rows: np.ndarray) -> dict:
+        """Average confidence and distinct sources of ``rows``."""
+        if not len(rows):
+            return {"average_confidence": 0.0, "sources": []}
+        return {
+            "average_confidence": round(float(self.confidence[rows].mean()), 2),
+            "sources": self.strings["source"].distinct(rows),
+        }
+
+    def summaries(self, rows: np.ndarray) -> List[dict]:
+        """Plan summary dicts for ``rows`` (the only per-product dicts built)."""
+        source = self.strings["source"]
+        merchant = self.strings["merchant_name"]
+        summaries = []
+        for row in rows.tolist():
+            product = self.products[row]
+            summaries.append(
+                {
+                    "id": self.ids[row],
+                    "name": product.name,
+                    "price": product.price,
+                    "confidence": product.confidence,
+                    "source": source[row],
+                    "merchant_name": merchant[row],
+                    "offer_url": product.offer_url,
+                    "capabilities_enabled": product.capabilities_enabled,
+                }
+            )
+        return summaries
+
+
+def get_catalog_columns() -> CatalogColumns:
+    """Return the columnar store for the current catalog version."""
+    from modules.commerce.search import catalog_index
+
+    return catalog_index("columns", CatalogColumns)
+
+
+def columns_for(products: Sequence[Product]) -> Tuple[CatalogColumns, np.ndarray]:
+    """Columns and row ids for ``products``.
+
+    Catalog products resolve against the shared catalog store; anything else
+    (e.g. products injected by a custom retriever) gets a store of its own.
+    """
+    columns = get_catalog_columns()
+    rows = columns.rows_for(products)
+    if rows is None:
+        columns = CatalogColumns(products)
+        rows = np.arange(len(products), dtype=np.int64)
+    return columns, rows
+
+
+__all__ = [
+    "CatalogColumns",
+    "StringColumn",
+    "columns_for",
+    "get_catalog_columns",
+]
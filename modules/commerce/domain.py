@@ -1,15 +1,18 @@
 """Commerce domain models - Product, RawProduct, and RawOffer.
 
-These are the canonical representations used throughout the system.
+These are the canonical representations used throughout the system. All
+three are slotted (no per-instance ``__dict__``); ``freeze`` converts one
+into its immutable ``Frozen*`` twin for catalogs that must not change once
+loaded.
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from dataclasses import MISSING, dataclass, field, fields, make_dataclass
+from typing import Any, Dict, List, Optional, Type, TypeVar
 
 
-@dataclass
+@dataclass(slots=True)
 class RawOffer:
     """Offer-level schema emitted by adapters before product reconstruction."""
 
@@ -31,7 +34,7 @@ class RawOffer:
     inferred_fields: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class RawProduct:
     """Variant-level record emitted by adapters before enrichment."""
 
@@ -55,7 +58,7 @@ class RawProduct:
     completeness: float = 1.0
 
 
-@dataclass
+@dataclass(slots=True)
 class Product:
     """LLM-ready representation that powers reasoning and empowerment metrics."""
 
@@ -78,4 +81,56 @@ class Product:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
-__all__ = ["RawOffer", "RawProduct", "Product"]
+T = TypeVar("T")
+
+
+def _frozen_variant(cls: Type[T]) -> Type[T]:
+    """Immutable, slotted twin of dataclass ``cls`` with the same fields."""
+    frozen = make_dataclass(
+        f"Frozen{cls.__name__}",
+        [
+            (
+                spec.name,
+                spec.type,
+                field(default=spec.default)
+                if spec.default is not MISSING
+                else field(default_factory=spec.default_factory),
+            )
+            for spec in fields(cls)
+        ],
+        frozen=True,
+        slots=True,
+    )
+    frozen.__module__ = __name__
+    frozen.__doc__ = f"Frozen {cls.__name__}; attributes cannot be reassigned."
+    return frozen
+
+
+FrozenRawOffer = _frozen_variant(RawOffer)
+FrozenRawProduct = _frozen_variant(RawProduct)
+FrozenProduct = _frozen_variant(Product)
+
+_FROZEN = {
+    RawOffer: FrozenRawOffer,
+    RawProduct: FrozenRawProduct,
+    Product: FrozenProduct,
+}
+
+
+def freeze(model: Any) -> Any:
+    """Return ``model`` as its frozen variant (sharing the field values)."""
+    frozen = _FROZEN.get(type(model))
+    if frozen is None:
+        return model
+    return frozen(**{spec.name: getattr(model, spec.name) for spec in fields(model)})
+
+
+__all__ = [
+    "FrozenProduct",
+    "FrozenRawOffer",
+    "FrozenRawProduct",
+    "Product",
+    "RawOffer",
+    "RawProduct",
+    "freeze",
+]
@@ -0,0 +1,363 @@
+"""Precomputed catalog embeddings for semantic goal alignment.
+
+Each product is embedded once from its semantic text (capabilities,
+description, category and tags). The vectors are kept as one normalized
+float32 matrix with an id -> row map and persisted next to the catalog, so
+goal alignment only has to embed the user's goals on each request.
+Products are re-embedded only when their semantic text hash changes.
+
+Build or refresh the persisted index with::
+
+    python -m modules.commerce.embedding_index
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from modules.commerce.domain import Product
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
+# Revisions whose changed ids are remembered for changed_since().
+_MAX_CHANGES = 64
+
+EmbedFn = Callable[[List[str]], Sequence[Sequence[float]]]
+
+
+def product_semantic_text(product: Product) -> str:
+    """Build a semantic text representation of a product for embedding.
+
+    Combines capabilities, description, and tags into a text that
+    captures what the product enables and who it's for.
+    """
+    parts = []
+
+    # Add capabilities (most important for goal alignment)
+    if product.capabilities_enabled:
+        capabilities = ", ".join(product.capabilities_enabled)
+        parts.append(f"This product enables: {capabilities}")
+
+    # Add description
+    if product.description:
+        parts.append(product.description)
+
+    # Add category context
+    if product.category:
+        parts.append(f"Category: {product.category}")
+
+    # Add tags as additional context
+    if product.tags:
+        tags = ", ".join(product.tags)
+        parts.append(f"Related to: {tags}")
+
+    # Fall back to name if nothing else
+    if not parts:
+        parts.append(product.name)
+
+    return " ".join(parts)
+
+
+def semantic_text_hash(product: Product) -> str:
+    """Hash of the semantic text; a change means the product must be re-embedded."""
+    return hashlib.sha1(product_semantic_text(product).encode("utf-8")).hexdigest()
+
+
+def provider_key(provider) -> str:
+    """Identify the embedding space (provider + model) vectors belong to."""
+    model = getattr(provider, "model_name", "")
+    return f"{provider.provider_name}:{model}"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-10)
+
+
+class CatalogEmbeddingIndex:
+    """Normalized float32 product embeddings with an id -> row map.
+
+    The matrix grows by doubling so products embedded on the request path
+    can be appended cheaply. Vectors from a different provider/model are
+    never mixed: switching ``provider_key`` resets the index.
+    """
+
+    def __init__(self, provider_key: str = ""):
+        self.provider_key = provider_key
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._size = 0
+        self.ids: List[str] = []
+        self.text_hashes: List[str] = []
+        self.rows: Dict[str, int] = {}
+        # id -> the product object last checked against ``text_hashes``, so
+        # lookups skip rehashing products they have already verified.
+        self._verified: Dict[str, Product] = {}
+        # Bumped on every change so derived structures (e.g. the ANN index)
+        # know when to rebuild.
+        self.revision = 0
+        # (revision, ids upserted or dropped) for the latest revisions, so
+        # derived structures can apply just those ids; see changed_since.
+        self._changes: List[Tuple[int, List[str]]] = []
+        self._changes_floor = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self.rows
+
+    @property
+    def dimension(self) -> int:
+        return self._matrix.shape[1]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Read-only ``(n, dim)`` view of the normalized vectors."""
+        view = self._matrix[: self._size]
+        view.flags.writeable = False
+        return view
+
+    def _reset(self, provider_key: str, dimension: int) -> None:
+        self.provider_key = provider_key
+        self._matrix = np.empty((0, dimension), dtype=np.float32)
+        self._size = 0
+        self.ids = []
+        self.text_hashes = []
+        self.rows = {}
+        self._verified = {}
+        self.revision += 1
+        self._changes = []
+        self._changes_floor = self.revision
+
+    def _record(self, ids: List[str]) -> None:
+        self.revision += 1
+        self._changes.append((self.revision, ids))
+        if len(self._changes) > _MAX_CHANGES:
+            self._changes_floor = self._changes.pop(0)[0]
+
+    def changed_since(self, revision: int) -> Tuple[int, Optional[List[str]]]:
+        """Current revision and the ids changed after ``revision``.
+
+        The ids are ``None`` when the changes are no longer known (the index
+        was reset, or too many revisions have passed) and the caller has to
+        compare everything.
+        """
+        with self._lock:
+            if revision < self._changes_floor:
+                return self.revision, None
+            changed = {
+                pid for change, ids in self._changes if change > revision for pid in ids
+            }
+            return self.revision, list(changed)
+
+    def _reserve(self, extra: int, dimension: int) -> None:
+        needed = self._size + extra
+        if needed <= self._matrix.shape[0]:
+            return
+        capacity = max(needed, 2 * self._matrix.shape[0], 16)
+        grown = np.empty((capacity, dimension), dtype=np.float32)
+        grown[: self._size] = self._matrix[: self._size]
+        self._matrix = grown
+
+    def lookup(
+        self, products: Sequence[Product], provider_key: str, rehash: bool = False
+    ) -> Tuple[Optional[np.ndarray], List[int]]:
+        """Return normalized vectors for ``products`` and the positions missing.
+
+        Missing positions (unknown id, changed text, other embedding space)
+        are zero rows in the returned matrix, which is ``None`` when the
+        index is empty or belongs to another provider.
+
+        A product object whose semantic text hash was already checked is
+        not hashed again; pass ``rehash`` to catch products that were
+        modified in place (as :meth:`refresh` does).
+        """
+        with self._lock:
+            if provider_key != self.provider_key or not self._size:
+                return None, list(range(len(products)))
+            vectors = np.zeros((len(products), self.dimension), dtype=np.float32)
+            missing: List[int] = []
+            positions: List[int] = []
+            rows: List[int] = []
+            for position, product in enumerate(products):
+                row = self.rows.get(product.id)
+                if row is None:
+                    missing.append(position)
+                    continue
+                if rehash or self._verified.get(product.id) is not product:
+                    if self.text_hashes[row] != semantic_text_hash(product):
+                        missing.append(position)
+                        continue
+                    self._verified[product.id] = product
+                positions.append(position)
+                rows.append(row)
+            if rows:
+                vectors[positions] = self._matrix[rows]
+            return vectors, missing
+
+    def upsert(
+        self,
+        products: Sequence[Product],
+        vectors: Sequence[Sequence[float]] | np.ndarray,
+        provider_key: str,
+    ) -> np.ndarray:
+        """Insert or replace product vectors; return them normalized."""
+        normalized = _normalize(vectors) if len(products) else None
+        if normalized is None:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        with self._lock:
+            dimension = normalized.shape[1]
+            if provider_key != self.provider_key or dimension != self.dimension:
+                self._reset(provider_key, dimension)
+            new_products = [p for p in products if p.id not in self.rows]
+            self._reserve(len(new_products), dimension)
+            for product, vector in zip(products, normalized):
+                row = self.rows.get(product.id)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self.rows[product.id] = row
+                    self.ids.append(product.id)
+                    self.text_hashes.append("")
+                self._matrix[row] = vector
+                self.text_hashes[row] = semantic_text_hash(product)
+                self._verified[product.id] = product
+            self._record([product.id for product in products])
+        return normalized
+
+    def refresh(
+        self, products: Sequence[Product], embed_fn: EmbedFn, provider_key: str
+    ) -> int:
+        """Embed products that are new or whose semantic text changed.
+
+        Products no longer in ``products`` are dropped. Returns the number
+        of products sent to ``embed_fn``.
+        """
+        _, missing = self.lookup(products, provider_key, rehash=True)
+        if missing:
+            stale = [products[position] for position in missing]
+            vectors = embed_fn([product_semantic_text(p) for p in stale])
+            self.upsert(stale, vectors, provider_key)
+        self._retain({product.id for product in products})
+        return len(missing)
+
+    def _retain(self, keep: set) -> None:
+        with self._lock:
+            if all(product_id in keep for product_id in self.ids):
+                return
+            order = [row for row, pid in enumerate(self.ids) if pid in keep]
+            dropped = [pid for pid in self.ids if pid not in keep]
+            self._matrix = self._matrix[order].copy()
+            self._size = len(order)
+            self.ids = [self.ids[row] for row in order]
+            self.text_hashes = [self.text_hashes[row] for row in order]
+            self.rows = {pid: row for row, pid in enumerate(self.ids)}
+            self._verified = {
+                pid: product for pid, product in self._verified.items() if pid in keep
+            }
+            self._record(dropped)
+
+    def save(self, path: str | Path) -> None:
+        """Persist atomically as an uncompressed ``.npz`` file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with self._lock, tmp_path.open("wb") as handle:
+            np.savez(
+                handle,
+                matrix=self._matrix[: self._size],
+                ids=np.array(self.ids, dtype=str),
+                text_hashes=np.array(self.text_hashes, dtype=str),
+                provider_key=np.array(self.provider_key),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "CatalogEmbeddingIndex":
+        """Load an index written by :meth:`save`."""
+        with np.load(Path(path), allow_pickle=False) as payload:
+            index = cls(str(payload["provider_key"]))
+            index._matrix = np.ascontiguousarray(payload["matrix"], dtype=np.float32)
+            index.ids = [str(pid) for pid in payload["ids"]]
+            index.text_hashes = [str(h) for h in payload["text_hashes"]]
+        index._size = len(index.ids)
+        index.rows = {pid: row for row, pid in enumerate(index.ids)}
+        return index
+
+
+def default_index_path() -> Path:
+    """Where the catalog's embedding index is persisted."""
+    configured = os.getenv("CATALOG_EMBEDDINGS_PATH")
+    if configured:
+        return Path(configured)
+    source = os.getenv("CATALOG_SOURCE", "mock").lower().replace(",", "+")
+    return DATA_DIR / f"catalog_embeddings_{source}.npz"
+
+
+def _load_persisted(_catalog: List[Product]) -> CatalogEmbeddingIndex:
+    path = default_index_path()
+    if path.exists():
+        try:
+            index = CatalogEmbeddingIndex.load(path)
+            logger.info(f"Loaded {len(index)} catalog embeddings from {path}")
+            return index
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning(f"Ignoring unreadable catalog embedding index: {exc}")
+    return CatalogEmbeddingIndex()
+
+
+def get_catalog_embedding_index() -> CatalogEmbeddingIndex:
+    """Return the embedding index for the current catalog (no network calls)."""
+    from modules.commerce.search import catalog_index
+
+    return catalog_index("embeddings", _load_persisted)
+
+
+def build_catalog_embedding_index(
+    products: Sequence[Product] | None = None, save: bool = True
+) -> CatalogEmbeddingIndex:
+    """Embed every catalog product not yet indexed and persist the result."""
+    from modules.commerce.search import CATALOG
+    from shared.llm.embeddings import get_embedding_provider
+
+    provider = get_embedding_provider()
+    index = get_catalog_embedding_index()
+    embedded = index.refresh(
+        products if products is not None else CATALOG,
+        provider.embed_batch_array,
+        provider_key(provider),
+    )
+    logger.info(f"Catalog embedding index refreshed: {embedded} product(s) embedded")
+    if save:
+        index.save(default_index_path())
+    return index
+
+
+__all__ = [
+    "CatalogEmbeddingIndex",
+    "build_catalog_embedding_index",
+    "default_index_path",
+    "get_catalog_embedding_index",
+    "product_semantic_text",
+    "provider_key",
+    "semantic_text_hash",
+]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    built = build_catalog_embedding_index()
+    print(f"Indexed {len(built)} products at {default_index_path()}")
@@ -0,0 +1,306 @@
+"""Facet filtering over the product catalog.
+
+``FacetIndex`` precomputes, once per catalog version:
+
+- price and confidence columns with a sorted row order, so range filters
+  are two binary searches;
+- packed bitmaps (one bit per catalog row) for every category, source,
+  availability and tag value.
+
+Filters are combined by bitmap intersection and compose with search
+results: pass the ranked products in and they come back filtered, in the
+same order. ``counts`` returns per-value facet counts for the current
+selection, which is what the web UI renders next to each filter.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from modules.commerce.domain import Product
+
+if TYPE_CHECKING:  # pragma: no cover - imported for type hints only
+    from modules.commerce.catalog import CatalogSnapshot
+
+FACETS = ("category", "source", "availability", "tag")
+
+# Number of set bits for every byte value.
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.int64)
+
+Criterion = Optional[str | Sequence[str]]
+
+
+def _facet_values(product: Product, facet: str) -> List[str]:
+    if facet == "tag":
+        return list(product.tags)
+    value = getattr(product, facet)
+    return [value] if value else []
+
+
+def _as_values(criterion: Criterion) -> List[str]:
+    if criterion is None:
+        return []
+    if isinstance(criterion, str):
+        return [criterion]
+    return list(criterion)
+
+
+class FacetIndex:
+    """Sorted numeric columns plus packed value bitmaps for the catalog."""
+
+    def __init__(self, products: Sequence[Product]):
+        self.products: List[Product] = list(products)
+        self.size = len(self.products)
+        self.rows_by_id: Dict[str, int] = {}
+        for row, product in enumerate(self.products):
+            self.rows_by_id.setdefault(product.id, row)
+
+        self.price = np.array([p.price for p in self.products], dtype=np.float64)
+        self.confidence = np.array(
+            [p.confidence for p in self.products], dtype=np.float64
+        )
+        self._price_order = np.argsort(self.price, kind="stable")
+        self._confidence_order = np.argsort(self.confidence, kind="stable")
+
+        self.bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+        for facet in FACETS:
+            rows: Dict[str, List[int]] = {}
+            for row, product in enumerate(self.products):
+                for value in _facet_values(product, facet):
+                    rows.setdefault(value, []).append(row)
+            self.bitmaps[facet] = {
+                value: self._pack(value_rows) for value, value_rows in rows.items()
+            }
+
+    def __len__(self) -> int:
+        return self.size
+
+    # ------------------------------------------------------------------ bitmaps
+    def _pack(self, rows: Iterable[int]) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        mask[np.fromiter(rows, dtype=np.int64)] = True
+        return np.packbits(mask)
+
+    def _all(self) -> np.ndarray:
+        return np.packbits(np.ones(self.size, dtype=bool))
+
+    def _rows(self, bitmap: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.size))
+
+    @staticmethod
+    def _count(bitmap: np.ndarray) -> int:
+        return int(_POPCOUNT[bitmap].sum())
+
+    def _range(
+        self,
+        column: np.ndarray,
+        order: np.ndarray,
+        low: Optional[float],
+        high: Optional[float],
+    ) -> np.ndarray:
+        sorted_values = column[order]
+        start = 0 if low is None else np.searchsorted(sorted_values, low, "left")
+        stop = (
+            self.size if high is None else np.searchsorted(sorted_values, high, "right")
+        )
+        return self._pack(order[start:stop])
+
+    def _value_bitmap(self, facet: str, values: List[str]) -> np.ndarray:
+        bitmap = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        for value in values:
+            value_bitmap = self.bitmaps[facet].get(value)
+            if value_bitmap is not None:
+                bitmap |= value_bitmap
+        return bitmap
+
+    def covers(self, products: Sequence[Product]) -> bool:
+        """Whether every product is (identically) one this index was built from."""
+        for product in products:
+            row = self.rows_by_id.get(product.id)
+            if row is None or self.products[row] is not product:
+                return False
+        return True
+
+    # ------------------------------------------------------------------ API
+    def mask(
+        self,
+        price_min: Optional[float] = None,
+        price_max: Optional[float] = None,
+        min_confidence: Optional[float] = None,
+        availability: Criterion = None,
+        category: Criterion = None,
+        source: Criterion = None,
+        tag: Criterion = None,
+    ) -> np.ndarray:
+        """Packed bitmap of catalog rows matching every given criterion.
+
+        Facet criteria accept one value or a list of values (any may match).
+        """
+        bitmap = self._all()
+        if price_min is not None or price_max is not None:
+            bitmap &= self._range(self.price, self._price_order, price_min, price_max)
+        if min_confidence is not None:
+            bitmap &= self._range(
+                self.confidence, self._confidence_order, min_confidence, None
+            )
+        for facet, criterion in (
+            ("availability", availability),
+            ("category", category),
+            ("source", source),
+            ("tag", tag),
+        ):
+            values = _as_values(criterion)
+            if values:
+                bitmap &= self._value_bitmap(facet, values)
+        return bitmap
+
+    def filter(
+        self, products: Optional[Sequence[Product]] = None, **criteria
+    ) -> List[Product]:
+        """Products matching ``criteria``; keeps the order of ``products``.
+
+        Without ``products`` the whole catalog is filtered in catalog order.
+        Products this index was not built from (see :meth:`covers`) are
+        checked attribute by attribute.
+        """
+        bitmap = self.mask(**criteria)
+        if products is None:
+            return self.products_in(bitmap)
+        selected = np.unpackbits(bitmap, count=self.size).astype(bool)
+        kept = []
+        for product in products:
+            row = self.rows_by_id.get(product.id)
+            if row is not None and self.products[row] is product:
+                if selected[row]:
+                    kept.append(product)
+            elif _matches(product, **criteria):
+                kept.append(product)
+        return kept
+
+    def rows_in(self, bitmap: np.ndarray) -> np.ndarray:
+        """Catalog rows selected by ``bitmap``, ascending."""
+        return self._rows(bitmap)
+
+    def products_at(self, rows: Iterable[int]) -> List[Product]:
+        return [self.products[row] for row in rows]
+
+    def products_in(self, bitmap: np.ndarray) -> List[Product]:
+        """Catalog products selected by ``bitmap``, in catalog order."""
+        return self.products_at(self._rows(bitmap))
+
+    def bitmap_for(self, products: Sequence[Product]) -> np.ndarray:
+        """Packed bitmap of the rows of ``products`` (e.g. search results).
+
+        Ids that are not in the catalog are skipped.
+        """
+        rows = (self.rows_by_id.get(p.id) for p in products)
+        return self._pack(row for row in rows if row is not None)
+
+    def counts(
+        self, bitmap: Optional[np.ndarray] = None, limit: Optional[int] = None
+    ) -> Dict[str, Dict[str, int] | Dict[str, float]]:
+        """Facet value counts (and price/confidence ranges) within ``bitmap``.
+
+        Values that do not occur in the selection are omitted; each facet is
+        ordered by descending count and truncated to ``limit`` values.
+        """
+        selection = self._all() if bitmap is None else bitmap
+        counts: Dict[str, Dict[str, int] | Dict[str, float]] = {}
+        for facet in FACETS:
+            facet_counts = {
+                value: self._count(value_bitmap & selection)
+                for value, value_bitmap in self.bitmaps[facet].items()
+            }
+            ordered = sorted(
+                ((value, count) for value, count in facet_counts.items() if count),
+                key=lambda item: item[1],
+                reverse=True,
+            )
+            counts[facet] = dict(ordered[:limit] if limit else ordered)
+
+        rows = self._rows(selection)
+        for name, column in (("price", self.price), ("confidence", self.confidence)):
+            values = column[rows]
+            counts[name] = (
+                {"min": float(values.min()), "max": float(values.max())}
+                if len(values)
+                else {}
+            )
+        return counts
+
+
+def get_facet_index(snapshot: CatalogSnapshot | None = None) -> FacetIndex:
+    """Return the facet index for the current (or the given) catalog version."""
+    from modules.commerce.search import catalog_index
+
+    return catalog_index("facets", FacetIndex, snapshot)
+
+
+def filter_products(
+    products: Optional[Sequence[Product]] = None, **criteria
+) -> List[Product]:
+    """Filter catalog products (or ``products``, keeping their order).
+
+    Example: ``filter_products(price_max=300, availability="in_stock",
+    min_confidence=0.65)``. Products that are not from the current catalog
+    are checked attribute by attribute.
+    """
+    index = get_facet_index()
+    if products is None or index.covers(products):
+        return index.filter(products, **criteria)
+    return [p for p in products if _matches(p, **criteria)]
+
+
+def _matches(
+    product: Product,
+    price_min: Optional[float] = None,
+    price_max: Optional[float] = None,
+    min_confidence: Optional[float] = None,
+    availability: Criterion = None,
+    category: Criterion = None,
+    source: Criterion = None,
+    tag: Criterion = None,
+) -> bool:
+    if price_min is not None and product.price < price_min:
+        return False
+    if price_max is not None and product.price > price_max:
+        return False
+    if min_confidence is not None and product.confidence < min_confidence:
+        return False
+    for facet, criterion in (
+        ("availability", availability),
+        ("category", category),
+        ("source", source),
+        ("tag", tag),
+    ):
+        values = _as_values(criterion)
+        if values and not set(values) & set(_facet_values(product, facet)):
+            return False
+    return True
+
+
+def facet_counts(
+    products: Optional[Sequence[Product]] = None, limit: Optional[int] = None
+) -> Dict[str, Dict[str, int] | Dict[str, float]]:
+    """Facet counts over the catalog or over a selection of products.
+
+    A selection that is not made of current catalog products is counted
+    from its own attributes.
+    """
+    index = get_facet_index()
+    if products is None:
+        return index.counts(None, limit)
+    if not index.covers(products):
+        return FacetIndex(products).counts(None, limit)
+    return index.counts(index.bitmap_for(products), limit)
+
+
+__all__ = [
+    "FACETS",
+    "FacetIndex",
+    "facet_counts",
+    "filter_products",
+    "get_facet_index",
+]
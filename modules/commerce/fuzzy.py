@@ -0,0 +1,127 @@
+"""Typo-tolerant query correction over the catalog vocabulary.
+
+``TrigramIndex`` maps character trigrams of every catalog token (padded
+with spaces, so word boundaries count) to the tokens containing them.
+An unknown query token is corrected in two steps:
+
+1. candidate generation: tokens sharing enough trigrams with it (one edit
+   changes at most three padded trigrams, a transposition four) and of
+   similar length;
+2. verification: a bounded Damerau-Levenshtein distance (adjacent
+   transpositions count as one edit) that gives up once the bound is
+   exceeded.
+
+The closest candidate wins; ties go to the token used by more products.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from modules.commerce.bm25 import field_texts, tokenize
+from modules.commerce.domain import Product
+
+# Tokens shorter than this are never corrected (too many near neighbours).
+MIN_TOKEN_LENGTH = 4
+
+
+def trigrams(token: str) -> List[str]:
+    padded = f"  {token} "
+    return [padded[i : i + 3] for i in range(len(padded) - 2)]
+
+
+def max_edits(token: str) -> int:
+    """Edit budget for ``token``: 1 for short words, 2 from six characters."""
+    return 1 if len(token) < 6 else 2
+
+
+def bounded_edit_distance(a: str, b: str, bound: int) -> int:
+    """Optimal-string-alignment distance, or ``bound + 1`` once it exceeds ``bound``."""
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + cost,
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+        # Every later cell derives from this row or (transpositions) the one
+        # before it, so once both exceed the bound the distance must too.
+        if min(current) > bound and min(previous) > bound:
+            return bound + 1
+        previous2, previous = previous, current
+    return previous[-1] if previous[-1] <= bound else bound + 1
+
+
+class TrigramIndex:
+    """Trigram postings over the distinct tokens of the catalog."""
+
+    def __init__(self, products: Sequence[Product]):
+        frequency: Dict[str, int] = {}
+        for product in products:
+            for token in {t for text in field_texts(product) for t in tokenize(text)}:
+                frequency[token] = frequency.get(token, 0) + 1
+        self.tokens: List[str] = list(frequency)
+        self.known = frequency
+        self.lengths = np.array([len(t) for t in self.tokens], dtype=np.int32)
+        self.frequency = np.array(list(frequency.values()), dtype=np.int64)
+
+        postings: Dict[str, List[int]] = {}
+        for token_id, token in enumerate(self.tokens):
+            for gram in set(trigrams(token)):
+                postings.setdefault(gram, []).append(token_id)
+        self.postings = {
+            gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def correct_token(self, token: str) -> Optional[str]:
+        """Closest catalog token within the edit budget, if any."""
+        if token in self.known or len(token) < MIN_TOKEN_LENGTH:
+            return None
+        grams = set(trigrams(token))
+        lists = [self.postings[g] for g in grams if g in self.postings]
+        if not lists:
+            return None
+        bound = max_edits(token)
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.tokens))
+        candidates = np.flatnonzero(
+            (shared >= len(grams) - 4 * bound)
+            & (np.abs(self.lengths - len(token)) <= bound)
+        )
+        best: Optional[str] = None
+        best_key = (bound + 1, 0)
+        for token_id in candidates.tolist():
+            candidate = self.tokens[token_id]
+            distance = bounded_edit_distance(token, candidate, best_key[0])
+            key = (distance, -int(self.frequency[token_id]))
+            if distance <= bound and key < best_key:
+                best, best_key = candidate, key
+        return best
+
+    def correct(self, query: str) -> str:
+        """``query`` tokenized, with unknown tokens replaced by corrections."""
+        corrected = []
+        for token in tokenize(query):
+            corrected.append(self.correct_token(token) or token)
+        return " ".join(corrected)
+
+
+__all__ = [
+    "TrigramIndex",
+    "bounded_edit_distance",
+    "max_edits",
+    "trigrams",
+]
@@ -8,8 +8,17 @@ from __future__ import annotations
 
 from typing import List, Optional, Tuple
 
+import numpy as np
+
+from modules.commerce.ann import scored_semantic_search
+from modules.commerce.columnar import CatalogColumns, columns_for
 from modules.commerce.domain import Product
-from modules.commerce.search import search as product_search
+from modules.commerce.retrieval import (
+    HybridRetriever,
+    catalog_embedded,
+    derive_queries,
+)
+from modules.commerce.search import search as product_search, search_many
 from modules.commerce.compare import compare
 
 
@@ -19,6 +28,15 @@ class PlanBuilder:
     confidence_threshold: float = 0.65
     fallback_limit: int = 3
 
+    def __init__(self, retriever: HybridRetriever | None = None) -> None:
+        # Resolve the search functions at call time so they can be swapped.
+        self.retriever = retriever or HybridRetriever(
+            lexical=lambda query: product_search(query),
+            semantic=lambda query, k: scored_semantic_search(query, k),
+            lexical_many=lambda queries: search_many(queries),
+            semantic_ready=catalog_embedded,
+        )
+
     def build_plan(
         self,
         intent: dict,
@@ -39,24 +57,15 @@ class PlanBuilder:
         Returns:
             Complete plan dictionary with products, clarifications, empowerment, etc.
         """
-        queries = self._derive_queries(intent)
-        fallback_reason = None
-        query = queries[0] if queries else "workspace"
-        products = []
-
-        for candidate in queries:
-            candidate_products = product_search(candidate)
-            if candidate_products:
-                products = candidate_products
-                query = candidate
-                if candidate != queries[0]:
-                    fallback_reason = (
-                        f"No products for '{queries[0]}', fell back to '{candidate}'."
-                    )
-                break
-
-        selected_products, filtered_count = self._select_products(products)
-        enrichment = self._product_summaries(selected_products)
+        retrieval = self.retriever.retrieve(intent, goals)
+        query = retrieval.query
+        products = retrieval.products
+        fallback_reason = retrieval.fallback_reason
+
+        columns, rows = columns_for(products)
+        selected_rows, filtered_count = self._select_rows(columns, rows)
+        selected_products = columns.products_at(selected_rows)
+        enrichment = self._product_summaries(columns, selected_rows)
 
         # Apply LLM reasoning if provided
         if reason_fn:
@@ -67,7 +76,9 @@ class PlanBuilder:
             annotated = enrichment
 
         comparison = compare(selected_products[:2])
-        data_quality = self._data_quality(annotated)
+        data_quality = self._data_quality(
+            annotated, columns if annotated is enrichment else None, selected_rows
+        )
         data_quality["filtered_low_confidence"] = filtered_count
         clarifications = self._clarifications(
             annotated, data_quality, filtered_count, fallback_reason
@@ -90,50 +101,33 @@ class PlanBuilder:
 
     def _derive_queries(self, intent: dict) -> List[str]:
         """Derive search queries from intent."""
-        label = intent.get("label", "")
-        domain = intent.get("domain", "")
-        candidates = []
-        if label:
-            candidates.append(label.replace("_", " "))
-        if domain and domain not in candidates:
-            candidates.append(domain)
-        candidates.append("workspace")
-        return [candidate for candidate in candidates if candidate]
-
-    def _select_products(self, products: List[Product]) -> Tuple[List[Product], int]:
-        """Select products based on confidence threshold."""
-        sorted_products = sorted(
-            products, key=lambda product: product.confidence, reverse=True
-        )
-        filtered_products = [
-            product
-            for product in sorted_products
-            if product.confidence >= self.confidence_threshold
-        ]
-        filtered_count = len(sorted_products) - len(filtered_products)
-        if not filtered_products:
-            filtered_products = sorted_products[: self.fallback_limit]
-            filtered_count = 0
-        return filtered_products, max(filtered_count, 0)
-
-    def _product_summaries(self, products: List[Product]) -> List[dict]:
-        """Create summary dictionaries for products."""
-        return [
-            {
-                "id": product.id,
-                "name": product.name,
-                "price": product.price,
-                "confidence": product.confidence,
-                "source": product.source,
-                "merchant_name": product.merchant_name,
-                "offer_url": product.offer_url,
-                "capabilities_enabled": product.capabilities_enabled,
-            }
-            for product in products
-        ]
+        return derive_queries(intent)
 
-    def _data_quality(self, products: List[dict]) -> dict:
-        """Compute data quality metrics."""
+    def _select_rows(
+        self, columns: CatalogColumns, rows: np.ndarray
+    ) -> Tuple[np.ndarray, int]:
+        """Apply the confidence threshold to ranked rows, keeping their order."""
+        return columns.select(rows, self.confidence_threshold, self.fallback_limit)
+
+    def _product_summaries(
+        self, columns: CatalogColumns, rows: np.ndarray
+    ) -> List[dict]:
+        """Create summary dictionaries for the selected rows."""
+        return columns.summaries(rows)
+
+    def _data_quality(
+        self,
+        products: List[dict],
+        columns: CatalogColumns | None = None,
+        rows: np.ndarray | None = None,
+    ) -> dict:
+        """Compute data quality metrics.
+
+        With ``columns`` (the summaries were not rewritten by a reasoner)
+        the stats come straight from the confidence and source columns.
+        """
+        if columns is not None and rows is not None:
+            return {**columns.quality(rows), "filtered_low_confidence": 0}
         if not products:
             return {
                 "average_confidence": 0.0,
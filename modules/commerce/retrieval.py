@@ -0,0 +1,251 @@
+"""Hybrid lexical + semantic candidate retrieval for plan building.
+
+Lexical search (BM25 over the catalog) only finds products that literally
+share words with the intent label. ``HybridRetriever`` also asks the
+embedding index for products close to the intent *and* the user's goals,
+runs both retrievers concurrently, and fuses the two rankings with
+reciprocal rank fusion (RRF): ``score(p) = sum(1 / (rrf_k + rank))``.
+
+When neither retriever finds anything for the primary query, lexical search
+falls back to the broader domain and "workspace" queries. A ``lexical_many``
+retriever ranks that whole fallback chain in one pass (see
+:func:`modules.commerce.search.search_many`) and the first non-empty result
+is used.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from modules.commerce.domain import Product
+
+logger = logging.getLogger(__name__)
+
+LexicalFn = Callable[[str], List[Product]]
+# Returns (product, cosine similarity) pairs, best first.
+SemanticFn = Callable[[str, int], List[Tuple[Product, float]]]
+ReadyFn = Callable[[], bool]
+
+# What an unavailable embedding provider or index raises (missing API key or
+# package, network and cache I/O, failed provider batches).
+_SEMANTIC_ERRORS = (RuntimeError, ValueError, ImportError, OSError)
+LexicalManyFn = Callable[[Sequence[str]], List[List[Product]]]
+
+
+@dataclass
+class RetrievalConfig:
+    """Candidate budget and fusion settings for hybrid retrieval."""
+
+    # Maximum candidates taken from each retriever before fusion
+    candidate_budget: int = field(
+        default_factory=lambda: int(os.getenv("RETRIEVAL_CANDIDATE_BUDGET", "50"))
+    )
+    rrf_k: int = field(default_factory=lambda: int(os.getenv("RETRIEVAL_RRF_K", "60")))
+    # Semantic hits below this cosine similarity are dropped before fusion,
+    # so an intent with no close products still falls back lexically.
+    min_similarity: float = field(
+        default_factory=lambda: float(os.getenv("RETRIEVAL_MIN_SIMILARITY", "0.3"))
+    )
+    semantic: bool = field(
+        default_factory=lambda: (
+            os.getenv("RETRIEVAL_SEMANTIC", "true").lower() == "true"
+        )
+    )
+
+
+@dataclass
+class RetrievalResult:
+    """Fused candidates plus the query they were retrieved for."""
+
+    products: List[Product]
+    query: str
+    fallback_reason: Optional[str] = None
+    lexical_count: int = 0
+    semantic_count: int = 0
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the thread pool semantic retrieval runs on."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("RETRIEVAL_WORKERS", "4")),
+                    thread_name_prefix="retrieval",
+                )
+    return _executor
+
+
+def derive_queries(intent: dict) -> List[str]:
+    """Derive search queries from intent, most specific first."""
+    label = intent.get("label", "")
+    domain = intent.get("domain", "")
+    candidates = []
+    if label:
+        candidates.append(label.replace("_", " "))
+    if domain and domain not in candidates:
+        candidates.append(domain)
+    candidates.append("workspace")
+    return [candidate for candidate in candidates if candidate]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Product]], rrf_k: int = 60, limit: int | None = None
+) -> List[Product]:
+    """Fuse ranked product lists by id; ties keep first-seen order."""
+    scores: Dict[str, float] = {}
+    products: Dict[str, Product] = {}
+    for ranking in rankings:
+        for rank, product in enumerate(ranking, start=1):
+            scores[product.id] = scores.get(product.id, 0.0) + 1.0 / (rrf_k + rank)
+            products.setdefault(product.id, product)
+    ordered = sorted(scores, key=scores.__getitem__, reverse=True)
+    if limit is not None:
+        ordered = ordered[:limit]
+    return [products[product_id] for product_id in ordered]
+
+
+def _default_lexical(query: str) -> List[Product]:
+    from modules.commerce.search import search
+
+    return search(query)
+
+
+def _default_lexical_many(queries: Sequence[str]) -> List[List[Product]]:
+    from modules.commerce.search import search_many
+
+    return search_many(queries)
+
+
+def _default_semantic(query: str, k: int) -> List[Tuple[Product, float]]:
+    from modules.commerce.ann import scored_semantic_search
+
+    return scored_semantic_search(query, k)
+
+
+def catalog_embedded() -> bool:
+    """Whether the current catalog has embeddings to search."""
+    from modules.commerce.embedding_index import get_catalog_embedding_index
+
+    return len(get_catalog_embedding_index()) > 0
+
+
+class HybridRetriever:
+    """Runs lexical and embedding retrieval concurrently and fuses them."""
+
+    def __init__(
+        self,
+        lexical: LexicalFn | None = None,
+        semantic: SemanticFn | None = None,
+        config: RetrievalConfig | None = None,
+        lexical_many: LexicalManyFn | None = None,
+        semantic_ready: ReadyFn | None = None,
+    ):
+        self.lexical = lexical or _default_lexical
+        self.semantic = semantic or _default_semantic
+        self.config = config or RetrievalConfig()
+        # Checked before each semantic lookup; the default retriever skips
+        # it while the catalog has no embeddings.
+        self.semantic_ready = semantic_ready or (None if semantic else catalog_embedded)
+        self._semantic_warned = False
+        # A custom lexical retriever has its own backend; only batch the
+        # fallback queries through search_many for the default one.
+        self.lexical_many = lexical_many or (None if lexical else _default_lexical_many)
+
+    def retrieve(
+        self, intent: dict, goals: Optional[List[str]] = None, k: int | None = None
+    ) -> RetrievalResult:
+        """Return up to ``k`` fused candidates for ``intent`` and ``goals``.
+
+        ``k`` defaults to the candidate budget.
+        """
+        budget = self.config.candidate_budget
+        k = budget if k is None else k
+        queries = derive_queries(intent)
+        primary = queries[0]
+
+        pending = self._start_semantic(self._semantic_query(primary, goals), budget)
+        lexical = self.lexical(primary)[:budget]
+        semantic = self._collect(pending, primary)
+
+        if lexical or semantic:
+            fused = reciprocal_rank_fusion(
+                [lexical, semantic], self.config.rrf_k, limit=k
+            )
+            return RetrievalResult(
+                products=fused,
+                query=primary,
+                lexical_count=len(lexical),
+                semantic_count=len(semantic),
+            )
+
+        # Nothing close to the intent: broaden the lexical query.
+        fallbacks = queries[1:]
+        for candidate, found in zip(fallbacks, self._fallback_results(fallbacks)):
+            lexical = found[:budget]
+            if lexical:
+                return RetrievalResult(
+                    products=lexical[:k],
+                    query=candidate,
+                    fallback_reason=(
+                        f"No products for '{primary}', fell back to '{candidate}'."
+                    ),
+                    lexical_count=len(lexical),
+                )
+        return RetrievalResult(products=[], query=primary)
+
+    @staticmethod
+    def _semantic_query(query: str, goals: Optional[List[str]]) -> str:
+        """Embed the intent together with the goals the products should serve."""
+        return ". ".join([query, *(goals or [])])
+
+    def _fallback_results(self, queries: List[str]) -> Iterable[List[Product]]:
+        """Lexical results for ``queries``, in one pass when supported.
+
+        Errors from ``lexical_many`` propagate like those of ``lexical``.
+        """
+        if queries and self.lexical_many is not None:
+            return self.lexical_many(queries)
+        # Lazily, so later fallbacks are not searched once one matches.
+        return (self.lexical(query) for query in queries)
+
+    def _start_semantic(self, query: str, budget: int) -> Optional[Future]:
+        if not self.config.semantic:
+            return None
+        if self.semantic_ready is not None and not self.semantic_ready():
+            return None
+        return _get_executor().submit(self.semantic, query, budget)
+
+    def _collect(self, pending: Optional[Future], query: str) -> List[Product]:
+        if pending is None:
+            return []
+        try:
+            hits = pending.result()
+        except _SEMANTIC_ERRORS as exc:
+            # Usually a configuration problem that repeats on every plan.
+            log = logger.debug if self._semantic_warned else logger.warning
+            self._semantic_warned = True
+            log(f"Semantic retrieval failed for '{query}': {exc}")
+            return []
+        minimum = self.config.min_similarity
+        return [product for product, score in hits if score >= minimum]
+
+
+__all__ = [
+    "HybridRetriever",
+    "RetrievalConfig",
+    "RetrievalResult",
+    "catalog_embedded",
+    "derive_queries",
+    "reciprocal_rank_fusion",
+]
@@ -2,37 +2,332 @@
 
 from __future__ import annotations
 
-from typing import Iterable, List, Sequence
+import os
+import threading
+from collections import OrderedDict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
 
-from modules.commerce.adapters import load_catalog
+from modules.commerce.bm25 import BM25Index
+from modules.commerce.catalog import (
+    CatalogSnapshot,
+    current_snapshot,
+    register_builder,
+)
 from modules.commerce.domain import Product
+from modules.commerce.fuzzy import TrigramIndex
 
-CATALOG = load_catalog()
+T = TypeVar("T")
+
+
+def __getattr__(name: str) -> Any:
+    # ``CATALOG`` used to be a module constant; it now follows the current
+    # snapshot so reloads are picked up.
+    if name == "CATALOG":
+        return current_snapshot().products
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def catalog_version() -> int:
+    """Return the version number of the currently loaded catalog."""
+    return current_snapshot().version
+
+
+def catalog_index(
+    name: str,
+    build: Callable[[List[Product]], T],
+    snapshot: CatalogSnapshot | None = None,
+) -> T:
+    """Return the structure ``name`` derived from the current catalog.
+
+    ``build`` runs at most once per catalog version; later calls reuse it.
+    Catalog reloads rebuild every structure registered here before the new
+    version goes live. Pass ``snapshot`` to read a specific version.
+    """
+    register_builder(name, build)
+    return (snapshot or current_snapshot()).index(name, build)
+
+
+def _products_by_id(catalog: List[Product]) -> Dict[str, Product]:
+    return {product.id: product for product in catalog}
+
+
+def get_product(product_id: str) -> Product | None:
+    """Return the catalog product with ``product_id``, if any."""
+    return catalog_index("products_by_id", _products_by_id).get(product_id)
+
+
+def get_products(ids: Iterable[str]) -> List[Product]:
+    """Return catalog products for ``ids`` in the given order; unknown ids are skipped."""
+    by_id = catalog_index("products_by_id", _products_by_id)
+    return [by_id[product_id] for product_id in ids if product_id in by_id]
+
+
+def _haystack(product: Product) -> List[str]:
+    """Lowercased fields that substring matching looks at."""
+    return [
+        item.lower()
+        for item in (
+            product.name,
+            product.description,
+            *product.tags,
+            *product.capabilities_enabled,
+        )
+    ]
 
 
 def _matches(product: Product, query: str) -> bool:
     query_lower = query.lower()
-    haystack: Sequence[str] = [
-        product.name,
-        product.description,
-        *product.tags,
-        *product.capabilities_enabled,
-    ]
-    return any(query_lower in item.lower() for item in haystack)
+    return any(query_lower in item for item in _haystack(product))
+
+
+class SearchResultCache:
+    """LRU cache of search results tagged with the catalog version.
+
+    Entries are only valid for the catalog version they were computed
+    against; the first lookup after a version change drops them all.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.version = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Product, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _sync(self, version: int) -> bool:
+        """Move to a newer ``version``; False if ``version`` is already stale."""
+        if version > self.version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self.version = version
+        return version == self.version
+
+    def get(self, key: Hashable, version: int) -> Tuple[Product, ...] | None:
+        with self._lock:
+            results = self._entries.get(key) if self._sync(version) else None
+            if results is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return results
+
+    def put(self, key: Hashable, version: int, results: Sequence[Product]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if not self._sync(version):
+                return
+            self._entries[key] = tuple(results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
 
+    def stats(self) -> Dict[str, int | float]:
+        """Return entry, capacity and hit/miss counters plus the hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "capacity": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "catalog_version": self.version,
+            }
 
-def search(query: str, limit: int | None = None) -> List[Product]:
+
+_result_cache = SearchResultCache(int(os.getenv("SEARCH_CACHE_SIZE", "512")))
+_FUZZY_DEFAULT = os.getenv("SEARCH_FUZZY", "true").lower() == "true"
+
+
+def search_cache_stats() -> Dict[str, int | float]:
+    """Return hit-rate metrics for the search result cache."""
+    return _result_cache.stats()
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _cache_key(
+    query: str, filters: Dict[str, Any] | None, limit: int | None, fuzzy: bool
+):
+    normalized_filters = tuple(
+        sorted(
+            (name, tuple(value) if isinstance(value, (list, tuple, set)) else value)
+            for name, value in (filters or {}).items()
+            if value is not None
+        )
+    )
+    return _normalize_query(query), normalized_filters, limit, fuzzy
+
+
+def search(
+    query: str,
+    limit: int | None = None,
+    filters: Dict[str, Any] | None = None,
+    fuzzy: bool | None = None,
+    snapshot: CatalogSnapshot | None = None,
+) -> List[Product]:
+    """Return catalog products matching ``query``, most relevant first.
+
+    Results are ranked with BM25F over capabilities, tags, name and
+    description. With ``fuzzy`` (default: SEARCH_FUZZY, on) misspelled
+    tokens are first corrected to the closest catalog token ("ergonmic" ->
+    "ergonomic"). When no whole token matches, falls back to substring
+    matching (e.g. partial words) in catalog order. An empty query returns
+    the catalog as-is. ``filters`` are facet criteria (see
+    :func:`modules.commerce.facets.filter_products`) applied before ``limit``.
+
+    Queries are lowercased and whitespace-collapsed, and results are cached
+    per normalized query, filters and limit until the catalog version changes.
+    Pass ``snapshot`` to search a specific catalog version.
+    """
+    snapshot = snapshot or current_snapshot()
+    fuzzy = _FUZZY_DEFAULT if fuzzy is None else fuzzy
+    key = _cache_key(query, filters, limit, fuzzy)
+    cached = _result_cache.get(key, snapshot.version)
+    if cached is not None:
+        return list(cached)
+    results = _search_uncached(snapshot, key[0], limit, filters, fuzzy)
+    _result_cache.put(key, snapshot.version, results)
+    return results
+
+
+def search_many(
+    queries: Sequence[str],
+    limit: int | None = None,
+    filters: Dict[str, Any] | None = None,
+    fuzzy: bool | None = None,
+    snapshot: CatalogSnapshot | None = None,
+) -> List[List[Product]]:
+    """:func:`search` for each of ``queries``, evaluated together.
+
+    Queries missing from the result cache are ranked in a single pass over
+    the BM25 index, and those without token matches share one substring
+    scan of the catalog. Every result is also cached under the same key
+    :func:`search` uses.
+    """
+    snapshot = snapshot or current_snapshot()
+    fuzzy = _FUZZY_DEFAULT if fuzzy is None else fuzzy
+    results: List[List[Product] | None] = [None] * len(queries)
+    pending: Dict[Hashable, List[int]] = {}
+    for position, query in enumerate(queries):
+        key = _cache_key(query, filters, limit, fuzzy)
+        if key in pending:
+            pending[key].append(position)
+            continue
+        cached = _result_cache.get(key, snapshot.version)
+        if cached is not None:
+            results[position] = list(cached)
+        else:
+            pending[key] = [position]
+    if pending:
+        computed = _search_many_uncached(
+            snapshot, [key[0] for key in pending], limit, filters, fuzzy
+        )
+        for (key, positions), found in zip(pending.items(), computed):
+            _result_cache.put(key, snapshot.version, found)
+            for position in positions:
+                results[position] = list(found)
+    return results  # type: ignore[return-value]
+
+
+def _search_uncached(
+    snapshot: CatalogSnapshot,
+    query: str,
+    limit: int | None,
+    filters: Dict[str, Any] | None,
+    fuzzy: bool = False,
+) -> List[Product]:
     if not query:
-        results = CATALOG
+        results = list(snapshot.products)
     else:
-        results = [product for product in CATALOG if _matches(product, query)]
+        index = catalog_index("bm25", BM25Index, snapshot)
+        ranked_query = query
+        if fuzzy:
+            ranked_query = catalog_index("trigram", TrigramIndex, snapshot).correct(
+                query
+            )
+        rows = index.search(ranked_query, None if filters else limit)
+        if rows:
+            results = [index.products[row] for row in rows]
+        else:
+            results = [p for p in snapshot.products if _matches(p, query)]
+    return _refine(snapshot, results, limit, filters)
+
+
+def _search_many_uncached(
+    snapshot: CatalogSnapshot,
+    queries: Sequence[str],
+    limit: int | None,
+    filters: Dict[str, Any] | None,
+    fuzzy: bool = False,
+) -> List[List[Product]]:
+    index = catalog_index("bm25", BM25Index, snapshot)
+    ranked_queries = list(queries)
+    if fuzzy:
+        trigram = catalog_index("trigram", TrigramIndex, snapshot)
+        ranked_queries = [trigram.correct(query) for query in queries]
+    row_lists = index.search_many(ranked_queries, None if filters else limit)
+
+    results: List[List[Product]] = []
+    unmatched: List[int] = []
+    for position, (query, rows) in enumerate(zip(queries, row_lists)):
+        if not query:
+            results.append(list(snapshot.products))
+        elif rows:
+            results.append([index.products[row] for row in rows])
+        else:
+            results.append([])
+            unmatched.append(position)
+    if unmatched:
+        # One scan of the catalog serves every query without token matches.
+        needles = [(position, queries[position].lower()) for position in unmatched]
+        for product in snapshot.products:
+            haystack = _haystack(product)
+            for position, needle in needles:
+                if any(needle in item for item in haystack):
+                    results[position].append(product)
+    return [_refine(snapshot, found, limit, filters) for found in results]
+
+
+def _refine(
+    snapshot: CatalogSnapshot,
+    results: List[Product],
+    limit: int | None,
+    filters: Dict[str, Any] | None,
+) -> List[Product]:
+    """Apply facet ``filters`` and then ``limit`` to ranked ``results``."""
+    if filters:
+        from modules.commerce.facets import FacetIndex
+
+        facets = catalog_index("facets", FacetIndex, snapshot)
+        results = facets.filter(results, **filters)
     if limit is not None:
         results = results[:limit]
     return results
 
 
 def related_by_tag(tag: str) -> List[Product]:
-    return [product for product in CATALOG if tag in product.tags]
+    from modules.commerce.facets import get_facet_index
+
+    return get_facet_index().filter(tag=tag)
 
 
 def list_empowerment_scores(products: Iterable[Product]) -> List[dict]:
@@ -2,17 +2,23 @@
 
 from __future__ import annotations
 
-from typing import List, Optional
+import logging
+import sqlite3
+from functools import partial
+from typing import Dict, List, Optional
 
 from modules.intent.llm_classifier import HybridIntentClassifier
 from modules.conversation.context import build_context
 from modules.memory.session_manager import SessionManager
+from modules.memory.repositories import goals as goals_repo
 from modules.memory.semantic import SemanticMemory
 from modules.empowerment import reflection, goal_alignment
 from modules.empowerment.llm_reasoner import reason_about_products
 from modules.commerce.plan_builder import PlanBuilder
 from modules.commerce import search as commerce_search
 
+logger = logging.getLogger(__name__)
+
 
 class IntentAgent:
     """Façade agent for intent detection."""
@@ -56,9 +62,22 @@ class CommerceAgent:
             goals=goals,
             context=context,
             reason_fn=reason_about_products,
-            assess_fn=goal_alignment.assess,
+            assess_fn=partial(
+                goal_alignment.assess,
+                goal_embeddings=self._stored_goal_embeddings(goals or []),
+            ),
         )
 
+    def _stored_goal_embeddings(self, goals: List[str]) -> Dict[str, List[float]]:
+        """Embeddings recorded with the goals, so alignment need not re-embed them."""
+        if not goals:
+            return {}
+        try:
+            return goals_repo.get_goal_embeddings(goals)
+        except sqlite3.Error as exc:
+            logger.warning(f"Could not load stored goal embeddings: {exc}")
+            return {}
+
     def recommend(self, query: str) -> List[str]:
         """Return product names matching the query."""
         return [product.name for product in commerce_search(query)]
@@ -4,6 +4,7 @@ from modules.empowerment.domain import (
     AlienationSignal,
     EmpowermentMetric,
     GoalAlignmentResult,
+    ProductAlignment,
 )
 from modules.empowerment.goal_alignment import assess
 from modules.empowerment.alienation import detect
@@ -15,6 +16,7 @@ __all__ = [
     "AlienationSignal",
     "EmpowermentMetric",
     "GoalAlignmentResult",
+    "ProductAlignment",
     "assess",
     "detect",
     "generate_reflection",
@@ -98,6 +98,19 @@ class EmpowermentMetric:
     evidence: List[str]
 
 
+@dataclass
+class ProductAlignment:
+    """Alignment details for a single product."""
+
+    product_id: str
+    product_name: str
+    overall_score: float
+    goal_scores: Dict[str, float]  # goal -> similarity score
+    best_matching_goal: Optional[str]
+    best_matching_capability: Optional[str]
+    confidence: float
+
+
 @dataclass
 class GoalAlignmentResult:
     """Result of goal alignment assessment."""
@@ -107,6 +120,8 @@ class GoalAlignmentResult:
     misaligned_goals: List[str]
     supporting_products: List[str]
     confidence_summary: Dict[str, float | Dict[str, float]]
+    # Per-product breakdown (semantic alignment only), in input order
+    product_alignments: List[ProductAlignment] = field(default_factory=list)
 
 
 @dataclass
@@ -121,6 +136,7 @@ class AlienationSignal:
 __all__ = [
     "EmpowermentMetric",
     "GoalAlignmentResult",
+    "ProductAlignment",
     "AlienationSignal",
     "ConstraintSeverity",
     "ManipulationPattern",
@@ -9,11 +9,18 @@ actually mean, not just what words they use.
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
 
 from modules.commerce.domain import Product
-from modules.empowerment.domain import GoalAlignmentResult
+from modules.commerce.embedding_index import (
+    get_catalog_embedding_index,
+    product_semantic_text as _build_product_semantic_text,
+    provider_key,
+)
+from modules.empowerment.domain import GoalAlignmentResult, ProductAlignment
+from modules.empowerment.keyword_index import KeywordIndex, get_catalog_keyword_index
 
 logger = logging.getLogger(__name__)
 
@@ -23,23 +30,11 @@ MEDIUM_ALIGNMENT_THRESHOLD = 0.5  # Reasonable match
 LOW_ALIGNMENT_THRESHOLD = 0.3  # Weak but possible match
 
 
-@dataclass
-class ProductAlignment:
-    """Alignment details for a single product."""
-
-    product_id: str
-    product_name: str
-    overall_score: float
-    goal_scores: Dict[str, float]  # goal -> similarity score
-    best_matching_goal: Optional[str]
-    best_matching_capability: Optional[str]
-    confidence: float
-
-
 def assess(
     goals: List[str],
     products: List[Product],
     use_semantic: bool = True,
+    goal_embeddings: Optional[Mapping[str, Sequence[float]]] = None,
 ) -> GoalAlignmentResult:
     """Assess how well products align with user goals.
 
@@ -47,6 +42,8 @@ def assess(
         goals: List of user-declared goals (e.g., "reduce back pain", "learn Python")
         products: List of products to evaluate
         use_semantic: Whether to use semantic similarity (True) or fall back to keywords
+        goal_embeddings: Stored embeddings keyed by goal text (e.g. from
+            ``goals_repo.get_goal_embeddings``); only goals missing here are embedded
 
     Returns:
         GoalAlignmentResult with alignment scores and supporting products
@@ -78,7 +75,7 @@ def assess(
     # Try semantic alignment first, fall back to keyword matching
     if use_semantic:
         try:
-            return _semantic_assess(goals, products)
+            return _semantic_assess(goals, products, goal_embeddings)
         except Exception as e:
             logger.warning(f"Semantic alignment failed, falling back to keywords: {e}")
             return _keyword_assess(goals, products)
@@ -86,65 +83,90 @@ def assess(
         return _keyword_assess(goals, products)
 
 
-def _semantic_assess(goals: List[str], products: List[Product]) -> GoalAlignmentResult:
-    """Assess alignment using semantic similarity (embeddings)."""
-    from shared.llm.embeddings import (
-        get_embedding_provider,
-        cosine_similarity,
-    )
+def assess_top_k(
+    goals: List[str],
+    products: List[Product],
+    k: int = 10,
+    use_semantic: bool = True,
+    goal_embeddings: Optional[Mapping[str, Sequence[float]]] = None,
+) -> GoalAlignmentResult:
+    """Assess alignment considering only the ``k`` best products per goal.
 
-    provider = get_embedding_provider()
+    Meant for large candidate sets such as a whole catalog shard: each goal
+    keeps its top ``k`` products (``np.argpartition``), supporting products
+    are ordered by similarity within each goal, and ``product_alignments``
+    only covers those winners.
 
-    # Prepare texts for embedding
-    goal_texts = goals
+    Falls back to full keyword matching when semantic alignment fails.
+    """
+    if k <= 0:
+        raise ValueError("k must be positive")
+    if not goals or not products:
+        return assess(goals, products)
 
-    # Build product capability texts (what each product enables)
-    product_texts: List[Tuple[Product, str]] = []
-    for product in products:
-        # Combine capabilities, description, and tags into a semantic representation
-        capability_text = _build_product_semantic_text(product)
-        product_texts.append((product, capability_text))
+    if use_semantic:
+        try:
+            return _semantic_assess(goals, products, goal_embeddings, top_k=k)
+        except Exception as e:
+            logger.warning(f"Semantic alignment failed, falling back to keywords: {e}")
+            return _keyword_assess(goals, products)
+    else:
+        return _keyword_assess(goals, products)
 
-    # Generate embeddings
-    all_texts = goal_texts + [pt[1] for pt in product_texts]
-    embeddings = provider.embed_batch(all_texts)
 
-    goal_embeddings = embeddings[: len(goals)]
-    product_embeddings = embeddings[len(goals) :]
+def _semantic_assess(
+    goals: List[str],
+    products: List[Product],
+    goal_embeddings: Optional[Mapping[str, Sequence[float]]] = None,
+    top_k: Optional[int] = None,
+) -> GoalAlignmentResult:
+    """Assess alignment using semantic similarity (embeddings).
+
+    Product vectors come from the precomputed catalog embedding index and
+    goal vectors from ``goal_embeddings`` when available; only the remaining
+    goals (plus any product not yet indexed) are embedded per call. With
+    ``top_k`` only each goal's ``top_k`` most similar products can support it.
+    """
+    from shared.llm.embeddings import get_embedding_provider
+
+    provider = get_embedding_provider()
+    similarity = _similarity_matrix(goals, products, goal_embeddings, provider)
+
+    matches = similarity >= MEDIUM_ALIGNMENT_THRESHOLD
+    if top_k is not None and top_k < len(products):
+        top = np.argpartition(-similarity, top_k - 1, axis=1)[:, :top_k]
+        in_top = np.zeros_like(matches)
+        np.put_along_axis(in_top, top, True, axis=1)
+        matches &= in_top
+    match_counts = matches.sum(axis=1)
+    max_similarity = np.where(matches, similarity, 0.0).max(axis=1)
+    product_confidence = np.array([p.confidence for p in products], dtype=np.float64)
+    # Average confidence of the products supporting each goal
+    avg_product_confidence = (matches @ product_confidence) / np.maximum(
+        match_counts, 1
+    )
 
-    # Calculate alignment scores
     aligned_goals: List[str] = []
     misaligned_goals: List[str] = []
-    supporting_products: List[str] = []
     goal_confidence: Dict[str, float] = {}
-
-    # For each goal, find if any product aligns
     for j, goal in enumerate(goals):
-        goal_emb = goal_embeddings[j]
-        max_similarity = 0.0
-        best_products: List[str] = []
-
-        for i, (product, _) in enumerate(product_texts):
-            product_emb = product_embeddings[i]
-            similarity = cosine_similarity(goal_emb, product_emb)
-
-            if similarity >= MEDIUM_ALIGNMENT_THRESHOLD:
-                best_products.append(product.id)
-                max_similarity = max(max_similarity, similarity)
-
-        if best_products:
+        if match_counts[j]:
             aligned_goals.append(goal)
-            supporting_products.extend(best_products)
             # Weight confidence by similarity and product confidence
-            avg_product_confidence = _average_confidence(
-                [p for p in products if p.id in best_products]
-            )
-            goal_confidence[goal] = max_similarity * avg_product_confidence
+            goal_confidence[goal] = float(max_similarity[j] * avg_product_confidence[j])
         else:
             misaligned_goals.append(goal)
 
-    # Deduplicate supporting products
-    supporting_products = list(dict.fromkeys(supporting_products))
+    # Goal-major order, deduplicated; best first within a goal in top-k mode
+    if top_k is None:
+        _, product_cols = np.nonzero(matches)
+    else:
+        product_cols = []
+        for j in range(len(goals)):
+            cols = np.flatnonzero(matches[j])
+            product_cols.extend(cols[np.argsort(-similarity[j, cols], kind="stable")])
+    winners = list(dict.fromkeys(int(col) for col in product_cols))
+    supporting_products = list(dict.fromkeys(products[col].id for col in winners))
 
     # Calculate overall score
     if not goals:
@@ -161,7 +183,7 @@ def _semantic_assess(goals: List[str], products: List[Product]) -> GoalAlignment
     weighted_score = round(base_score * (0.6 + 0.4 * confidence_weight), 3)
 
     confidence_summary: Dict[str, float | Dict[str, float]] = {
-        "average_confidence": round(_average_confidence(products), 2),
+        "average_confidence": round(float(product_confidence.mean()), 2),
         "aligned_goal_confidence": {
             goal: round(score, 3) for goal, score in goal_confidence.items()
         },
@@ -169,33 +191,166 @@ def _semantic_assess(goals: List[str], products: List[Product]) -> GoalAlignment
         "alignment_method": "semantic",
     }
 
+    if top_k is None:
+        product_alignments = _product_alignments(goals, products, similarity)
+    else:
+        confidence_summary["top_k"] = top_k
+        product_alignments = _product_alignments(
+            goals, [products[col] for col in winners], similarity[:, winners]
+        )
+
     return GoalAlignmentResult(
         score=weighted_score,
         aligned_goals=aligned_goals,
         misaligned_goals=misaligned_goals,
         supporting_products=supporting_products,
         confidence_summary=confidence_summary,
+        product_alignments=product_alignments,
+    )
+
+
+def _similarity_matrix(
+    goals: List[str],
+    products: List[Product],
+    goal_embeddings: Optional[Mapping[str, Sequence[float]]],
+    provider,
+) -> np.ndarray:
+    """Goal x product cosine similarities, embedding only what is missing."""
+    from shared.llm.embeddings import cosine_similarity_matrix
+
+    index = get_catalog_embedding_index()
+    space = provider_key(provider)
+
+    indexed_vectors, missing = index.lookup(products, space)
+
+    # Reuse stored goal embeddings from the active embedding space
+    goal_vectors = _stored_goal_vectors(goals, goal_embeddings, provider)
+    unembedded_goals = [g for g, v in zip(goals, goal_vectors) if v is None]
+
+    # Generate embeddings for goals and products that have none yet
+    missing_products = [products[i] for i in missing]
+    all_texts = unembedded_goals + [
+        _build_product_semantic_text(p) for p in missing_products
+    ]
+    embeddings = provider.embed_batch(all_texts) if all_texts else []
+
+    fresh_goal_vectors = iter(embeddings[: len(unembedded_goals)])
+    goal_vectors = [
+        v if v is not None else next(fresh_goal_vectors) for v in goal_vectors
+    ]
+    if not missing_products:
+        # Every product was already indexed.
+        return cosine_similarity_matrix(goal_vectors, indexed_vectors)
+
+    new_vectors = np.asarray(
+        embeddings[len(unembedded_goals) :], dtype=np.float32
+    ).reshape(len(missing_products), -1)
+    # Only catalog products go into the shared index; anything else (e.g.
+    # products built by a custom retriever) is embedded for this call only,
+    # so the index cannot grow without bound from the request path.
+    catalog_rows = [k for k, p in enumerate(missing_products) if _in_catalog(p)]
+    if catalog_rows:
+        index.upsert(
+            [missing_products[k] for k in catalog_rows],
+            new_vectors[catalog_rows],
+            space,
+        )
+    if indexed_vectors is None:
+        product_embeddings = new_vectors
+    else:
+        product_embeddings = indexed_vectors
+        product_embeddings[missing] = new_vectors
+
+    return cosine_similarity_matrix(goal_vectors, product_embeddings)
+
+
+def _in_catalog(product: Product) -> bool:
+    from modules.commerce.search import get_product
+
+    return get_product(product.id) is product
+
+
+def _stored_goal_vectors(
+    goals: List[str],
+    goal_embeddings: Optional[Mapping[str, Sequence[float]]],
+    provider,
+) -> List[Optional[Sequence[float]]]:
+    """Stored vector per goal, or ``None`` when it must be embedded.
+
+    Stored vectors whose dimension differs from the active provider (e.g.
+    recorded before a fallback to the local model) are not reused.
+    """
+    if not goal_embeddings:
+        return [None] * len(goals)
+    dimension = provider.dimension
+    vectors: List[Optional[Sequence[float]]] = []
+    for goal in goals:
+        vector = goal_embeddings.get(goal)
+        vectors.append(
+            vector if vector is not None and len(vector) == dimension else None
+        )
+    return vectors
+
+
+def _product_alignments(
+    goals: List[str], products: List[Product], similarity: np.ndarray
+) -> List[ProductAlignment]:
+    """Build per-product alignment records from the goal x product matrix."""
+    best_goal_rows = similarity.argmax(axis=0)
+    best_scores = similarity.max(axis=0).astype(np.float64)
+    confidences = np.maximum(best_scores, 0.0) * np.array(
+        [p.confidence for p in products], dtype=np.float64
     )
+    scores_by_product = np.round(similarity.T.astype(np.float64), 3).tolist()
+
+    alignments: List[ProductAlignment] = []
+    for product, row, best, overall, confidence, scores in zip(
+        products,
+        best_goal_rows.tolist(),
+        best_scores.tolist(),
+        np.round(best_scores, 3).tolist(),
+        np.round(confidences, 3).tolist(),
+        scores_by_product,
+    ):
+        best_goal = goals[row] if best >= MEDIUM_ALIGNMENT_THRESHOLD else None
+        alignments.append(
+            ProductAlignment(
+                product_id=product.id,
+                product_name=product.name,
+                overall_score=overall,
+                goal_scores=dict(zip(goals, scores)),
+                best_matching_goal=best_goal,
+                best_matching_capability=_get_best_capability(product, best_goal)
+                if best_goal
+                else None,
+                confidence=confidence,
+            )
+        )
+    return alignments
 
 
 def _keyword_assess(goals: List[str], products: List[Product]) -> GoalAlignmentResult:
-    """Fallback: Assess alignment using keyword matching (original implementation)."""
+    """Fallback: Assess alignment using keyword matching (original implementation).
+
+    Matching runs against an inverted index of capability tokens and tags;
+    see ``modules.empowerment.keyword_index`` for the matching rules.
+    """
     aligned: List[str] = []
     supporting_products: List[str] = []
     goal_confidence: Dict[str, float] = {}
 
+    index, row_positions = _keyword_index_for(products)
     for goal in goals:
-        normalized = goal.lower()
-        goal_tokens = set(normalized.split())
-        goal_products = [
-            product
-            for product in products
-            if any(
-                goal_tokens & set(capability.lower().split())
-                for capability in product.capabilities_enabled
+        rows = index.match(goal)
+        if row_positions is None:
+            positions = sorted(rows)
+        else:
+            positions = sorted(
+                position
+                for row in rows & row_positions.keys()
+                for position in row_positions[row]
             )
-            or any(tag in normalized or normalized in tag for tag in product.tags)
-        ]
+        goal_products = [products[position] for position in positions]
         if goal_products:
             aligned.append(goal)
             supporting_products.extend(product.id for product in goal_products)
@@ -228,37 +383,25 @@ def _keyword_assess(goals: List[str], products: List[Product]) -> GoalAlignmentR
     )
 
 
-def _build_product_semantic_text(product: Product) -> str:
-    """Build a semantic text representation of a product for embedding.
+def _keyword_index_for(
+    products: List[Product],
+) -> Tuple[KeywordIndex, Optional[Dict[int, List[int]]]]:
+    """Pick the keyword index for ``products`` and map its rows to positions.
 
-    Combines capabilities, description, and tags into a text that
-    captures what the product enables and who it's for.
+    The catalog index is reused when ``products`` are catalog products and a
+    large enough share of it that its postings are not mostly filtered out;
+    otherwise a small index is built for this call, whose rows already are
+    positions (``None`` mapping).
     """
-    parts = []
-
-    # Add capabilities (most important for goal alignment)
-    if product.capabilities_enabled:
-        capabilities = ", ".join(product.capabilities_enabled)
-        parts.append(f"This product enables: {capabilities}")
-
-    # Add description
-    if product.description:
-        parts.append(product.description)
-
-    # Add category context
-    if product.category:
-        parts.append(f"Category: {product.category}")
-
-    # Add tags as additional context
-    if product.tags:
-        tags = ", ".join(product.tags)
-        parts.append(f"Related to: {tags}")
-
-    # Fall back to name if nothing else
-    if not parts:
-        parts.append(product.name)
-
-    return " ".join(parts)
+    catalog = get_catalog_keyword_index()
+    if len(products) * 4 >= len(catalog) and catalog.covers(products):
+        row_positions: Dict[int, List[int]] = {}
+        for position, product in enumerate(products):
+            row_positions.setdefault(catalog.rows_by_id[product.id], []).append(
+                position
+            )
+        return catalog, row_positions
+    return KeywordIndex(products), None
 
 
 def _get_best_capability(product: Product, goal: str) -> Optional[str]:
@@ -319,6 +462,7 @@ def get_alignment_explanation(
 
 __all__ = [
     "assess",
+    "assess_top_k",
     "get_alignment_explanation",
     "ProductAlignment",
     "HIGH_ALIGNMENT_THRESHOLD",
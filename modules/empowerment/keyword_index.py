@@ -0,0 +1,65 @@
+"""Inverted index backing the keyword goal-alignment fallback.
+
+A product supports a goal when a goal token appears among the whitespace
+tokens of one of its capabilities, or when one of its tags is a substring
+of the goal (or the goal of the tag). Capability tokens map to posting sets
+of product rows; tags are matched once per *distinct* tag rather than once
+per product, so a goal costs ``O(tokens + distinct tags + matches)``.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Set
+
+from modules.commerce.domain import Product
+
+
+class KeywordIndex:
+    """Token -> product-row postings over capabilities and tags."""
+
+    def __init__(self, products: Sequence[Product]):
+        self.products: List[Product] = list(products)
+        self.rows_by_id: Dict[str, int] = {}
+        self.capability_postings: Dict[str, Set[int]] = {}
+        self.tag_postings: Dict[str, Set[int]] = {}
+        for row, product in enumerate(self.products):
+            self.rows_by_id.setdefault(product.id, row)
+            for capability in product.capabilities_enabled:
+                for token in capability.lower().split():
+                    self.capability_postings.setdefault(token, set()).add(row)
+            for tag in product.tags:
+                self.tag_postings.setdefault(tag, set()).add(row)
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def match(self, goal: str) -> Set[int]:
+        """Rows of the products that keyword-match ``goal``."""
+        normalized = goal.lower()
+        rows: Set[int] = set()
+        for token in set(normalized.split()):
+            postings = self.capability_postings.get(token)
+            if postings:
+                rows |= postings
+        for tag, postings in self.tag_postings.items():
+            if tag in normalized or normalized in tag:
+                rows |= postings
+        return rows
+
+    def covers(self, products: Sequence[Product]) -> bool:
+        """Whether every product is (identically) one this index was built from."""
+        for product in products:
+            row = self.rows_by_id.get(product.id)
+            if row is None or self.products[row] is not product:
+                return False
+        return True
+
+
+def get_catalog_keyword_index() -> KeywordIndex:
+    """Return the keyword index for the current catalog version."""
+    from modules.commerce.search import catalog_index
+
+    return catalog_index("keyword", KeywordIndex)
+
+
+__all__ = ["KeywordIndex", "get_catalog_keyword_index"]
@@ -17,7 +17,7 @@ class SimulationResult:
 
 
 def run_simulation(intent_id: str, query: str, limit: int = 3) -> SimulationResult:
-    products = product_search.search(query, limit=limit)
+    products = product_search(query, limit=limit)
     average_confidence = sum(product.confidence for product in products) / max(
         len(products), 1
     )
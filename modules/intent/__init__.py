@@ -3,8 +3,14 @@
 This module owns all intent detection, classification, and taxonomy definitions.
 """
 
+from typing import Any
+
 from modules.intent.domain import Intent, IntentDefinition, IntentContext
-from modules.intent.taxonomy import INTENT_TAXONOMY, iter_keywords, load_intent_taxonomy
+from modules.intent.taxonomy import (
+    get_intent_taxonomy,
+    iter_keywords,
+    load_intent_taxonomy,
+)
 from modules.intent.classifier import classify, KeywordClassifier
 from modules.intent.llm_classifier import HybridIntentClassifier
 
@@ -13,9 +19,17 @@ __all__ = [
     "IntentDefinition",
     "IntentContext",
     "INTENT_TAXONOMY",
+    "get_intent_taxonomy",
     "iter_keywords",
     "load_intent_taxonomy",
     "classify",
     "KeywordClassifier",
     "HybridIntentClassifier",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    # ``INTENT_TAXONOMY`` is parsed on first access, as in modules.intent.taxonomy.
+    if name == "INTENT_TAXONOMY":
+        return get_intent_taxonomy()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
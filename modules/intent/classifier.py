@@ -5,7 +5,7 @@ from __future__ import annotations
 from typing import Any, Callable, List, Mapping, Tuple
 
 from modules.intent.domain import Intent, IntentDefinition
-from modules.intent.taxonomy import INTENT_TAXONOMY
+from modules.intent.taxonomy import get_intent_taxonomy
 
 
 LLMClassifier = Callable[[str], Mapping[str, Any]]
@@ -15,7 +15,11 @@ class KeywordClassifier:
     """Lightweight intent classifier using keyword matching."""
 
     def __init__(self, taxonomy: List[IntentDefinition] | None = None) -> None:
-        self.taxonomy = taxonomy or INTENT_TAXONOMY
+        self._taxonomy = taxonomy
+
+    @property
+    def taxonomy(self) -> List[IntentDefinition]:
+        return self._taxonomy or get_intent_taxonomy()
 
     def classify(self, text: str) -> Intent:
         """Classify intent using keyword matching."""
@@ -28,7 +32,7 @@ def classify(
     llm_threshold: float = 0.55,
 ) -> Intent:
     """Return an intent via keyword matching, with optional LLM fallback."""
-    keyword_result = _keyword_intent(user_text.lower(), INTENT_TAXONOMY)
+    keyword_result = _keyword_intent(user_text.lower(), get_intent_taxonomy())
 
     if not llm_fallback:
         return keyword_result
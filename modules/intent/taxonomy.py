@@ -3,8 +3,9 @@
 from __future__ import annotations
 
 import json
+import threading
 from pathlib import Path
-from typing import Iterable, List
+from typing import Any, Iterable, List, Optional
 
 from modules.intent.domain import IntentDefinition
 
@@ -26,17 +27,34 @@ def iter_keywords(
     definitions: Iterable[IntentDefinition] | None = None,
 ) -> Iterable[str]:
     """Iterate over all keywords from intent definitions."""
-    defs = definitions if definitions is not None else INTENT_TAXONOMY
+    defs = definitions if definitions is not None else get_intent_taxonomy()
     for definition in defs:
         yield from definition.keywords
 
 
-# Load taxonomy at module import time
-INTENT_TAXONOMY: List[IntentDefinition] = load_intent_taxonomy()
+_taxonomy: Optional[List[IntentDefinition]] = None
+_taxonomy_lock = threading.Lock()
+
+
+def get_intent_taxonomy() -> List[IntentDefinition]:
+    """Return the default taxonomy, parsing it on first use."""
+    global _taxonomy
+    if _taxonomy is None:
+        with _taxonomy_lock:
+            if _taxonomy is None:
+                _taxonomy = load_intent_taxonomy()
+    return _taxonomy
+
+
+def __getattr__(name: str) -> Any:
+    # ``INTENT_TAXONOMY`` is resolved lazily so importing this module stays cheap.
+    if name == "INTENT_TAXONOMY":
+        return get_intent_taxonomy()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = [
-    "INTENT_TAXONOMY",
+    "get_intent_taxonomy",
     "iter_keywords",
     "load_intent_taxonomy",
     "IntentDefinition",
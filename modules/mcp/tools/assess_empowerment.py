@@ -6,7 +6,7 @@ from typing import List
 
 from modules.empowerment.goal_alignment import assess
 from modules.memory.semantic import SemanticMemory
-from modules.commerce.search import search
+from modules.commerce.search import get_products
 
 
 def run(goals: List[str], product_ids: List[str]) -> dict:
@@ -15,11 +15,7 @@ def run(goals: List[str], product_ids: List[str]) -> dict:
     stored_goals = memory.get("goals")
     combined_goals = list(dict.fromkeys((stored_goals or []) + (goals or [])))
 
-    catalog = search("")
-    id_to_product = {product.id: product for product in catalog}
-    selected_products = [
-        id_to_product[_id] for _id in product_ids if _id in id_to_product
-    ]
+    selected_products = get_products(product_ids)
 
     assessment = assess(combined_goals or stored_goals or goals, selected_products)
     return {
@@ -3,14 +3,12 @@
 from __future__ import annotations
 
 from modules.commerce.compare import compare as compare_products
-from modules.commerce.search import search
+from modules.commerce.search import get_products
 
 
 def run(ids: list[str]) -> dict:
     """Compare selected products and return metadata alongside the table."""
-    catalog = search("")
-    id_to_product = {product.id: product for product in catalog}
-    selected = [id_to_product[_id] for _id in ids if _id in id_to_product]
+    selected = get_products(ids)
     comparison = compare_products(selected)
     return {
         "comparison": comparison,
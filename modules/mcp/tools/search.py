@@ -7,7 +7,7 @@ from modules.commerce import search as product_search
 
 def run(query: str) -> dict:
     """Run catalog search and return normalized payload."""
-    results = product_search.search(query)
+    results = product_search(query)
     payload = [
         {
             "id": product.id,
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import uuid
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
 from shared.db.connection import get_connection
 from modules.memory.repositories.base import from_json, to_json
@@ -98,6 +98,35 @@ def list_goals_for_session(session_id: str) -> List[Dict[str, Any]]:
     return [_row_to_dict(row) for row in rows]
 
 
+def get_goal_embeddings(goal_texts: Sequence[str]) -> Dict[str, List[float]]:
+    """Return the latest stored embedding for each goal text, in one query.
+
+    Goals recorded without an embedding are omitted.
+    """
+    texts = list(dict.fromkeys(goal_texts))
+    if not texts:
+        return {}
+    placeholders = ",".join("?" * len(texts))
+    rows = (
+        get_connection()
+        .execute(
+            f"""
+        SELECT goal_text, goal_embedding FROM goals
+        WHERE goal_embedding IS NOT NULL AND goal_text IN ({placeholders})
+        ORDER BY created_at ASC
+        """,
+            texts,
+        )
+        .fetchall()
+    )
+    embeddings: Dict[str, List[float]] = {}
+    for row in rows:
+        embedding = _decode_embedding(row["goal_embedding"])
+        if embedding:
+            embeddings[row["goal_text"]] = embedding
+    return embeddings
+
+
 def delete_goal(goal_id: str) -> None:
     """Delete a goal."""
     conn = get_connection()
@@ -119,6 +148,7 @@ __all__ = [
     "create_goal",
     "list_goals",
     "list_goals_for_session",
+    "get_goal_embeddings",
     "delete_goal",
     "get_goal",
 ]
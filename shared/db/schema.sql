@@ -79,5 +79,6 @@ CREATE TABLE IF NOT EXISTS semantic_memory (
 
 CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id);
 CREATE INDEX IF NOT EXISTS idx_goals_user ON goals(user_id);
+CREATE INDEX IF NOT EXISTS idx_goals_text ON goals(goal_text);
 CREATE INDEX IF NOT EXISTS idx_turns_session ON turns(session_id);
 CREATE INDEX IF NOT EXISTS idx_semantic_user_key ON semantic_memory(user_id, key);
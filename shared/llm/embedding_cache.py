@@ -0,0 +1,342 @@
+"""Embedding cache tiers used by the hybrid embedding provider.
+
+``SlabLRUCache`` is the in-process tier: a byte-budgeted LRU whose vectors
+live in preallocated float32 NumPy slabs instead of boxed Python floats.
+
+``PersistentEmbeddingCache`` sits underneath it. Vectors are stored as
+float32 blobs in a local SQLite file keyed on provider, model and a SHA-256
+of the input text. SQLite in WAL mode lets several uvicorn workers read and
+write the same file concurrently, and the cache survives process restarts
+so cold starts do not re-embed goals and product texts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement.
+_LOOKUP_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    dimension INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (provider, model, text_hash)
+);
+"""
+
+
+def text_hash(text: str) -> str:
+    """Return the stable hash used to key a text in the persistent cache."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def encode_vector(vector: Sequence[float] | np.ndarray) -> bytes:
+    """Serialize a vector as a little-endian float32 blob."""
+    return np.asarray(vector, dtype="<f4").tobytes()
+
+
+def decode_vector(blob: bytes) -> np.ndarray:
+    """Deserialize a float32 blob produced by :func:`encode_vector`."""
+    return np.frombuffer(blob, dtype="<f4")
+
+
+class _SlabStripe:
+    """One lock-protected LRU segment backed by a single float32 slab."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.slab: Optional[np.ndarray] = None
+        self.rows: "OrderedDict[str, int]" = OrderedDict()  # key -> row, LRU order
+        self.free: List[int] = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def allocate(self, dimension: int) -> None:
+        capacity = max(1, self.max_bytes // (dimension * 4))
+        self.slab = np.empty((capacity, dimension), dtype=np.float32)
+        self.rows.clear()
+        self.free = list(range(capacity - 1, -1, -1))
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self.slab is None else self.slab.shape[0]
+
+
+class SlabLRUCache:
+    """Byte-budgeted LRU of float32 vectors stored in preallocated slabs.
+
+    Keys are spread over ``stripes`` independent segments, each with its
+    own lock and slab, so FastAPI threadpool workers rarely contend. A slab
+    is allocated on the first insert, once the vector dimension is known;
+    inserting a vector of a different dimension (e.g. after a provider
+    fallback) resets that stripe.
+    """
+
+    def __init__(self, max_bytes: int, stripes: int = 8):
+        stripes = max(1, stripes)
+        self.max_bytes = max_bytes
+        self._stripes = [_SlabStripe(max_bytes // stripes) for _ in range(stripes)]
+
+    def _stripe(self, key: str) -> _SlabStripe:
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def get(self, key: str, copy: bool = True) -> Optional[np.ndarray]:
+        """Return the cached vector and mark it as recently used.
+
+        With ``copy=False`` a read-only view into the slab is returned. The
+        view is only valid until the entry is evicted, so callers that keep
+        the vector beyond the current request must copy it.
+        """
+        stripe = self._stripe(key)
+        with stripe.lock:
+            row = stripe.rows.get(key)
+            if row is None:
+                stripe.misses += 1
+                return None
+            stripe.rows.move_to_end(key)
+            stripe.hits += 1
+            vector = stripe.slab[row]
+            if copy:
+                return vector.copy()
+            view = vector.view()
+            view.flags.writeable = False
+            return view
+
+    def gather(
+        self, keys: Sequence[str], out: Optional[np.ndarray] = None
+    ) -> Tuple[Optional[np.ndarray], List[int]]:
+        """Copy the cached vectors for ``keys`` into the rows of ``out``.
+
+        Each row is copied once, straight from its slab under the stripe
+        lock. ``out`` is allocated on the first hit when not given. Returns
+        ``out`` and the positions of keys that are not cached (or whose
+        vector has another dimension), which are left unset.
+        """
+        missing: List[int] = []
+        for position, key in enumerate(keys):
+            stripe = self._stripe(key)
+            with stripe.lock:
+                row = stripe.rows.get(key)
+                if row is not None and (
+                    out is None or out.shape[1] == stripe.slab.shape[1]
+                ):
+                    if out is None:
+                        out = np.empty(
+                            (len(keys), stripe.slab.shape[1]), dtype=np.float32
+                        )
+                    stripe.rows.move_to_end(key)
+                    stripe.hits += 1
+                    out[position] = stripe.slab[row]
+                    continue
+                stripe.misses += 1
+            missing.append(position)
+        return out, missing
+
+    def put(self, key: str, vector: Sequence[float] | np.ndarray) -> None:
+        """Insert or refresh a vector, evicting the least recently used row."""
+        values = np.asarray(vector, dtype=np.float32).reshape(-1)
+        stripe = self._stripe(key)
+        with stripe.lock:
+            if stripe.slab is None or stripe.slab.shape[1] != values.shape[0]:
+                stripe.allocate(values.shape[0])
+            row = stripe.rows.get(key)
+            if row is not None:
+                stripe.rows.move_to_end(key)
+            else:
+                if stripe.free:
+                    row = stripe.free.pop()
+                else:
+                    _, row = stripe.rows.popitem(last=False)
+                    stripe.evictions += 1
+                stripe.rows[key] = row
+            stripe.slab[row] = values
+
+    def __contains__(self, key: str) -> bool:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            return key in stripe.rows
+
+    def __len__(self) -> int:
+        return sum(len(stripe.rows) for stripe in self._stripes)
+
+    def stats(self) -> Dict[str, int]:
+        """Return entry, capacity and hit/miss counters across stripes."""
+        totals = {
+            "entries": 0,
+            "capacity": 0,
+            "nbytes": 0,
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+        }
+        for stripe in self._stripes:
+            with stripe.lock:
+                totals["entries"] += len(stripe.rows)
+                totals["capacity"] += stripe.capacity
+                totals["nbytes"] += 0 if stripe.slab is None else stripe.slab.nbytes
+                totals["hits"] += stripe.hits
+                totals["misses"] += stripe.misses
+                totals["evictions"] += stripe.evictions
+        return totals
+
+    def clear(self) -> None:
+        """Drop every entry and release the slabs."""
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.slab = None
+                stripe.rows.clear()
+                stripe.free = []
+                stripe.hits = stripe.misses = stripe.evictions = 0
+
+
+class PersistentEmbeddingCache:
+    """SQLite-backed float32 embedding store with hit/miss accounting."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path).resolve()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _connect(self, create: bool) -> Optional[sqlite3.Connection]:
+        """Open the shared connection; skip creating the file for pure reads."""
+        if self._connection is not None:
+            return self._connection
+        if not create and not self.path.exists():
+            return None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.executescript(_SCHEMA)
+        conn.commit()
+        self._connection = conn
+        return conn
+
+    def get_many(
+        self, provider: str, model: str, texts: Sequence[str]
+    ) -> Dict[str, np.ndarray]:
+        """Return cached vectors for ``texts`` keyed by text."""
+        if not texts:
+            return {}
+        hashes = {text_hash(text): text for text in texts}
+        found: Dict[str, np.ndarray] = {}
+        try:
+            with self._lock:
+                conn = self._connect(create=False)
+                if conn is not None:
+                    keys = list(hashes)
+                    for start in range(0, len(keys), _LOOKUP_CHUNK):
+                        chunk = keys[start : start + _LOOKUP_CHUNK]
+                        placeholders = ",".join("?" * len(chunk))
+                        rows = conn.execute(
+                            f"""
+                            SELECT text_hash, vector FROM embeddings
+                            WHERE provider = ? AND model = ?
+                            AND text_hash IN ({placeholders})
+                            """,
+                            (provider, model, *chunk),
+                        ).fetchall()
+                        for digest, blob in rows:
+                            found[hashes[digest]] = decode_vector(blob)
+        except sqlite3.Error as exc:
+            logger.warning(f"Persistent embedding cache read failed: {exc}")
+
+        hit_count = sum(1 for text in texts if text in found)
+        with self._lock:
+            self.hits += hit_count
+            self.misses += len(texts) - hit_count
+        return found
+
+    def get(self, provider: str, model: str, text: str) -> Optional[np.ndarray]:
+        """Return the cached vector for a single text, if present."""
+        return self.get_many(provider, model, [text]).get(text)
+
+    def put_many(
+        self,
+        provider: str,
+        model: str,
+        items: Iterable[Tuple[str, Sequence[float] | np.ndarray]],
+    ) -> None:
+        """Store vectors; existing entries for the same key are replaced."""
+        rows: List[Tuple[str, str, str, int, bytes]] = []
+        for text, vector in items:
+            blob = encode_vector(vector)
+            rows.append((provider, model, text_hash(text), len(blob) // 4, blob))
+        if not rows:
+            return
+        try:
+            with self._lock:
+                conn = self._connect(create=True)
+                conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO embeddings
+                        (provider, model, text_hash, dimension, vector)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    rows,
+                )
+                conn.commit()
+                self.writes += len(rows)
+        except sqlite3.Error as exc:
+            logger.warning(f"Persistent embedding cache write failed: {exc}")
+
+    def put(
+        self, provider: str, model: str, text: str, vector: Sequence[float]
+    ) -> None:
+        """Store a single vector."""
+        self.put_many(provider, model, [(text, vector)])
+
+    def stats(self) -> Dict[str, int | str]:
+        """Return hit/miss counters for this process."""
+        with self._lock:
+            return {
+                "path": str(self.path),
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+            }
+
+    def clear(self) -> None:
+        """Delete every cached vector and reset counters."""
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is not None:
+                conn.execute("DELETE FROM embeddings")
+                conn.commit()
+            self.hits = self.misses = self.writes = 0
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+__all__ = [
+    "PersistentEmbeddingCache",
+    "SlabLRUCache",
+    "decode_vector",
+    "encode_vector",
+    "text_hash",
+]
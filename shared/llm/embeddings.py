@@ -6,16 +6,24 @@ Uses Gemini text-embedding-004 as primary, sentence-transformers as fallback.
 
 from __future__ import annotations
 
+import asyncio
+import atexit
 import hashlib
 import logging
 import os
+import threading
+import time
+import weakref
 from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 from dotenv import load_dotenv
 
+from shared.llm.embedding_cache import PersistentEmbeddingCache, SlabLRUCache
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -32,24 +40,230 @@ class EmbeddingConfig:
     # Gemini settings
     gemini_model: str = "text-embedding-004"
     gemini_api_key: Optional[str] = field(
-        default_factory=lambda: os.getenv("GEMINI_API_KEY")
-        or os.getenv("GOOGLE_API_KEY")
+        default_factory=lambda: (
+            os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+        )
     )
     gemini_task_type: str = "SEMANTIC_SIMILARITY"
 
     # Local model settings
     local_model: str = "all-MiniLM-L6-v2"
 
-    # Cache settings
-    cache_size: int = 1000
+    # Cache settings (in-memory tier is bounded by bytes, not entries)
+    cache_max_bytes: int = field(
+        default_factory=lambda: int(
+            os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+        )
+    )
+    cache_stripes: int = 8
+
+    # Request coalescing for single-text embed() calls. Off by default: the
+    # first caller waits out the window, which only pays off under load.
+    coalesce_window_ms: float = field(
+        default_factory=lambda: float(os.getenv("EMBEDDING_COALESCE_WINDOW_MS", "0"))
+    )
+    coalesce_max_batch: int = field(
+        default_factory=lambda: int(os.getenv("EMBEDDING_COALESCE_MAX_BATCH", "64"))
+    )
+
+    # Large batches are split into provider-sized chunks embedded in parallel
+    batch_chunk_size: int = field(
+        default_factory=lambda: int(os.getenv("EMBEDDING_BATCH_CHUNK_SIZE", "100"))
+    )
+    batch_workers: int = field(
+        default_factory=lambda: int(os.getenv("EMBEDDING_BATCH_WORKERS", "4"))
+    )
+    batch_max_retries: int = 2
+    batch_retry_backoff: float = 0.5  # seconds, doubled per attempt
+    local_processes: int = field(
+        default_factory=lambda: int(os.getenv("EMBEDDING_LOCAL_PROCESSES", "0"))
+    )
+
+    # Async API: maximum provider requests in flight per event loop
+    async_max_concurrency: int = field(
+        default_factory=lambda: int(os.getenv("EMBEDDING_ASYNC_MAX_CONCURRENCY", "8"))
+    )
+    persistent_cache: bool = field(
+        default_factory=lambda: (
+            os.getenv("EMBEDDING_PERSISTENT_CACHE", "true").lower() == "true"
+        )
+    )
+    persistent_cache_path: str = field(
+        default_factory=lambda: os.getenv(
+            "EMBEDDING_CACHE_PATH", "./tmp/embedding_cache.db"
+        )
+    )
 
     # Behavior
     prefer_local: bool = field(
-        default_factory=lambda: os.getenv("EMBEDDING_PREFER_LOCAL", "false").lower()
-        == "true"
+        default_factory=lambda: (
+            os.getenv("EMBEDDING_PREFER_LOCAL", "false").lower() == "true"
+        )
     )
 
 
+# -----------------------------------------------------------------------------
+# Executor for async wrappers
+# -----------------------------------------------------------------------------
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the dedicated thread pool used to run blocking embedding work."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("EMBEDDING_EXECUTOR_WORKERS", "8")),
+                    thread_name_prefix="embeddings",
+                )
+    return _executor
+
+
+async def _run_in_executor(func: Callable, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), func, *args)
+
+
+# -----------------------------------------------------------------------------
+# Chunked batch execution
+# -----------------------------------------------------------------------------
+
+
+class EmbeddingBatchError(RuntimeError):
+    """Raised when some chunks of a large batch still fail after retries.
+
+    ``partial`` mirrors the input order with ``None`` at failed positions, so
+    callers can keep the successful vectors and resubmit ``failed_texts``.
+    """
+
+    def __init__(
+        self,
+        texts: List[str],
+        partial: List[Optional[List[float]]],
+        errors: Dict[int, BaseException],
+    ):
+        self.texts = texts
+        self.partial = partial
+        self.errors = errors  # chunk start offset -> last exception
+        self.failed_indices = [i for i, vector in enumerate(partial) if vector is None]
+        first_error = next(iter(errors.values()))
+        super().__init__(
+            f"{len(self.failed_indices)} of {len(texts)} texts failed to embed "
+            f"in {len(errors)} chunk(s): {first_error}"
+        )
+
+    @property
+    def failed_texts(self) -> List[str]:
+        return [self.texts[i] for i in self.failed_indices]
+
+
+def _embed_in_chunks(
+    texts: List[str],
+    embed_chunk: Callable[[List[str]], List[List[float]]],
+    config: EmbeddingConfig,
+    workers: Optional[int] = None,
+) -> List[List[float]]:
+    """Split ``texts`` into provider-sized chunks and embed them in parallel.
+
+    Results keep input order. Small inputs take a single direct call so the
+    common path behaves exactly like an unchunked request. Each chunk is
+    retried with exponential backoff; chunks that still fail raise an
+    :class:`EmbeddingBatchError` carrying every successful vector.
+    """
+    chunk_size = max(1, config.batch_chunk_size)
+    if len(texts) <= chunk_size:
+        return embed_chunk(texts)
+
+    starts = list(range(0, len(texts), chunk_size))
+
+    def run(start: int) -> List[List[float]]:
+        chunk = texts[start : start + chunk_size]
+        for attempt in range(config.batch_max_retries + 1):
+            try:
+                return embed_chunk(chunk)
+            except Exception as exc:
+                if attempt == config.batch_max_retries:
+                    raise
+                logger.warning(f"Embedding chunk at {start} failed ({exc}); retrying")
+                time.sleep(config.batch_retry_backoff * (2**attempt))
+        raise AssertionError("unreachable")
+
+    results: List[Optional[List[float]]] = [None] * len(texts)
+    errors: Dict[int, BaseException] = {}
+    max_workers = max(1, min(workers or config.batch_workers, len(starts)))
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="embed-chunk"
+    ) as pool:
+        futures = {start: pool.submit(run, start) for start in starts}
+        for start, future in futures.items():
+            try:
+                vectors = future.result()
+            except Exception as exc:
+                errors[start] = exc
+                continue
+            results[start : start + len(vectors)] = vectors
+
+    if errors:
+        raise EmbeddingBatchError(texts, results, errors)
+    return results  # type: ignore
+
+
+async def _aembed_in_chunks(
+    texts: List[str],
+    aembed_chunk: Callable[[List[str]], Awaitable[List[List[float]]]],
+    config: EmbeddingConfig,
+    workers: Optional[int] = None,
+) -> List[List[float]]:
+    """Async counterpart of :func:`_embed_in_chunks`.
+
+    Chunks run concurrently (at most ``batch_workers`` at once) with the
+    same retry/backoff policy, and failures raise an
+    :class:`EmbeddingBatchError` carrying every successful vector.
+    """
+    chunk_size = max(1, config.batch_chunk_size)
+    if len(texts) <= chunk_size:
+        return await aembed_chunk(texts)
+
+    starts = list(range(0, len(texts), chunk_size))
+    limit = asyncio.Semaphore(max(1, min(workers or config.batch_workers, len(starts))))
+
+    async def run(start: int) -> List[List[float]]:
+        chunk = texts[start : start + chunk_size]
+        async with limit:
+            for attempt in range(config.batch_max_retries + 1):
+                try:
+                    return await aembed_chunk(chunk)
+                except Exception as exc:
+                    if attempt == config.batch_max_retries:
+                        raise
+                    logger.warning(
+                        f"Embedding chunk at {start} failed ({exc}); retrying"
+                    )
+                    await asyncio.sleep(config.batch_retry_backoff * (2**attempt))
+        raise AssertionError("unreachable")
+
+    outcomes = await asyncio.gather(
+        *(run(start) for start in starts), return_exceptions=True
+    )
+    results: List[Optional[List[float]]] = [None] * len(texts)
+    errors: Dict[int, BaseException] = {}
+    for start, outcome in zip(starts, outcomes):
+        if isinstance(outcome, BaseException):
+            if not isinstance(outcome, Exception):
+                raise outcome  # cancellation and the like
+            errors[start] = outcome
+            continue
+        results[start : start + len(outcome)] = outcome
+
+    if errors:
+        raise EmbeddingBatchError(texts, results, errors)
+    return results  # type: ignore
+
+
 # -----------------------------------------------------------------------------
 # Abstract Base
 # -----------------------------------------------------------------------------
@@ -68,6 +282,14 @@ class EmbeddingProvider(ABC):
         """Generate embeddings for multiple texts."""
         ...
 
+    async def aembed(self, text: str) -> List[float]:
+        """Async embed; defaults to running :meth:`embed` on the executor."""
+        return await _run_in_executor(self.embed, text)
+
+    async def aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Async batch embed; defaults to running :meth:`embed_batch` on the executor."""
+        return await _run_in_executor(self.embed_batch, texts)
+
     @property
     @abstractmethod
     def dimension(self) -> int:
@@ -80,6 +302,12 @@ class EmbeddingProvider(ABC):
         """Return provider name."""
         ...
 
+    @property
+    @abstractmethod
+    def model(self) -> str:
+        """Return the model identifier used to key persistent caches."""
+        ...
+
 
 # -----------------------------------------------------------------------------
 # Gemini Provider
@@ -117,17 +345,42 @@ class GeminiEmbeddingProvider(EmbeddingProvider):
         )
         return list(response.embeddings[0].values)
 
+    def _embed_chunk(self, texts: List[str]) -> List[List[float]]:
+        # Gemini supports batch embedding
+        response = self._client.models.embed_content(
+            model=self.config.gemini_model,
+            contents=texts,
+            config={"task_type": self.config.gemini_task_type},
+        )
+        return [list(emb.values) for emb in response.embeddings]
+
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
         self._ensure_initialized()
+        # Requests are capped per call, so large inputs fan out over a thread pool
+        return _embed_in_chunks(texts, self._embed_chunk, self.config)
 
-        # Gemini supports batch embedding
-        response = self._client.models.embed_content(
+    async def aembed(self, text: str) -> List[float]:
+        self._ensure_initialized()
+
+        response = await self._client.aio.models.embed_content(
+            model=self.config.gemini_model,
+            contents=text,
+            config={"task_type": self.config.gemini_task_type},
+        )
+        return list(response.embeddings[0].values)
+
+    async def _aembed_chunk(self, texts: List[str]) -> List[List[float]]:
+        response = await self._client.aio.models.embed_content(
             model=self.config.gemini_model,
             contents=texts,
             config={"task_type": self.config.gemini_task_type},
         )
         return [list(emb.values) for emb in response.embeddings]
 
+    async def aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        self._ensure_initialized()
+        return await _aembed_in_chunks(texts, self._aembed_chunk, self.config)
+
     @property
     def dimension(self) -> int:
         return 768  # text-embedding-004 dimension
@@ -136,6 +389,10 @@ class GeminiEmbeddingProvider(EmbeddingProvider):
     def name(self) -> str:
         return "gemini"
 
+    @property
+    def model(self) -> str:
+        return self.config.gemini_model
+
 
 # -----------------------------------------------------------------------------
 # Local Provider (Sentence Transformers)
@@ -149,6 +406,7 @@ class LocalEmbeddingProvider(EmbeddingProvider):
         self.config = config
         self._model = None
         self._initialized = False
+        self._process_pool = None
 
     def _ensure_initialized(self) -> None:
         if self._initialized:
@@ -175,9 +433,32 @@ class LocalEmbeddingProvider(EmbeddingProvider):
 
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
         self._ensure_initialized()
-        embeddings = self._model.encode(texts, convert_to_numpy=True)
+        chunk_size = max(1, self.config.batch_chunk_size)
+        if self.config.local_processes > 1 and len(texts) > chunk_size:
+            # Spread chunks over worker processes; results come back in order
+            embeddings = self._model.encode_multi_process(
+                texts, self._get_process_pool(), chunk_size=chunk_size
+            )
+            return embeddings.tolist()
+        embeddings = self._model.encode(
+            texts, batch_size=chunk_size, convert_to_numpy=True
+        )
         return embeddings.tolist()
 
+    def _get_process_pool(self):
+        if self._process_pool is None:
+            self._process_pool = self._model.start_multi_process_pool(
+                target_devices=["cpu"] * self.config.local_processes
+            )
+            atexit.register(self.close)
+        return self._process_pool
+
+    def close(self) -> None:
+        """Stop the multi-process encoding pool, if one was started."""
+        if self._process_pool is not None:
+            self._model.stop_multi_process_pool(self._process_pool)
+            self._process_pool = None
+
     @property
     def dimension(self) -> int:
         return 384  # all-MiniLM-L6-v2 dimension
@@ -186,6 +467,99 @@ class LocalEmbeddingProvider(EmbeddingProvider):
     def name(self) -> str:
         return "local"
 
+    @property
+    def model(self) -> str:
+        return self.config.local_model
+
+
+# -----------------------------------------------------------------------------
+# Request Coalescing
+# -----------------------------------------------------------------------------
+
+
+class EmbeddingCoalescer:
+    """Micro-batches single-text embed calls arriving from many threads.
+
+    The first caller to find no batch in flight becomes the leader: it waits
+    up to ``window_ms`` (or until ``max_batch`` distinct texts are queued),
+    then sends the deduplicated texts through ``embed_batch_fn`` in one call
+    and resolves every waiting caller's future. Followers simply block on
+    their future, so no background thread is needed. The wait adds up to
+    ``window_ms`` to a lone call, so coalescing is opt-in
+    (``EMBEDDING_COALESCE_WINDOW_MS``).
+    """
+
+    def __init__(
+        self,
+        embed_batch_fn: Callable[[List[str]], List[np.ndarray]],
+        window_ms: float = 5.0,
+        max_batch: int = 64,
+    ):
+        self._embed_batch = embed_batch_fn
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._cond = threading.Condition()
+        self._pending: Dict[str, Future] = {}
+        self._leader_active = False
+        self.requests = 0
+        self.deduplicated = 0
+        self.batches = 0
+
+    def submit(self, text: str) -> Future:
+        """Queue a text and return a future resolving to its vector."""
+        with self._cond:
+            self.requests += 1
+            future = self._pending.get(text)
+            if future is not None:
+                self.deduplicated += 1
+                return future
+            future = Future()
+            self._pending[text] = future
+            lead = not self._leader_active
+            self._leader_active = True
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+        if lead:
+            self._flush_after_window()
+        return future
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed a single text, sharing the provider call with concurrent callers."""
+        return self.submit(text).result()
+
+    def _flush_after_window(self) -> None:
+        deadline = time.monotonic() + self.window
+        with self._cond:
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._pending = self._pending, {}
+            self._leader_active = False
+            self.batches += 1
+
+        texts = list(batch)
+        try:
+            vectors = self._embed_batch(texts)
+        except BaseException as exc:
+            # Fail every waiter, then let the leader's own call raise too
+            # (KeyboardInterrupt and SystemExit included).
+            for future in batch.values():
+                future.set_exception(exc)
+            raise
+        for text, vector in zip(texts, vectors):
+            batch[text].set_result(vector)
+
+    def stats(self) -> Dict[str, int]:
+        """Return request, deduplication and provider batch counters."""
+        with self._cond:
+            return {
+                "requests": self.requests,
+                "deduplicated": self.deduplicated,
+                "batches": self.batches,
+            }
+
 
 # -----------------------------------------------------------------------------
 # Hybrid Provider with Caching
@@ -193,20 +567,43 @@ class LocalEmbeddingProvider(EmbeddingProvider):
 
 
 class HybridEmbeddingProvider:
-    """Hybrid provider with Gemini primary + local fallback and caching."""
+    """Hybrid provider with Gemini primary + local fallback and caching.
+
+    Lookups go through two tiers: an in-process slab LRU holding float32
+    vectors, then a persistent SQLite cache shared by every worker on the
+    host. Only texts missing from both tiers reach the embedding provider.
+    """
 
     def __init__(self, config: Optional[EmbeddingConfig] = None):
         self.config = config or EmbeddingConfig()
         self._gemini: Optional[GeminiEmbeddingProvider] = None
         self._local: Optional[LocalEmbeddingProvider] = None
-        self._cache: Dict[
-            str, Tuple[List[float], str]
-        ] = {}  # hash -> (embedding, provider)
+        self._cache = SlabLRUCache(
+            self.config.cache_max_bytes, stripes=self.config.cache_stripes
+        )
         self._active_provider: Optional[EmbeddingProvider] = None
+        self._persistent: Optional[PersistentEmbeddingCache] = (
+            PersistentEmbeddingCache(self.config.persistent_cache_path)
+            if self.config.persistent_cache
+            else None
+        )
+        self._coalescer: Optional[EmbeddingCoalescer] = (
+            EmbeddingCoalescer(
+                lambda texts: self._embed_vectors(texts, check_memory=False),
+                window_ms=self.config.coalesce_window_ms,
+                max_batch=self.config.coalesce_max_batch,
+            )
+            if self.config.coalesce_window_ms > 0
+            else None
+        )
+        # event loop -> semaphore bounding in-flight async provider calls
+        self._async_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
 
-    def _get_cache_key(self, text: str) -> str:
-        """Generate cache key for text."""
-        return hashlib.md5(text.encode()).hexdigest()
+    def _get_cache_key(self, provider: EmbeddingProvider, text: str) -> str:
+        """Generate cache key for text under the given provider/model."""
+        return hashlib.md5(
+            f"{provider.name}:{provider.model}:{text}".encode()
+        ).hexdigest()
 
     def _get_gemini(self) -> GeminiEmbeddingProvider:
         if self._gemini is None:
@@ -252,55 +649,199 @@ class HybridEmbeddingProvider:
         except Exception as e:
             raise RuntimeError(f"No embedding provider available: {e}")
 
-    def embed(self, text: str) -> List[float]:
-        """Generate embedding with caching."""
-        cache_key = self._get_cache_key(text)
-
-        if cache_key in self._cache:
-            return self._cache[cache_key][0]
-
+    def _load_persistent(
+        self, provider: EmbeddingProvider, texts: List[str]
+    ) -> Dict[str, np.ndarray]:
+        """Fetch texts from the persistent tier for the active provider/model."""
+        if self._persistent is None or not texts:
+            return {}
+        return self._persistent.get_many(provider.name, provider.model, texts)
+
+    def _store_persistent(
+        self, provider: EmbeddingProvider, items: List[Tuple[str, np.ndarray]]
+    ) -> None:
+        if self._persistent is not None and items:
+            self._persistent.put_many(provider.name, provider.model, items)
+
+    def _split_cached(
+        self, provider: EmbeddingProvider, texts: List[str], check_memory: bool
+    ) -> Tuple[List[Optional[np.ndarray]], Dict[str, List[int]]]:
+        """Fill vectors from the memory tier; return what is still pending."""
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        pending: Dict[str, List[int]] = {}  # text -> positions, deduplicated
+        for i, text in enumerate(texts):
+            cached = (
+                self._cache.get(self._get_cache_key(provider, text))
+                if check_memory
+                else None
+            )
+            if cached is None:
+                pending.setdefault(text, []).append(i)
+            else:
+                vectors[i] = cached
+        return vectors, pending
+
+    def _fill_pending(
+        self,
+        provider: EmbeddingProvider,
+        vectors: List[Optional[np.ndarray]],
+        pending: Dict[str, List[int]],
+        resolved: Dict[str, np.ndarray],
+    ) -> List[np.ndarray]:
+        """Write resolved vectors into the memory tier and result slots."""
+        for text, positions in pending.items():
+            vector = resolved[text]
+            self._cache.put(self._get_cache_key(provider, text), vector)
+            for i in positions:
+                vectors[i] = vector
+        return vectors  # type: ignore
+
+    def _keep_partial(
+        self, provider: EmbeddingProvider, error: EmbeddingBatchError
+    ) -> None:
+        done = [
+            (text, vector)
+            for text, vector in zip(error.texts, error.partial)
+            if vector is not None
+        ]
+        fresh = self._as_arrays(
+            [text for text, _ in done], [vector for _, vector in done]
+        )
+        self._store_persistent(provider, list(fresh.items()))
+        for text, vector in fresh.items():
+            self._cache.put(self._get_cache_key(provider, text), vector)
+
+    @staticmethod
+    def _as_arrays(
+        texts: List[str], embedded: List[List[float]]
+    ) -> Dict[str, np.ndarray]:
+        return {
+            text: np.asarray(embedding, dtype=np.float32)
+            for text, embedding in zip(texts, embedded)
+        }
+
+    def _embed_vectors(
+        self, texts: List[str], check_memory: bool = True
+    ) -> List[np.ndarray]:
+        """Resolve texts to float32 vectors through both cache tiers."""
         provider = self._select_provider()
-        embedding = provider.embed(text)
+        vectors, pending = self._split_cached(provider, texts, check_memory)
+        if not pending:
+            return vectors  # type: ignore
+
+        # Then the persistent tier, then the provider for what is left
+        resolved = self._load_persistent(provider, list(pending))
+        missing = [text for text in pending if text not in resolved]
+        if missing:
+            if len(missing) == 1:
+                embedded = [provider.embed(missing[0])]
+            else:
+                try:
+                    embedded = provider.embed_batch(missing)
+                except EmbeddingBatchError as exc:
+                    # Keep finished chunks so a retry only re-embeds failures
+                    self._keep_partial(provider, exc)
+                    raise
+            fresh = self._as_arrays(missing, embedded)
+            self._store_persistent(provider, list(fresh.items()))
+            resolved.update(fresh)
+        return self._fill_pending(provider, vectors, pending, resolved)
+
+    async def _aembed_vectors(self, texts: List[str]) -> List[np.ndarray]:
+        """Async counterpart of :meth:`_embed_vectors`.
+
+        SQLite lookups run on the embedding executor and provider calls are
+        bounded by the per-loop semaphore so a burst of requests cannot
+        exhaust the provider's rate limit.
+        """
+        if self._active_provider is None:
+            provider = await _run_in_executor(self._select_provider)
+        else:
+            provider = self._active_provider
+        vectors, pending = self._split_cached(provider, texts, check_memory=True)
+        if not pending:
+            return vectors  # type: ignore
+
+        resolved = await _run_in_executor(
+            self._load_persistent, provider, list(pending)
+        )
+        missing = [text for text in pending if text not in resolved]
+        if missing:
+            async with self._async_limit():
+                if len(missing) == 1:
+                    embedded = [await provider.aembed(missing[0])]
+                else:
+                    try:
+                        embedded = await provider.aembed_batch(missing)
+                    except EmbeddingBatchError as exc:
+                        # Keep finished chunks so a retry only re-embeds failures
+                        await _run_in_executor(self._keep_partial, provider, exc)
+                        raise
+            fresh = self._as_arrays(missing, embedded)
+            await _run_in_executor(
+                self._store_persistent, provider, list(fresh.items())
+            )
+            resolved.update(fresh)
+        return self._fill_pending(provider, vectors, pending, resolved)
+
+    def _async_limit(self) -> asyncio.Semaphore:
+        """Return the in-flight request semaphore for the running loop."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._async_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.config.async_max_concurrency)
+            self._async_semaphores[loop] = semaphore
+        return semaphore
 
-        # Cache with size limit
-        if len(self._cache) >= self.config.cache_size:
-            # Remove oldest entry (simple FIFO)
-            oldest_key = next(iter(self._cache))
-            del self._cache[oldest_key]
+    def embed(self, text: str) -> List[float]:
+        """Generate embedding with caching.
 
-        self._cache[cache_key] = (embedding, provider.name)
-        return embedding
+        Cache misses are routed through the coalescer so concurrent callers
+        share one provider batch call.
+        """
+        if self._coalescer is None:
+            return self._embed_vectors([text])[0].tolist()
+        provider = self._select_provider()
+        cached = self._cache.get(self._get_cache_key(provider, text))
+        if cached is not None:
+            return cached.tolist()
+        return self._coalescer.embed(text).tolist()
 
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings for batch, using cache where possible."""
-        results: List[Optional[List[float]]] = [None] * len(texts)
-        texts_to_embed: List[Tuple[int, str]] = []
-
-        # Check cache first
-        for i, text in enumerate(texts):
-            cache_key = self._get_cache_key(text)
-            if cache_key in self._cache:
-                results[i] = self._cache[cache_key][0]
-            else:
-                texts_to_embed.append((i, text))
-
-        # Embed uncached texts
-        if texts_to_embed:
-            provider = self._select_provider()
-            uncached_texts = [text for _, text in texts_to_embed]
-            new_embeddings = provider.embed_batch(uncached_texts)
-
-            for (orig_idx, text), embedding in zip(texts_to_embed, new_embeddings):
-                results[orig_idx] = embedding
-                cache_key = self._get_cache_key(text)
-
-                if len(self._cache) >= self.config.cache_size:
-                    oldest_key = next(iter(self._cache))
-                    del self._cache[oldest_key]
-
-                self._cache[cache_key] = (embedding, provider.name)
-
-        return results  # type: ignore
+        return [vector.tolist() for vector in self._embed_vectors(texts)]
+
+    async def aembed(self, text: str) -> List[float]:
+        """Async variant of :meth:`embed`."""
+        vectors = await self._aembed_vectors([text])
+        return vectors[0].tolist()
+
+    async def aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of :meth:`embed_batch`."""
+        vectors = await self._aembed_vectors(texts)
+        return [vector.tolist() for vector in vectors]
+
+    def embed_batch_array(self, texts: List[str]) -> np.ndarray:
+        """Like :meth:`embed_batch` but returns one ``(n, dim)`` float32 matrix.
+
+        Cached rows are copied once, straight from the cache slabs into the
+        result, so no intermediate arrays or Python float objects are created
+        on the hot path; only cache misses go through :meth:`_embed_vectors`.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        provider = self._select_provider()
+        keys = [self._get_cache_key(provider, text) for text in texts]
+        matrix, missing = self._cache.gather(keys)
+        if missing:
+            fresh = self._embed_vectors(
+                [texts[position] for position in missing], check_memory=False
+            )
+            if matrix is None:
+                matrix = np.empty((len(texts), fresh[0].shape[0]), dtype=np.float32)
+            for position, vector in zip(missing, fresh):
+                matrix[position] = vector
+        return matrix
 
     @property
     def dimension(self) -> int:
@@ -312,9 +853,25 @@ class HybridEmbeddingProvider:
         """Return name of active provider."""
         return self._select_provider().name
 
-    def clear_cache(self) -> None:
-        """Clear embedding cache."""
+    @property
+    def model_name(self) -> str:
+        """Return model identifier of active provider."""
+        return self._select_provider().model
+
+    def cache_stats(self) -> Dict[str, Dict[str, int | str]]:
+        """Return hit/miss counters for the in-memory and persistent tiers."""
+        stats: Dict[str, Dict[str, int | str]] = {"memory": self._cache.stats()}
+        if self._persistent is not None:
+            stats["persistent"] = self._persistent.stats()
+        if self._coalescer is not None:
+            stats["coalescer"] = self._coalescer.stats()
+        return stats
+
+    def clear_cache(self, persistent: bool = False) -> None:
+        """Clear embedding cache (the persistent tier only when asked)."""
         self._cache.clear()
+        if persistent and self._persistent is not None:
+            self._persistent.clear()
 
 
 # -----------------------------------------------------------------------------
@@ -355,6 +912,22 @@ def batch_cosine_similarity(
     return similarities.tolist()
 
 
+def cosine_similarity_matrix(
+    a: List[List[float]] | np.ndarray, b: List[List[float]] | np.ndarray
+) -> np.ndarray:
+    """Compute the ``(len(a), len(b))`` cosine similarity matrix in one GEMM.
+
+    Zero vectors get a similarity of 0 with everything.
+    """
+    a_arr = np.asarray(a, dtype=np.float32)
+    b_arr = np.asarray(b, dtype=np.float32)
+    if a_arr.size == 0 or b_arr.size == 0:
+        return np.zeros((len(a_arr), len(b_arr)), dtype=np.float32)
+    a_arr = a_arr / np.maximum(np.linalg.norm(a_arr, axis=1, keepdims=True), 1e-10)
+    b_arr = b_arr / np.maximum(np.linalg.norm(b_arr, axis=1, keepdims=True), 1e-10)
+    return a_arr @ b_arr.T
+
+
 # -----------------------------------------------------------------------------
 # Singleton Access
 # -----------------------------------------------------------------------------
@@ -380,6 +953,16 @@ def embed_batch(texts: List[str]) -> List[List[float]]:
     return get_embedding_provider().embed_batch(texts)
 
 
+async def aembed(text: str) -> List[float]:
+    """Async embedding for text using default provider."""
+    return await get_embedding_provider().aembed(text)
+
+
+async def aembed_batch(texts: List[str]) -> List[List[float]]:
+    """Async embeddings for texts using default provider."""
+    return await get_embedding_provider().aembed_batch(texts)
+
+
 def similarity(text_a: str, text_b: str) -> float:
     """Compute semantic similarity between two texts."""
     provider = get_embedding_provider()
@@ -394,10 +977,15 @@ __all__ = [
     "GeminiEmbeddingProvider",
     "LocalEmbeddingProvider",
     "HybridEmbeddingProvider",
+    "EmbeddingBatchError",
+    "EmbeddingCoalescer",
     "cosine_similarity",
     "batch_cosine_similarity",
+    "cosine_similarity_matrix",
     "get_embedding_provider",
     "embed",
     "embed_batch",
+    "aembed",
+    "aembed_batch",
     "similarity",
 ]
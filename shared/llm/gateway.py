@@ -6,6 +6,8 @@ from typing import Any, List
 
 from shared.llm.clients import LLMClient, get_llm_client as _get_llm_client
 from shared.llm.embeddings import (
+    aembed as _aembed,
+    aembed_batch as _aembed_batch,
     embed as _embed,
     embed_batch as _embed_batch,
     similarity as _similarity,
@@ -68,6 +70,16 @@ def embed_batch(texts: List[str]) -> List[List[float]]:
     return _embed_batch(texts)
 
 
+async def aembed(text: str) -> List[float]:
+    """Async embedding that does not block a worker thread on the provider call."""
+    return await _aembed(text)
+
+
+async def aembed_batch(texts: List[str]) -> List[List[float]]:
+    """Async embeddings for multiple texts with bounded provider concurrency."""
+    return await _aembed_batch(texts)
+
+
 def semantic_similarity(text_a: str, text_b: str) -> float:
     """Compute semantic similarity between two texts (0.0 to 1.0)."""
     return _similarity(text_a, text_b)
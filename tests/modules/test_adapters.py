@@ -1,4 +1,14 @@
-from modules.commerce.adapters.loader import load_catalog
+import time
+
+import pytest
+
+from modules.commerce.adapters import loader as loader_module
+from modules.commerce.adapters.loader import (
+    load_catalog,
+    load_federated,
+    register_source,
+)
+from modules.commerce.domain import Product
 from modules.commerce.adapters.google_shopping.mock_feed import (
     load_catalog as load_google_catalog,
 )
@@ -18,3 +28,46 @@ def test_catalog_loader_env_switch(monkeypatch):
         assert products and products[0].source == "google_shopping"
     finally:
         monkeypatch.delenv("CATALOG_SOURCE", raising=False)
+
+
+def test_federated_loader_merges_sources_concurrently_and_tolerates_failures(
+    monkeypatch,
+):
+    # Keep the test sources out of the process-wide registry.
+    monkeypatch.setattr(loader_module, "_SOURCE_MAP", dict(loader_module._SOURCE_MAP))
+
+    def slow_source():
+        time.sleep(0.2)
+        return [Product(id="slow-1", name="Slow", price=1.0, tags=[])]
+
+    def broken_source():
+        raise RuntimeError("feed unavailable")
+
+    def hanging_source():
+        time.sleep(2)
+        return []
+
+    register_source("test_slow", slow_source)
+    register_source("test_slow_copy", slow_source)
+    register_source("test_broken", broken_source)
+    register_source("test_hanging", hanging_source)
+
+    started = time.perf_counter()
+    catalog = load_federated(
+        ["mock", "test_slow", "test_slow_copy", "test_broken", "test_hanging"],
+        timeout=0.5,
+    )
+    assert time.perf_counter() - started < 1.0  # concurrent, hung source abandoned
+
+    reports = {report.source: report for report in catalog.sources}
+    assert reports["test_broken"].error == "feed unavailable"
+    assert "timed out" in reports["test_hanging"].error
+    assert reports["test_slow"].products == 1 and catalog.duplicates == 1
+    assert catalog.products[-1].metadata["catalog_source"] == "test_slow"
+    assert catalog.products[0].metadata["catalog_source"] == "mock"
+
+    with pytest.raises(RuntimeError):
+        load_federated(["test_broken"])
+
+    # A comma-separated source list goes through the federated loader.
+    assert load_catalog("mock, test_slow")[-1].id == "slow-1"
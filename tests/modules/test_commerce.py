@@ -1,4 +1,42 @@
+import importlib
+import subprocess
+import sys
+import threading
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from modules.commerce import get_product, get_products
 from modules.commerce import search as search_products, related_by_tag
+from modules.commerce.ann import (
+    ANNConfig,
+    IVFFlatIndex,
+    scored_semantic_search,
+    semantic_search,
+)
+from modules.commerce.bm25 import BM25Index
+from modules.commerce.retrieval import (
+    HybridRetriever,
+    RetrievalConfig,
+    reciprocal_rank_fusion,
+)
+from modules.commerce.domain import Product
+from modules.commerce import catalog as catalog_module
+from modules.commerce.catalog import CatalogManager
+from modules.commerce.catalog_store import CatalogStore
+from modules.commerce.columnar import CatalogColumns, columns_for
+from modules.commerce.plan_builder import PlanBuilder
+from modules.commerce.facets import FacetIndex, facet_counts
+from modules.commerce.fuzzy import TrigramIndex, bounded_edit_distance
+from modules.commerce.embedding_index import (
+    CatalogEmbeddingIndex,
+    product_semantic_text,
+)
+
+# The package re-exports ``search`` the function under the module's name.
+search_module = importlib.import_module("modules.commerce.search")
 
 
 def test_search_matches_description():
@@ -10,3 +48,687 @@ def test_related_by_tag_returns_group():
     related = related_by_tag("workspace")
     ids = {product.id for product in related}
     assert {"desk-01", "chair-05"}.issubset(ids)
+
+
+def test_get_products_resolves_ids_in_order():
+    products = get_products(["lamp-02", "missing", "desk-01"])
+    assert [product.id for product in products] == ["lamp-02", "desk-01"]
+    assert get_product("chair-05").name == "Lumbar Chair"
+    assert get_product("missing") is None
+
+
+def test_search_ranks_by_field_boosted_bm25():
+    products = [
+        Product(
+            id="described",
+            name="Desk Lamp",
+            price=40.0,
+            tags=["lighting"],
+            description="Helps you focus in the evening",
+            capabilities_enabled=["Lighting"],
+        ),
+        Product(
+            id="capable",
+            name="Timer",
+            price=20.0,
+            tags=["productivity"],
+            capabilities_enabled=["Deep focus"],
+        ),
+        Product(
+            id="tagged",
+            name="Noise Guard",
+            price=90.0,
+            tags=["focus"],
+            capabilities_enabled=["Noise cancellation"],
+        ),
+    ]
+    index = BM25Index(products)
+    ranked = [products[row].id for row in index.search("focus")]
+    assert ranked == ["capable", "tagged", "described"]
+    assert [products[row].id for row in index.search("focus noise", limit=1)] == [
+        "tagged"
+    ]
+    # Many short posting lists and a dense accumulator agree.
+    rows, scores = index.score("focus lamp timer")
+    assert set(rows.tolist()) == {0, 1, 2}
+    assert np.all(scores > 0)
+    assert index.search("quantum") == []
+
+
+def test_bm25_breaks_ties_at_the_limit_by_catalog_order():
+    rows = np.array([7, 3, 9, 1, 5, 2])
+    scores = np.array([1.0, 2.0, 1.0, 1.0, 1.0, 0.5])
+    assert BM25Index._rank(rows, scores, 3) == [3, 1, 5]
+    assert BM25Index._rank(rows, scores, None) == [3, 1, 5, 7, 9, 2]
+    products = [
+        Product(id=f"p{i}", name="Focus lamp", price=1.0, tags=[]) for i in range(40)
+    ]
+    assert BM25Index(products).search("focus", limit=5) == [0, 1, 2, 3, 4]
+
+
+def test_search_returns_ranked_results_and_substring_fallback():
+    assert search_products("") == search_module.CATALOG
+    assert [p.id for p in search_products("lumbar")][0] == "chair-05"
+    # No whole-token match: falls back to substring matching.
+    assert [p.id for p in search_products("ergo")] == ["desk-01"]
+    assert len(search_products("workspace", limit=1)) == 1
+
+
+def test_search_many_scores_a_query_chain_in_one_pass(monkeypatch):
+    index = BM25Index(search_module.CATALOG)
+    queries = ["ergonomic desk", "workspace", "desk lamp", "quantum"]
+    for query, (rows, scores) in zip(queries, index.score_many(queries)):
+        expected_rows, expected_scores = index.score(query)
+        order = np.argsort(expected_rows)
+        assert rows.tolist() == expected_rows[order].tolist()
+        assert np.allclose(scores, expected_scores[order])
+
+    cache = search_module.SearchResultCache(max_entries=16)
+    monkeypatch.setattr(search_module, "_result_cache", cache)
+    chain = ["ergonomic desk", "ergo", "", "workspace", "ergonomic desk"]
+    results = search_module.search_many(chain)
+    assert cache.stats()["misses"] == 4 and cache.stats()["entries"] == 4
+    monkeypatch.setattr(
+        search_module, "_result_cache", search_module.SearchResultCache(0)
+    )
+    assert results == [search_products(query) for query in chain]
+
+
+def _indexed_product(product_id: str, capability: str) -> Product:
+    return Product(
+        id=product_id,
+        name=product_id.title(),
+        price=10.0,
+        tags=["workspace"],
+        capabilities_enabled=[capability],
+    )
+
+
+def test_catalog_embedding_index_only_reembeds_changed_products(tmp_path):
+    calls: list[list[str]] = []
+
+    def fake_embed(texts):
+        calls.append(list(texts))
+        return [[float(len(text)), 1.0, 0.0] for text in texts]
+
+    desk = _indexed_product("desk", "Posture management")
+    lamp = _indexed_product("lamp", "Sleep hygiene")
+    index = CatalogEmbeddingIndex()
+
+    assert index.refresh([desk, lamp], fake_embed, "fake:v1") == 2
+    assert index.refresh([desk, lamp], fake_embed, "fake:v1") == 0
+
+    lamp.capabilities_enabled = ["Attention rituals"]
+    assert index.refresh([desk, lamp], fake_embed, "fake:v1") == 1
+    assert calls[-1] == [product_semantic_text(lamp)]
+
+    np.testing.assert_allclose(np.linalg.norm(index.matrix, axis=1), 1.0, rtol=1e-6)
+
+    path = tmp_path / "catalog_embeddings.npz"
+    index.save(path)
+    restored = CatalogEmbeddingIndex.load(path)
+    vectors, missing = restored.lookup([lamp, desk], "fake:v1")
+    assert missing == []
+    np.testing.assert_array_equal(vectors[0], index.matrix[index.rows["lamp"]])
+
+    _, missing_other_space = restored.lookup([lamp], "other:v2")
+    assert missing_other_space == [0]
+
+
+def test_embedding_lookup_hashes_each_product_object_once(monkeypatch):
+    embedding_module = importlib.import_module("modules.commerce.embedding_index")
+    desk = _indexed_product("desk", "Posture management")
+    index = CatalogEmbeddingIndex()
+    index.upsert([desk], [[1.0, 0.0]], "fake:v1")
+
+    hashed = []
+    original = embedding_module.semantic_text_hash
+
+    def counting(product):
+        hashed.append(product.id)
+        return original(product)
+
+    monkeypatch.setattr(embedding_module, "semantic_text_hash", counting)
+    for _ in range(3):
+        assert index.lookup([desk], "fake:v1")[1] == []
+    assert hashed == []
+
+    # A new object with the same id is verified once, then memoized.
+    copy = _indexed_product("desk", "Posture management")
+    assert index.lookup([copy], "fake:v1")[1] == []
+    assert index.lookup([copy], "fake:v1")[1] == []
+    assert hashed == ["desk"]
+    changed = _indexed_product("desk", "Something else")
+    assert index.lookup([changed], "fake:v1")[1] == [0]
+
+
+def _clustered_vectors(count: int, dim: int, clusters: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=count)
+    return (centers[labels] + 0.3 * rng.normal(size=(count, dim))).astype(np.float32)
+
+
+def test_ivf_index_recall_incremental_updates_and_persistence(tmp_path):
+    vectors = _clustered_vectors(4000, 32, clusters=40)
+    ids = [f"p{row}" for row in range(len(vectors))]
+    config = ANNConfig(n_lists=64, nprobe=8, exact_threshold=0)
+    index = IVFFlatIndex.build(vectors, ids, config=config)
+    assert index.n_lists == 64
+
+    queries = _clustered_vectors(50, 32, clusters=40, seed=11)
+    recall = []
+    for query in queries:
+        approx, _ = index.search(query, k=10)
+        exact, exact_scores = index.search(query, k=10, nprobe=index.n_lists)
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        brute = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:10]
+        assert exact == [ids[row] for row in brute]
+        assert np.all(np.diff(exact_scores) <= 0)
+        recall.append(len(set(approx) & set(exact)) / 10)
+    assert np.mean(recall) >= 0.9
+
+    target = queries[0]
+    index.add(target.reshape(1, -1), ["new"], ["h"])
+    index.remove(["p0"])
+    found, scores = index.search(target, k=3)
+    assert found[0] == "new"
+    assert np.isclose(scores[0], 1.0)
+    assert "p0" not in index.search(vectors[0], k=5, nprobe=64)[0]
+
+    path = tmp_path / "ann.npz"
+    index.save(path)
+    restored = IVFFlatIndex.load(path, config)
+    assert restored.pending == 0
+    assert len(restored) == len(index)
+    assert restored.search(target, k=1)[0] == ["new"]
+
+
+def test_semantic_search_returns_nearest_catalog_products(monkeypatch):
+    class FakeProvider:
+        provider_name = "fake"
+        model_name = "fake-v1"
+
+        def embed(self, text):
+            return [1.0, 0.0, 0.0] if "posture" in text.lower() else [0.0, 1.0, 0.0]
+
+    axes = {"desk-01": [1.0, 0.1, 0.0], "chair-05": [0.9, 0.0, 0.3]}
+    index = CatalogEmbeddingIndex()
+    catalog = search_module.CATALOG
+    index.upsert(
+        catalog,
+        [axes.get(product.id, [0.0, 1.0, 0.0]) for product in catalog],
+        "fake:fake-v1",
+    )
+    monkeypatch.setitem(search_module.current_snapshot().derived, "embeddings", index)
+    monkeypatch.setattr(
+        "shared.llm.embeddings.get_embedding_provider", lambda: FakeProvider()
+    )
+
+    results = semantic_search("posture support", k=2)
+    assert [product.id for product in results] == ["desk-01", "chair-05"]
+    scored = scored_semantic_search("posture support", k=2)
+    assert [product for product, _ in scored] == results
+    assert scored[0][1] > scored[1][1] > 0.9
+    assert [p.id for p in semantic_search("evening", k=1)] == ["lamp-02"]
+
+
+def test_ann_updates_swap_in_a_copy_with_only_the_changed_ids(monkeypatch, tmp_path):
+    from modules.commerce.ann import get_ann_index
+
+    catalog = search_module.CATALOG
+    rng = np.random.default_rng(1)
+    embeddings = CatalogEmbeddingIndex()
+    embeddings.upsert(catalog, rng.normal(size=(len(catalog), 8)), "fake:fake-v1")
+    derived = search_module.current_snapshot().derived
+    monkeypatch.setitem(derived, "embeddings", embeddings)
+    monkeypatch.delitem(derived, "ann", raising=False)
+    monkeypatch.setenv("CATALOG_ANN_PATH", str(tmp_path / "ann.npz"))
+
+    first = get_ann_index()
+    assert len(first) == len(catalog)
+    revision = embeddings.revision
+    edited = replace(catalog[0], description="Rewritten copy")
+    embeddings.upsert([edited], rng.normal(size=(1, 8)), "fake:fake-v1")
+    assert embeddings.changed_since(revision) == (revision + 1, [catalog[0].id])
+
+    second = get_ann_index()
+    assert second is not first
+    assert first.pending == 0
+    assert second.pending == 2  # the replaced row's tombstone + overflow row
+    assert get_ann_index() is second
+    embeddings._retain({p.id for p in catalog[1:]})
+    assert catalog[0].id not in get_ann_index().text_hashes
+    assert catalog[0].id in second.text_hashes
+
+
+def _retrieval_product(product_id: str) -> Product:
+    return Product(id=product_id, name=product_id, price=1.0, tags=[])
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    a, b, c, d = (_retrieval_product(pid) for pid in "abcd")
+    fused = reciprocal_rank_fusion([[a, b, c], [c, d, b]], rrf_k=60)
+    assert [p.id for p in fused] == ["c", "b", "a", "d"]
+    assert len(reciprocal_rank_fusion([[a, b], [c]], limit=2)) == 2
+
+
+def test_hybrid_retriever_fuses_semantic_hits_before_broadening():
+    desk, chair, lamp = (_retrieval_product(pid) for pid in ["desk", "chair", "lamp"])
+    lexical_calls: list[str] = []
+    semantic_calls: list[tuple[str, int]] = []
+
+    def lexical(query):
+        lexical_calls.append(query)
+        return {"workspace": [desk]}.get(query, [])
+
+    def semantic(query, k):
+        semantic_calls.append((query, k))
+        return [(lamp, 0.8), (chair, 0.6)]
+
+    batches: list[list[str]] = []
+
+    def lexical_many(queries):
+        batches.append(list(queries))
+        return [lexical(query) for query in queries]
+
+    config = RetrievalConfig(
+        candidate_budget=5, rrf_k=60, semantic=True, min_similarity=0.3
+    )
+    retriever = HybridRetriever(lexical, semantic, config, lexical_many=lexical_many)
+    result = retriever.retrieve(
+        {"label": "better_sleep", "domain": "health"}, goals=["wind down"]
+    )
+    assert [p.id for p in result.products] == ["lamp", "chair"]
+    assert result.query == "better sleep"
+    assert result.fallback_reason is None
+    assert lexical_calls == ["better sleep"]
+    assert semantic_calls == [("better sleep. wind down", 5)]
+    assert batches == []  # the primary query hit, so no fallbacks are searched
+
+    # Weak semantic neighbours do not stop the lexical fallback, whose
+    # queries are searched in one batch and used directly.
+    lexical_calls.clear()
+    distant = HybridRetriever(
+        lexical, lambda query, k: [(lamp, 0.12)], config, lexical_many=lexical_many
+    ).retrieve({"label": "better_sleep", "domain": "health"})
+    assert [p.id for p in distant.products] == ["desk"]
+    assert distant.query == "workspace"
+    assert distant.semantic_count == 0
+    assert batches == [["health", "workspace"]]
+    assert lexical_calls == ["better sleep", "health", "workspace"]
+
+    def broken(query, k):
+        raise RuntimeError("embedding service down")
+
+    def failing_batch(queries):
+        raise RuntimeError("index unavailable")
+
+    # A failing batch is an error, not a silent switch to serial searches.
+    lexical_calls.clear()
+    with pytest.raises(RuntimeError, match="index unavailable"):
+        HybridRetriever(lexical, broken, config, lexical_many=failing_batch).retrieve(
+            {"label": "better_sleep", "domain": "health"}, k=1
+        )
+    assert lexical_calls == ["better sleep"]
+
+    # Retrievers without lexical_many search the fallbacks one by one.
+    fallback = HybridRetriever(lexical, broken, config).retrieve(
+        {"label": "better_sleep", "domain": "health"}, k=1
+    )
+    assert [p.id for p in fallback.products] == ["desk"]
+    assert fallback.query == "workspace"
+    assert fallback.fallback_reason == (
+        "No products for 'better sleep', fell back to 'workspace'."
+    )
+
+
+def test_hybrid_retriever_skips_semantic_until_ready_and_warns_once(caplog):
+    desk = _retrieval_product("desk")
+    calls: list[str] = []
+
+    def semantic(query, k):
+        calls.append(query)
+        raise RuntimeError("No embedding provider available")
+
+    config = RetrievalConfig(semantic=True)
+    skipped = HybridRetriever(
+        lambda query: [desk], semantic, config, semantic_ready=lambda: False
+    ).retrieve({"label": "desk"})
+    assert [p.id for p in skipped.products] == ["desk"] and calls == []
+
+    retriever = HybridRetriever(lambda query: [desk], semantic, config)
+    with caplog.at_level("DEBUG", logger="modules.commerce.retrieval"):
+        for _ in range(3):
+            assert [p.id for p in retriever.retrieve({"label": "desk"}).products] == [
+                "desk"
+            ]
+    assert len(calls) == 3
+    warnings = [r for r in caplog.records if r.levelname == "WARNING"]
+    assert len(warnings) == 1
+
+
+def test_plan_data_quality_describes_the_annotated_products(monkeypatch):
+    products = [
+        Product(id="a", name="A", price=1.0, tags=[], confidence=0.9, source="shopify"),
+        Product(id="b", name="B", price=1.0, tags=[], confidence=0.8, source="shopify"),
+    ]
+    retriever = HybridRetriever(
+        lambda query: products, config=RetrievalConfig(semantic=False)
+    )
+
+    # Unannotated plans read the stats from the confidence/source columns.
+    quality_rows = []
+    quality = CatalogColumns.quality
+    monkeypatch.setattr(
+        CatalogColumns,
+        "quality",
+        lambda self, rows: quality_rows.append(rows.tolist()) or quality(self, rows),
+    )
+    plan = PlanBuilder(retriever).build_plan({"label": "desk"})
+    assert quality_rows == [[0, 1]]
+    assert plan["data_quality"] == {
+        "average_confidence": 0.85,
+        "sources": ["shopify"],
+        "filtered_low_confidence": 0,
+    }
+
+    def reason(goals, summaries, context=None):
+        return [{**summaries[0], "confidence": 0.5, "source": "google_shopping"}]
+
+    plan = PlanBuilder(retriever).build_plan({"label": "desk"}, reason_fn=reason)
+    assert len(quality_rows) == 1
+    assert plan["data_quality"]["average_confidence"] == 0.5
+    assert plan["data_quality"]["sources"] == ["google_shopping"]
+
+
+def test_facet_index_filters_by_bitmap_intersection_and_counts():
+    products = [
+        Product(
+            id="a",
+            name="A",
+            price=120.0,
+            tags=["desk"],
+            availability="in_stock",
+            category="furniture",
+            source="shopify",
+            confidence=0.9,
+        ),
+        Product(
+            id="b",
+            name="B",
+            price=340.0,
+            tags=["desk", "standing"],
+            availability="in_stock",
+            category="furniture",
+            source="google",
+            confidence=0.7,
+        ),
+        Product(
+            id="c",
+            name="C",
+            price=80.0,
+            tags=["lamp"],
+            availability="out_of_stock",
+            category="lighting",
+            source="shopify",
+            confidence=0.5,
+        ),
+        Product(
+            id="d",
+            name="D",
+            price=250.0,
+            tags=["chair"],
+            availability="in_stock",
+            category="furniture",
+            source="shopify",
+            confidence=0.6,
+        ),
+    ]
+    index = FacetIndex(products)
+
+    def ids(results):
+        return [product.id for product in results]
+
+    assert ids(
+        index.filter(price_max=300, availability="in_stock", min_confidence=0.65)
+    ) == ["a"]
+    assert ids(index.filter(price_min=100, price_max=250)) == ["a", "d"]
+    assert ids(index.filter(tag=["lamp", "chair"])) == ["c", "d"]
+    assert ids(index.filter(category="unknown")) == []
+    # Composes with ranked search results, keeping their order.
+    ranked = [products[3], products[1], products[0]]
+    assert ids(index.filter(ranked, source="shopify")) == ["d", "a"]
+
+    counts = index.counts(index.mask(availability="in_stock"))
+    assert counts["category"] == {"furniture": 3}
+    assert counts["tag"]["desk"] == 2
+    assert counts["price"] == {"min": 120.0, "max": 340.0}
+    assert index.counts(index.bitmap_for([products[2]]))["availability"] == {
+        "out_of_stock": 1
+    }
+
+    # Products the index was not built from are matched by their attributes.
+    adhoc = Product(id="x", name="X", price=90.0, tags=["lamp"], source="shopify")
+    edited = replace(products[0], source="google")
+    assert ids(index.filter([adhoc, edited, products[3]], source="shopify")) == [
+        "x",
+        "d",
+    ]
+    assert index.counts(index.bitmap_for([adhoc, products[1]]))["tag"] == {
+        "desk": 1,
+        "standing": 1,
+    }
+    assert facet_counts([adhoc])["tag"] == {"lamp": 1}
+
+
+def test_catalog_columns_select_rows_and_summarize_only_returned_products():
+    products = [
+        Product(
+            id="a",
+            name="A",
+            price=10,
+            tags=[],
+            confidence=0.9,
+            source="shopify",
+            empowerment_scores={"focus": 0.8},
+        ),
+        Product(
+            id="b",
+            name="B",
+            price=20,
+            tags=[],
+            confidence=0.4,
+            source="google_shopping",
+        ),
+        Product(
+            id="c",
+            name="C",
+            price=30,
+            tags=[],
+            confidence=0.7,
+            source="google_shopping",
+            empowerment_scores={"health": 0.5},
+        ),
+    ]
+    columns = CatalogColumns(products)
+    ranked = columns.rows_for([products[2], products[1], products[0]])
+    kept, filtered = columns.select(ranked, 0.65, fallback_limit=1)
+    assert columns.products_at(kept) == [products[2], products[0]]
+    assert filtered == 1
+    assert columns.quality(kept) == {
+        "average_confidence": 0.8,
+        "sources": ["google_shopping", "shopify"],
+    }
+    assert [summary["id"] for summary in columns.summaries(kept)] == ["c", "a"]
+    assert columns.strings["source"].vocabulary == ["shopify", "google_shopping"]
+
+    # Nothing passes the threshold: the best-ranked rows are kept unfiltered.
+    fallback, filtered = columns.select(ranked, 0.95, fallback_limit=1)
+    assert columns.products_at(fallback) == [products[2]] and filtered == 0
+
+    # Catalog products resolve to the shared store; others get their own.
+    catalog_columns, rows = columns_for(get_products(["lamp-02", "desk-01"]))
+    assert [catalog_columns.ids[row] for row in rows] == ["lamp-02", "desk-01"]
+    own_columns, rows = columns_for(products)
+    assert own_columns is not catalog_columns and rows.tolist() == [0, 1, 2]
+
+
+def test_search_results_are_cached_until_the_catalog_version_changes(monkeypatch):
+    cache = search_module.SearchResultCache(max_entries=2)
+    monkeypatch.setattr(search_module, "_result_cache", cache)
+    calls = []
+    uncached = search_module._search_uncached
+
+    def counting(snapshot, query, *args):
+        calls.append(query)
+        return uncached(snapshot, query, *args)
+
+    monkeypatch.setattr(search_module, "_search_uncached", counting)
+
+    first = search_products("Ergonomic  Desk")
+    assert search_products("ergonomic desk") == first
+    assert calls == ["ergonomic desk"]
+    # Filters and limits are part of the key.
+    search_products("ergonomic desk", filters={"price_max": 400})
+    search_products("ergonomic desk", limit=1)
+    assert len(calls) == 3
+    assert cache.stats()["entries"] == 2  # LRU evicted the oldest entry
+
+    manager = CatalogManager(loader=lambda: list(search_module.CATALOG))
+    monkeypatch.setattr(catalog_module, "_manager", manager)
+    manager.reload()
+    search_products("ergonomic desk", limit=1)
+    assert len(calls) == 4
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 4
+    assert stats["hit_rate"] == 0.2 and stats["invalidations"] == 1
+
+
+def test_catalog_manager_swaps_in_warmed_snapshot_and_keeps_old_one_alive(
+    monkeypatch,
+):
+    feeds = [
+        [Product(id="old", name="Old Desk", price=100.0, tags=["desk"])],
+        [
+            Product(id="new", name="New Desk", price=120.0, tags=["desk"]),
+            Product(id="lamp", name="Lamp", price=30.0, tags=["light"]),
+        ],
+    ]
+    manager = CatalogManager(loader=lambda: feeds.pop(0))
+    monkeypatch.setattr(catalog_module, "_manager", manager)
+    assert [p.id for p in search_products("desk")] == ["old"]
+    in_flight = manager.snapshot
+
+    manager.reload()
+    current = manager.snapshot
+    assert current.version == in_flight.version + 1
+    # Indexes used so far are built before the new version goes live.
+    assert "bm25" in current.derived
+    assert [p.id for p in search_products("desk")] == ["new"]
+    assert [p.id for p in in_flight.products] == ["old"]
+
+    # A failed load leaves the current snapshot in place.
+    assert manager.reload_in_background()
+    manager._reload_thread.join()
+    assert manager.snapshot is current
+    assert manager.status()["last_error"]
+
+    # While another reload runs, a background request returns at once.
+    with manager._reload_lock:
+        assert manager.status()["reloading"]
+        assert not manager.reload_in_background()
+    assert not manager.reloading
+
+
+def test_catalog_store_snapshot_replaces_cold_load_until_stale(monkeypatch, tmp_path):
+    catalog = list(search_module.CATALOG)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return catalog
+
+    store = CatalogStore(tmp_path, source="mock")
+    first = CatalogManager(loader=loader, store=store)
+    assert len(loads) == 1 and store.staleness() is None
+
+    # A second process starts from the snapshot: no loader call, same data,
+    # and the columns come back memory-mapped.
+    second = CatalogManager(loader=loader, store=store)
+    assert len(loads) == 1
+    assert second.snapshot.products == first.snapshot.products
+    columns = second.snapshot.derived["columns"]
+    assert isinstance(columns.price, np.memmap)
+    expected = CatalogColumns(catalog)
+    rows = np.arange(len(catalog))
+    assert columns.summaries(rows) == expected.summaries(rows)
+    assert np.array_equal(columns.confidence, expected.confidence)
+
+    # Scheduled reloads only run once the snapshot is stale.
+    assert second.reload(force=False) is second.snapshot
+    assert len(loads) == 1
+    monkeypatch.setenv("CATALOG_SNAPSHOT_MAX_AGE", "-1")
+    assert store.staleness().startswith("snapshot is")
+    reloaded = second.reload(force=False)
+    assert len(loads) == 2 and reloaded.version == 2
+    assert (
+        CatalogStore(tmp_path, source="google")
+        .staleness()
+        .startswith("snapshot is for source")
+    )
+
+    # The previous generation survives one save so open maps stay valid.
+    generations = sorted(p.name for p in tmp_path.iterdir() if p.is_dir())
+    assert len(generations) == 2
+    store.save(catalog)
+    remaining = sorted(p.name for p in tmp_path.iterdir() if p.is_dir())
+    assert len(remaining) == 2 and store.current_path().name in remaining
+    assert set(generations) - set(remaining)
+
+    # marshal data from another Python version is not trusted.
+    manifest = store.manifest()
+    manifest["runtime"] = [2, 7, 2]
+    assert store.staleness(manifest).startswith("written by Python/marshal")
+
+
+def test_catalog_store_saves_wait_for_the_lock(tmp_path):
+    catalog = list(search_module.CATALOG)
+    store = CatalogStore(tmp_path, source="mock")
+    store.save(catalog)
+    other = CatalogStore(tmp_path, source="mock")
+    saved = []
+
+    with store._locked():
+        # Another worker's save neither writes nor prunes while the lock is held.
+        worker = threading.Thread(target=lambda: saved.append(other.save(catalog)))
+        worker.start()
+        worker.join(timeout=0.2)
+        assert worker.is_alive() and not saved
+        assert len([p for p in tmp_path.iterdir() if p.is_dir()]) == 1
+    worker.join(timeout=5)
+    assert saved and store.current_path() == saved[0]
+    assert all((p / "manifest.json").exists() for p in tmp_path.iterdir() if p.is_dir())
+
+
+def test_importing_search_does_not_load_the_catalog():
+    code = (
+        "import modules.commerce.search, modules.commerce.catalog as catalog\n"
+        "assert catalog._manager is None\n"
+    )
+    root = Path(__file__).resolve().parents[2]
+    subprocess.run([sys.executable, "-c", code], cwd=root, check=True)
+
+
+def test_fuzzy_search_corrects_misspelled_tokens():
+    assert bounded_edit_distance("standng", "standing", 2) == 1
+    assert bounded_edit_distance("ergonmic", "ergonomic", 2) == 1
+    assert bounded_edit_distance("lapm", "lamp", 1) == 1  # transposition
+    assert bounded_edit_distance("desk", "lamp", 2) == 3  # gave up past the bound
+
+    index = TrigramIndex(search_module.CATALOG)
+    assert index.correct("Ergonmic chiar") == "ergonomic chair"
+    assert index.correct("ergo") == "ergo"  # no token within one edit
+    assert [p.id for p in search_products("standng desk")] == ["desk-01"]
+    assert [p.id for p in search_products("lumbr", fuzzy=False)] == []
+    assert [p.id for p in search_products("lumbr")] == ["chair-05"]
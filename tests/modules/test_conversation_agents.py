@@ -159,6 +159,11 @@ def test_commerce_agent_fallback_query(monkeypatch):
         return mapping.get(query, [])
 
     monkeypatch.setattr("modules.commerce.plan_builder.product_search", mock_search)
+    # Fallback queries are searched together through search_many.
+    monkeypatch.setattr(
+        "modules.commerce.plan_builder.search_many",
+        lambda queries: [mock_search(query) for query in queries],
+    )
     agent = CommerceAgent()
     plan = agent.build_plan(
         {"label": "workspace_upgrade", "domain": "career"}, goals=["career growth"]
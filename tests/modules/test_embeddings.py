@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import List
+
+import numpy as np
+import pytest
+
+from shared.llm.embedding_cache import SlabLRUCache
+from shared.llm.embeddings import (
+    EmbeddingBatchError,
+    EmbeddingConfig,
+    EmbeddingProvider,
+    HybridEmbeddingProvider,
+    _aembed_in_chunks,
+    _embed_in_chunks,
+)
+
+
+class CountingProvider(EmbeddingProvider):
+    """Deterministic provider that records every text it embeds."""
+
+    def __init__(self, dimension: int = 4):
+        self._dimension = dimension
+        self.calls: List[List[str]] = []
+
+    def _vector(self, text: str) -> List[float]:
+        base = float(len(text))
+        return [base + offset for offset in range(self._dimension)]
+
+    def embed(self, text: str) -> List[float]:
+        self.calls.append([text])
+        return self._vector(text)
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        self.calls.append(list(texts))
+        return [self._vector(text) for text in texts]
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    @property
+    def name(self) -> str:
+        return "counting"
+
+    @property
+    def model(self) -> str:
+        return "counting-v1"
+
+
+def _hybrid(tmp_path, **overrides) -> tuple[HybridEmbeddingProvider, CountingProvider]:
+    config = EmbeddingConfig(
+        gemini_api_key=None,
+        persistent_cache=True,
+        persistent_cache_path=str(tmp_path / "embeddings.db"),
+        **overrides,
+    )
+    hybrid = HybridEmbeddingProvider(config)
+    fake = CountingProvider()
+    hybrid._active_provider = fake
+    return hybrid, fake
+
+
+def test_persistent_cache_survives_restart(tmp_path):
+    first, first_fake = _hybrid(tmp_path)
+    vectors = first.embed_batch(["reduce back pain", "learn python"])
+    assert len(first_fake.calls) == 1
+
+    second, second_fake = _hybrid(tmp_path)
+    assert second.embed_batch(["reduce back pain", "learn python"]) == vectors
+    assert second.embed("reduce back pain") == vectors[0]
+    assert second_fake.calls == []
+
+    stats = second.cache_stats()
+    assert stats["persistent"]["hits"] == 2
+    assert stats["memory"]["hits"] == 1
+
+
+def test_persistent_cache_is_keyed_by_model(tmp_path):
+    hybrid, _ = _hybrid(tmp_path)
+    hybrid.embed("focus")
+
+    class UpgradedProvider(CountingProvider):
+        @property
+        def model(self) -> str:
+            return "counting-v2"
+
+    upgraded, _ = _hybrid(tmp_path)
+    upgraded._active_provider = UpgradedProvider()
+    upgraded.embed("focus")
+    assert upgraded._active_provider.calls == [["focus"]]
+    assert upgraded.cache_stats()["persistent"]["misses"] == 1
+
+
+def test_slab_cache_evicts_least_recently_used_within_budget():
+    # Budget for exactly two 4-dim float32 rows in a single stripe.
+    cache = SlabLRUCache(max_bytes=2 * 4 * 4, stripes=1)
+    cache.put("a", [1.0, 0.0, 0.0, 0.0])
+    cache.put("b", [0.0, 1.0, 0.0, 0.0])
+    assert cache.get("a") is not None  # "a" is now most recently used
+    cache.put("c", [0.0, 0.0, 1.0, 0.0])
+
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    stats = cache.stats()
+    assert stats["capacity"] == 2
+    assert stats["nbytes"] == 32
+    assert stats["evictions"] == 1
+
+
+def test_slab_cache_returns_read_only_views():
+    cache = SlabLRUCache(max_bytes=1024, stripes=2)
+    cache.put("goal", [0.5, 0.25])
+    view = cache.get("goal", copy=False)
+    assert view.dtype == np.float32
+    assert not view.flags.writeable
+    assert view.tolist() == [0.5, 0.25]
+
+
+def test_slab_cache_gathers_rows_into_one_matrix():
+    cache = SlabLRUCache(max_bytes=1024, stripes=2)
+    cache.put("a", [1.0, 2.0])
+    cache.put("b", [3.0, 4.0])
+    matrix, missing = cache.gather(["b", "x", "a"])
+    assert missing == [1]
+    assert matrix[[0, 2]].tolist() == [[3.0, 4.0], [1.0, 2.0]]
+    assert cache.gather(["y"]) == (None, [0])
+
+
+def test_embed_batch_array_deduplicates_and_stacks(tmp_path):
+    hybrid, fake = _hybrid(tmp_path)
+    matrix = hybrid.embed_batch_array(["desk", "lamp", "desk"])
+    assert matrix.shape == (3, 4)
+    assert matrix.dtype == np.float32
+    assert fake.calls == [["desk", "lamp"]]
+    np.testing.assert_array_equal(matrix[0], matrix[2])
+
+    # Cached rows are gathered from the slabs; only the new text is embedded.
+    again = hybrid.embed_batch_array(["lamp", "chair", "desk"])
+    assert fake.calls[-1] == ["chair"]
+    np.testing.assert_array_equal(again[0], matrix[1])
+    np.testing.assert_array_equal(again[2], matrix[0])
+    again[0] = 0.0
+    np.testing.assert_array_equal(hybrid.embed_batch_array(["lamp"])[0], matrix[1])
+
+
+def test_concurrent_embed_calls_are_coalesced(tmp_path):
+    hybrid, fake = _hybrid(tmp_path, coalesce_window_ms=200, coalesce_max_batch=64)
+    texts = ["sleep", "focus", "posture", "sleep"] * 2
+    barrier = threading.Barrier(len(texts))
+    results: dict[int, List[float]] = {}
+
+    def worker(index: int, text: str) -> None:
+        barrier.wait()
+        results[index] = hybrid.embed(text)
+
+    threads = [
+        threading.Thread(target=worker, args=(index, text))
+        for index, text in enumerate(texts)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(fake.calls) == 1
+    assert sorted(fake.calls[0]) == ["focus", "posture", "sleep"]
+    assert results[0] == results[3] == hybrid.embed("sleep")
+    assert hybrid.cache_stats()["coalescer"]["deduplicated"] == 5
+
+
+def test_coalescing_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.delenv("EMBEDDING_COALESCE_WINDOW_MS", raising=False)
+    hybrid, fake = _hybrid(tmp_path)
+    assert "coalescer" not in hybrid.cache_stats()
+    hybrid.embed("stretching")
+    assert fake.calls == [["stretching"]]
+
+
+def test_coalescer_propagates_provider_errors(tmp_path):
+    hybrid, fake = _hybrid(tmp_path, coalesce_window_ms=1)
+
+    def boom(texts):
+        raise RuntimeError("quota exceeded")
+
+    fake.embed = boom
+    with pytest.raises(RuntimeError, match="quota exceeded"):
+        hybrid.embed("stretching")
+
+
+def test_async_embed_bounds_in_flight_provider_calls(tmp_path):
+    hybrid, fake = _hybrid(tmp_path, async_max_concurrency=2)
+    in_flight = {"current": 0, "peak": 0}
+
+    async def slow_aembed(text: str) -> List[float]:
+        in_flight["current"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["current"])
+        await asyncio.sleep(0.01)
+        in_flight["current"] -= 1
+        return fake.embed(text)
+
+    fake.aembed = slow_aembed
+
+    async def run() -> List[List[float]]:
+        texts = [f"goal {index}" for index in range(6)]
+        return await asyncio.gather(*(hybrid.aembed(text) for text in texts))
+
+    vectors = asyncio.run(run())
+    assert len(vectors) == 6
+    assert in_flight["peak"] == 2
+    assert asyncio.run(hybrid.aembed_batch(["goal 0", "goal 5"])) == [
+        vectors[0],
+        vectors[5],
+    ]
+    assert len(fake.calls) == 6
+
+
+class ChunkedProvider(CountingProvider):
+    """Counting provider that routes batches through the shared chunk runner."""
+
+    def __init__(self, config: EmbeddingConfig, failing: set[str] | None = None):
+        super().__init__()
+        self.config = config
+        self.failing = failing or set()
+        self._lock = threading.Lock()
+
+    def _chunk(self, texts: List[str]) -> List[List[float]]:
+        if self.failing & set(texts):
+            raise RuntimeError("chunk rejected")
+        with self._lock:
+            self.calls.append(list(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return _embed_in_chunks(texts, self._chunk, self.config)
+
+
+def test_embed_batch_chunks_in_parallel_and_keeps_order(tmp_path):
+    hybrid, _ = _hybrid(tmp_path, batch_chunk_size=3, batch_workers=4)
+    chunked = ChunkedProvider(hybrid.config)
+    hybrid._active_provider = chunked
+    texts = [f"product {index:02d}" + "x" * index for index in range(10)]
+
+    vectors = hybrid.embed_batch(texts)
+
+    assert [len(chunk) for chunk in sorted(chunked.calls)] == [3, 3, 3, 1]
+    assert [vector[0] for vector in vectors] == [float(len(text)) for text in texts]
+
+
+def test_partial_chunk_failures_are_retryable(tmp_path):
+    hybrid, _ = _hybrid(
+        tmp_path, batch_chunk_size=2, batch_max_retries=1, batch_retry_backoff=0
+    )
+    chunked = ChunkedProvider(hybrid.config, failing={"c"})
+    hybrid._active_provider = chunked
+    texts = ["a", "b", "c", "d", "e"]
+
+    with pytest.raises(EmbeddingBatchError) as excinfo:
+        hybrid.embed_batch(texts)
+    assert excinfo.value.failed_texts == ["c", "d"]
+
+    chunked.failing.clear()
+    chunked.calls.clear()
+    vectors = hybrid.embed_batch(texts)
+    assert chunked.calls == [["c", "d"]]
+    assert len(vectors) == 5
+
+
+class AsyncChunkedProvider(ChunkedProvider):
+    """Chunked provider whose async batches go through the async chunk runner."""
+
+    def __init__(self, config: EmbeddingConfig, flaky: set[str] | None = None):
+        super().__init__(config)
+        self.flaky = flaky or set()  # fail once, then succeed
+
+    async def _achunk(self, texts: List[str]) -> List[List[float]]:
+        if self.flaky & set(texts):
+            self.flaky -= set(texts)
+            raise RuntimeError("transient failure")
+        return self._chunk(texts)
+
+    async def aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        return await _aembed_in_chunks(texts, self._achunk, self.config)
+
+
+def test_async_batches_retry_and_keep_partial_results(tmp_path):
+    hybrid, _ = _hybrid(
+        tmp_path, batch_chunk_size=2, batch_max_retries=1, batch_retry_backoff=0
+    )
+    provider = AsyncChunkedProvider(hybrid.config, flaky={"a"})
+    hybrid._active_provider = provider
+    texts = ["a", "b", "c", "d", "e"]
+
+    # A transient failure is retried instead of failing the batch.
+    vectors = asyncio.run(hybrid.aembed_batch(texts))
+    assert [vector[0] for vector in vectors] == [1.0] * 5
+
+    hybrid, _ = _hybrid(
+        tmp_path / "second",
+        batch_chunk_size=2,
+        batch_max_retries=1,
+        batch_retry_backoff=0,
+    )
+    provider = AsyncChunkedProvider(hybrid.config)
+    provider.failing = {"c"}
+    hybrid._active_provider = provider
+    with pytest.raises(EmbeddingBatchError) as excinfo:
+        asyncio.run(hybrid.aembed_batch(texts))
+    assert excinfo.value.failed_texts == ["c", "d"]
+
+    provider.failing.clear()
+    provider.calls.clear()
+    assert len(asyncio.run(hybrid.aembed_batch(texts))) == 5
+    assert provider.calls == [["c", "d"]]
@@ -1,4 +1,6 @@
-from modules.empowerment.goal_alignment import assess
+from modules.commerce.domain import Product
+from modules.empowerment.goal_alignment import _keyword_assess, assess
+from modules.empowerment.keyword_index import KeywordIndex
 from modules.empowerment.constraints import check_constraints
 from modules.commerce import search
 
@@ -21,3 +23,66 @@ def test_constraints_block_scarcity_language():
     result = check_constraints("Only 3 left, limited time offer!")
     assert result.blocked is True
     assert result.violations
+
+
+def _reference_keyword_matches(goal, products):
+    normalized = goal.lower()
+    goal_tokens = set(normalized.split())
+    return [
+        product.id
+        for product in products
+        if any(
+            goal_tokens & set(capability.lower().split())
+            for capability in product.capabilities_enabled
+        )
+        or any(tag in normalized or normalized in tag for tag in product.tags)
+    ]
+
+
+def test_keyword_index_matches_linear_scan():
+    products = [
+        Product(
+            id="mat",
+            name="Yoga Mat",
+            price=30.0,
+            tags=["fitness", "Yoga"],
+            capabilities_enabled=["Daily stretching", "mobility work"],
+        ),
+        Product(
+            id="pen",
+            name="Pen",
+            price=3.0,
+            tags=["writing"],
+            capabilities_enabled=["Journaling"],
+        ),
+        Product(
+            id="notebook",
+            name="Notebook",
+            price=8.0,
+            tags=["writing tools"],
+            capabilities_enabled=[],
+        ),
+    ]
+    goals = ["Stretching daily", "writing", "yoga", "fit", "journaling habit", "none"]
+    index = KeywordIndex(products)
+    for goal in goals:
+        matched = [products[row].id for row in sorted(index.match(goal))]
+        assert matched == _reference_keyword_matches(goal, products)
+
+    result = _keyword_assess(goals, products + products[:1])
+    assert result.aligned_goals == [
+        "Stretching daily",
+        "writing",
+        "fit",
+        "journaling habit",
+    ]
+    assert result.supporting_products == ["mat", "pen", "notebook"]
+
+    catalog = search("")
+    catalog_result = _keyword_assess(["improve posture", "focus"], catalog)
+    assert catalog_result.supporting_products == list(
+        dict.fromkeys(
+            _reference_keyword_matches("improve posture", catalog)
+            + _reference_keyword_matches("focus", catalog)
+        )
+    )
@@ -1,3 +1,7 @@
+import subprocess
+import sys
+from pathlib import Path
+
 from modules.intent.classifier import classify
 
 
@@ -12,3 +16,14 @@ def test_unknown_intent_when_no_keywords():
     result = classify("Tell me a story about nothing in particular")
     assert result.label == "unknown"
     assert result.confidence < 0.3
+
+
+def test_taxonomy_is_parsed_on_first_use_not_at_import():
+    code = (
+        "import modules.intent as intent, modules.intent.taxonomy as taxonomy\n"
+        "assert taxonomy._taxonomy is None\n"
+        "assert intent.KeywordClassifier().classify('ergonomic desk').label\n"
+        "assert taxonomy._taxonomy is intent.INTENT_TAXONOMY\n"
+    )
+    root = Path(__file__).resolve().parents[2]
+    subprocess.run([sys.executable, "-c", code], cwd=root, check=True)
@@ -19,3 +19,20 @@ def test_session_manager_tracks_goals_and_turns(tmp_path: Path):
     assert snapshot.session["id"]
     assert len(snapshot.turns) == 2
     assert snapshot.latest_episode is not None
+
+
+def test_goal_embeddings_are_loaded_from_storage(tmp_path: Path, monkeypatch):
+    def fake_embed(text: str):
+        if "guitar" in text:
+            raise RuntimeError("provider unavailable")
+        return [float(len(text)), 1.0]
+
+    monkeypatch.setattr("modules.memory.session_manager.embed", fake_embed)
+    manager = SessionManager(user_id="embed-user", db_path=tmp_path / "memory.db")
+    manager.record_goal("Reduce back pain")
+    manager.record_goal("Learn guitar")
+
+    from modules.memory.repositories import goals as goals_repo
+
+    stored = goals_repo.get_goal_embeddings(manager.goal_texts() + ["Unknown goal"])
+    assert stored == {"Reduce back pain": [16.0, 1.0]}
@@ -1,4 +1,9 @@
-from modules.commerce.domain import RawOffer
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from modules.commerce.adapters.transformers import convert_offers, transform_catalog
+from modules.commerce.domain import FrozenProduct, RawOffer
 from shared.transformers.offers import raw_offer_to_raw_product
 
 
@@ -29,3 +34,44 @@ def test_raw_offer_conversion_preserves_metadata():
     assert raw_product.offer_url == "https://acme.test/product"
     assert raw_product.confidence == 0.95
     assert raw_product.attributes["capabilities"] == ["Posture"]
+
+
+def test_transformers_emit_compact_products():
+    def fresh(text: str) -> str:
+        # A distinct string object per call, as a feed parser produces them.
+        return "".join(list(text))
+
+    def offer(variant: int) -> RawOffer:
+        return RawOffer(
+            source="shopify",
+            source_id=f"variant-{variant}",
+            merchant_name="Acme",
+            offer_url=None,
+            title=fresh("Focus Chair"),
+            description=fresh("Ergonomic chair"),
+            price=399.0,
+            currency="USD",
+            availability="in_stock",
+            inventory_quantity=5,
+            attributes={
+                "category": fresh("workspace"),
+                "tags": [fresh("ergonomic")],
+                "capabilities": [fresh("Posture")],
+            },
+        )
+
+    first, second = transform_catalog(convert_offers([offer(1), offer(2)]))
+    assert not hasattr(first, "__dict__")
+    assert first.description == "Ergonomic chair"
+    assert first.description is second.description
+    assert first.name is second.name
+    assert first.category is second.category
+    assert first.capabilities_enabled[0] is second.capabilities_enabled[0]
+    assert sorted(first.tags) == ["ergonomic", "workspace"]
+    assert set(map(id, first.tags)) == set(map(id, second.tags))
+
+    (frozen,) = transform_catalog(convert_offers([offer(3)]), frozen=True)
+    assert isinstance(frozen, FrozenProduct)
+    assert frozen.id == "variant-3"
+    with pytest.raises(FrozenInstanceError):
+        frozen.price = 1.0
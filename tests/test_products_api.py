@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from api.main import app
+
+client = TestClient(app)
+
+
+def test_search_endpoint_paginates_with_cursor_and_projects_fields():
+    first = client.get(
+        "/products/search", params={"query": "", "limit": 2, "fields": "id,price"}
+    )
+    assert first.status_code == 200
+    page = first.json()
+    assert page["total"] == 3
+    assert [set(item) for item in page["items"]] == [{"id", "price"}] * 2
+    assert page["next_cursor"]
+
+    second = client.get(
+        "/products/search",
+        params={"query": "", "limit": 2, "cursor": page["next_cursor"]},
+    ).json()
+    assert len(second["items"]) == 1 and second["next_cursor"] is None
+    assert "description" not in second["items"][0]  # default projection
+    ids = [item["id"] for item in page["items"] + second["items"]]
+    assert sorted(ids) == ["chair-05", "desk-01", "lamp-02"]
+
+    # Cursors are bound to their query; bad fields and page sizes are rejected.
+    other = client.get(
+        "/products/search", params={"query": "desk", "cursor": page["next_cursor"]}
+    )
+    assert other.status_code == 400
+    assert (
+        client.get("/products/search", params={"fields": "secret"}).status_code == 400
+    )
+    assert client.get("/products/search", params={"limit": 1000}).status_code == 422
+
+
+def test_filter_endpoint_returns_page_and_facet_counts():
+    data = client.get(
+        "/products/filter", params={"tag": "workspace", "limit": 1, "fields": "id"}
+    ).json()
+    assert data["total"] == 2
+    assert len(data["items"]) == 1 and data["next_cursor"]
+    assert data["facets"]["tag"]["workspace"] == 2
+    rest = client.get(
+        "/products/filter",
+        params={
+            "tag": "workspace",
+            "limit": 1,
+            "fields": "id",
+            "cursor": data["next_cursor"],
+        },
+    ).json()
+    assert len(rest["items"]) == 1 and rest["next_cursor"] is None
+    assert rest["items"][0]["id"] != data["items"][0]["id"]
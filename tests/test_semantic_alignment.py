@@ -10,6 +10,7 @@ from unittest.mock import patch, MagicMock
 from modules.commerce.domain import Product
 from modules.empowerment.goal_alignment import (
     assess,
+    assess_top_k,
     get_alignment_explanation,
     _build_product_semantic_text,
     _keyword_assess,
@@ -209,6 +210,180 @@ def test_assess_uses_semantic_by_default(sample_products):
             assert result.confidence_summary["alignment_method"] == "semantic"
 
 
+def test_semantic_assess_returns_product_alignments(sample_products):
+    """Test the similarity matrix drives goals, supporters and per-product records."""
+    clusters = {
+        "back pain": [1.0, 0.0, 0.0, 0.0],
+        "python": [0.0, 1.0, 0.0, 0.0],
+        "cello": [0.0, 0.0, 0.0, 1.0],
+    }
+
+    def mock_embed_batch(texts):
+        return [
+            next(
+                (vector for key, vector in clusters.items() if key in text.lower()),
+                [0.0, 0.0, 1.0, 0.0],
+            )
+            for text in texts
+        ]
+
+    mock_provider = MagicMock()
+    mock_provider.provider_name = "mock-matrix"
+    mock_provider.model_name = "v1"
+    mock_provider.embed_batch = MagicMock(side_effect=mock_embed_batch)
+
+    with patch(
+        "shared.llm.embeddings.get_embedding_provider", return_value=mock_provider
+    ):
+        goals = ["ease back pain", "learn python", "play the cello"]
+        result = assess(goals, sample_products, use_semantic=True)
+
+    assert result.aligned_goals == ["ease back pain", "learn python"]
+    assert result.misaligned_goals == ["play the cello"]
+    assert result.supporting_products == ["chair-001", "course-001"]
+    assert result.confidence_summary["aligned_goal_confidence"] == {
+        "ease back pain": 0.95,
+        "learn python": 0.85,
+    }
+
+    by_id = {alignment.product_id: alignment for alignment in result.product_alignments}
+    assert [a.product_id for a in result.product_alignments] == [
+        p.id for p in sample_products
+    ]
+    chair = by_id["chair-001"]
+    assert chair.best_matching_goal == "ease back pain"
+    assert chair.best_matching_capability == "back pain relief"
+    assert chair.goal_scores == {
+        "ease back pain": 1.0,
+        "learn python": 0.0,
+        "play the cello": 0.0,
+    }
+    assert chair.confidence == 0.95
+    assert by_id["desk-001"].best_matching_goal is None
+    assert by_id["desk-001"].best_matching_capability is None
+
+
+def test_semantic_assess_reuses_stored_goal_embeddings(sample_products):
+    """Test that goals with stored embeddings are not sent to the provider."""
+    mock_provider = MagicMock()
+    mock_provider.provider_name = "mock-stored"
+    mock_provider.model_name = "v1"
+    mock_provider.dimension = 3
+    mock_provider.embed_batch = MagicMock(
+        side_effect=lambda texts: [[0.0, 0.0, 1.0] for _ in texts]
+    )
+    stored = {
+        "ease back pain": [1.0, 0.0, 0.0],
+        "learn python": [0.0, 1.0],  # other embedding space, re-embedded
+    }
+
+    with patch(
+        "shared.llm.embeddings.get_embedding_provider", return_value=mock_provider
+    ):
+        goals = ["ease back pain", "learn python"]
+        assess(goals, sample_products, goal_embeddings=stored)
+        first_texts = mock_provider.embed_batch.call_args.args[0]
+        assert first_texts[0] == "learn python"
+        assert "ease back pain" not in first_texts
+
+        # Stored goals are never re-embedded. These products are not catalog
+        # products, so they stay out of the shared index and are embedded
+        # per call (the provider's own cache absorbs the repeats).
+        mock_provider.embed_batch.reset_mock()
+        result = assess(["ease back pain"], sample_products, goal_embeddings=stored)
+        second_texts = mock_provider.embed_batch.call_args.args[0]
+        assert "ease back pain" not in second_texts
+        assert len(second_texts) == len(sample_products)
+
+    assert result.misaligned_goals == ["ease back pain"]
+
+
+def test_semantic_assess_with_every_product_already_indexed(monkeypatch):
+    """Catalog products found in the embedding index are not re-embedded."""
+    from modules.commerce import search
+    from modules.commerce.catalog import current_snapshot
+    from modules.commerce.embedding_index import CatalogEmbeddingIndex
+
+    mock_provider = MagicMock()
+    mock_provider.provider_name = "mock-indexed"
+    mock_provider.model_name = "v1"
+    mock_provider.embed_batch = MagicMock(
+        side_effect=lambda texts: [
+            [1.0, 0.0]
+            if "back" in text.lower() or "posture" in text.lower()
+            else [0.0, 1.0]
+            for text in texts
+        ]
+    )
+    catalog = search("")
+    index = CatalogEmbeddingIndex()
+    index.refresh(catalog, mock_provider.embed_batch, "mock-indexed:v1")
+    monkeypatch.setitem(current_snapshot().derived, "embeddings", index)
+    mock_provider.embed_batch.reset_mock()
+
+    with patch(
+        "shared.llm.embeddings.get_embedding_provider", return_value=mock_provider
+    ):
+        result = assess(["reduce back pain"], catalog)
+
+    # Only the goal is embedded; every product vector comes from the index.
+    mock_provider.embed_batch.assert_called_once_with(["reduce back pain"])
+    assert result.confidence_summary["alignment_method"] == "semantic"
+    assert len(result.product_alignments) == len(catalog)
+
+
+def test_assess_top_k_keeps_only_best_products_per_goal():
+    """Test top-k mode limits supporters and alignment records to the winners."""
+    products = [
+        Product(
+            id=f"p{index}",
+            name=f"Product {index}",
+            price=10.0,
+            tags=[],
+            capabilities_enabled=[f"axis {index % 2} level {index}"],
+            confidence=0.5 + index / 20,
+        )
+        for index in range(8)
+    ]
+
+    def mock_embed_batch(texts):
+        vectors = []
+        for text in texts:
+            if text.startswith("goal"):
+                axis = int(text[-1])
+                vectors.append([1.0, 0.0] if axis == 0 else [0.0, 1.0])
+            else:
+                level = int(text.split("level ")[1].split(" ")[0].rstrip("."))
+                axis = level % 2
+                # Higher levels sit closer to their axis.
+                major, minor = 1.0, 1.0 - level / 8
+                vectors.append([major, minor] if axis == 0 else [minor, major])
+        return vectors
+
+    mock_provider = MagicMock()
+    mock_provider.provider_name = "mock-top-k"
+    mock_provider.model_name = "v1"
+    mock_provider.embed_batch = MagicMock(side_effect=mock_embed_batch)
+
+    with patch(
+        "shared.llm.embeddings.get_embedding_provider", return_value=mock_provider
+    ):
+        result = assess_top_k(["goal axis 0", "goal axis 1"], products, k=2)
+        full = assess(["goal axis 0", "goal axis 1"], products)
+
+    assert result.supporting_products == ["p6", "p4", "p7", "p5"]
+    assert [a.product_id for a in result.product_alignments] == [
+        "p6",
+        "p4",
+        "p7",
+        "p5",
+    ]
+    assert result.confidence_summary["top_k"] == 2
+    assert result.aligned_goals == full.aligned_goals
+    assert len(full.supporting_products) > len(result.supporting_products)
+    assert len(full.product_alignments) == len(products)
+
+
 def test_assess_falls_back_to_keyword_on_error(sample_products):
     """Test that assess() falls back to keywords when semantic fails."""
     # Patch at the source module